@@ -1,22 +1,156 @@
-import requests
 import time
 import json
+import hashlib
+import os
+import threading
+import uuid
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
 import pandas as pd
-from config import API_KEY, API_URL
+from config import API_KEY, API_URL, AI_CACHE_TTL_SECONDS, AI_CACHE_MAX_ENTRIES
+from config import AI_HTTP_POOL_SIZE, AI_JOB_WORKERS, AI_MAX_JOBS, AI_PROMPT_TOKEN_BUDGET, AI_PROMPT_MAX_EXAMPLES
+from config import INGEST_MODE, DATA_DIR
+from prompt_digest import build_digest, fit_to_budget
+from metrics import GEMINI_REQUEST_SECONDS, GEMINI_RETRIES, GEMINI_CALLS, GEMINI_CACHE_LOOKUPS, GEMINI_CACHE_ENTRIES
 
-def call_gemini_api(df_to_analyze: pd.DataFrame, date_range_str: str) -> str:
+#Pooled keep-alive HTTP session, shared by every analysis request
+_session = None
+_session_lock = threading.Lock()
+
+#Background analysis jobs: job_id -> Future
+_jobs = OrderedDict()
+_jobs_lock = threading.Lock()
+_job_executor = ThreadPoolExecutor(max_workers=AI_JOB_WORKERS, thread_name_prefix="ai-analysis")
+
+#With several web worker processes the poll may reach a different worker than the submit,
+#so finished jobs are also written to DATA_DIR/ai_jobs/<job_id>.json
+_shared_jobs_dir = os.path.join(DATA_DIR, "ai_jobs") if INGEST_MODE == "process" else None
+
+#Response cache (TTL + LRU) and single-flight bookkeeping, keyed on a hash of the prompt payload;
+#lookups and size are reported at /metrics
+_cache = OrderedDict()
+_in_flight = {}
+_cache_lock = threading.Lock()
+GEMINI_CACHE_ENTRIES.set_function(lambda: len(_cache))
+
+
+def clear_cache():
+    """Empties the AI response cache (benchmarks use this to time uncached calls)."""
+    with _cache_lock:
+        _cache.clear()
+
+
+def _get_session():
+    global _session
+    with _session_lock:
+        if _session is None:
+            # requests is imported on the first analysis, not when the dashboard starts
+            import requests
+            from requests.adapters import HTTPAdapter
+            _session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=AI_HTTP_POOL_SIZE)
+            _session.mount("https://", adapter)
+            _session.mount("http://", adapter)
+        return _session
+
+
+def submit_analysis_job(df_to_analyze: pd.DataFrame, date_range_str: str, outage_df: pd.DataFrame = None) -> str:
+    """Starts call_gemini_api in the background and returns a job ID to poll with get_job_result."""
+    job_id = uuid.uuid4().hex
+    if _shared_jobs_dir:
+        _write_shared_job(job_id, "running", None)
+    future = _job_executor.submit(call_gemini_api, df_to_analyze, date_range_str, outage_df)
+    if _shared_jobs_dir:
+        future.add_done_callback(lambda f: _write_shared_job(job_id, *_job_status(f)))
+    with _jobs_lock:
+        _jobs[job_id] = future
+        while len(_jobs) > AI_MAX_JOBS:
+            _jobs.popitem(last=False)
+    return job_id
+
+
+def _write_shared_job(job_id, status, text):
+    os.makedirs(_shared_jobs_dir, exist_ok=True)
+    path = os.path.join(_shared_jobs_dir, f"{job_id}.json")
+    with open(f"{path}.tmp", "w", encoding="utf-8") as f:
+        json.dump({"status": status, "text": text}, f)
+    os.replace(f"{path}.tmp", path)
+
+    # Keep only the newest AI_MAX_JOBS job files
+    if status == "running":
+        paths = sorted((os.path.join(_shared_jobs_dir, name) for name in os.listdir(_shared_jobs_dir) if name.endswith(".json")),
+                       key=os.path.getmtime)
+        for old_path in paths[:-AI_MAX_JOBS]:
+            try:
+                os.remove(old_path)
+            except OSError:
+                pass
+
+
+def _read_shared_job(job_id):
+    try:
+        with open(os.path.join(_shared_jobs_dir, f"{os.path.basename(job_id)}.json"), "r", encoding="utf-8") as f:
+            job = json.load(f)
+    except (OSError, ValueError):
+        return "unknown", None
+    return job["status"], job["text"]
+
+
+def _job_status(future):
+    try:
+        return "done", future.result()
+    except Exception as e:
+        return "done", f"Analysis Error (General):** An unexpected error occurred: {e}"
+
+
+def get_job_result(job_id):
+    """Returns ("running", None), ("done", analysis text) or ("unknown", None) for a job ID."""
+    with _jobs_lock:
+        future = _jobs.get(job_id)
+    if future is None:
+        return _read_shared_job(job_id) if _shared_jobs_dir else ("unknown", None)
+    if not future.done():
+        return "running", None
+    return _job_status(future)
+
+
+def _payload_key(payload):
+    return hashlib.sha256(json.dumps(payload, sort_keys=True, separators=(",", ":")).encode("utf-8")).hexdigest()
+
+
+def _cache_get(key):
+    entry = _cache.get(key)
+    if entry is None:
+        return None
+    expires_at, text = entry
+    if expires_at < time.monotonic():
+        del _cache[key]
+        return None
+    _cache.move_to_end(key)
+    return text
+
+
+def _cache_put(key, text):
+    _cache[key] = (time.monotonic() + AI_CACHE_TTL_SECONDS, text)
+    _cache.move_to_end(key)
+    while len(_cache) > AI_CACHE_MAX_ENTRIES:
+        _cache.popitem(last=False)
+
+def call_gemini_api(df_to_analyze: pd.DataFrame, date_range_str: str, outage_df: pd.DataFrame = None) -> str:
     if not API_KEY:
         return "API Key Missing! Please set the `API_KEY` variable in `config.py` to enable AI analysis."
     
     if df_to_analyze.empty:
         return "No Data for Analysis: The current filter selections returned no records."
 
-    df_gemini = df_to_analyze.tail(50)[['date', 'issue', 'sentiment', 'description', 'source']]
-    filtered_data_json = df_gemini.to_json(orient="records", indent=2)
+    digest = build_digest(df_to_analyze, outage_df, date_range_str, max_examples=AI_PROMPT_MAX_EXAMPLES)
+    digest_json = fit_to_budget(digest, AI_PROMPT_TOKEN_BUDGET)
 
     system_prompt = (
         "You are a Senior Customer Experience Analyst for a major telecom company. "
-        "Analyze the provided JSON data of customer contacts (Call Logs and Feedback Forms). "
+        "Analyze the provided JSON digest of customer contacts (Call Logs and Feedback Forms): counts by issue, sentiment and source, "
+        "a daily Happy Index series, outage reports with the customer response on those days, and representative customer comments with their frequency. "
+        "Tables are given as column names plus rows. "
         "Provide a concise, professional, and actionable report focused on the filter period. "
         "1. **Executive Summary:** A two-sentence summary of the overall sentiment and primary issue during this period. "
         "2. **Key Findings:** Detail the most critical issue, noting any difference between Call Logs and Feedback Forms. "
@@ -25,8 +159,8 @@ def call_gemini_api(df_to_analyze: pd.DataFrame, date_range_str: str) -> str:
     )
 
     user_query = (
-        f"Analyze the following recent customer contact data (filtered for {date_range_str}). "
-        f"DATA (Top 50 Records):\n```json\n{filtered_data_json}\n```"
+        f"Analyze the following customer contact digest (filtered for {date_range_str}). "
+        f"DIGEST:\n```json\n{digest_json}\n```"
     )
 
     payload = {
@@ -35,25 +169,72 @@ def call_gemini_api(df_to_analyze: pd.DataFrame, date_range_str: str) -> str:
         "systemInstruction": {"parts": [{"text": system_prompt}]},
     }
 
+    key = _payload_key(payload)
+    with _cache_lock:
+        cached = _cache_get(key)
+        if cached is not None:
+            GEMINI_CACHE_LOOKUPS.inc(result="hit")
+            GEMINI_CALLS.inc(outcome="cache_hit")
+            return cached
+        future = _in_flight.get(key)
+        is_leader = future is None
+        if is_leader:
+            future = _in_flight[key] = Future()
+            GEMINI_CACHE_LOOKUPS.inc(result="miss")
+        else:
+            GEMINI_CACHE_LOOKUPS.inc(result="coalesced")
+
+    # Identical concurrent requests wait on the first caller's upstream call instead of making their own
+    if not is_leader:
+        GEMINI_CALLS.inc(outcome="coalesced")
+        return future.result()
+
+    try:
+        text, ok = _request_analysis(payload)
+        GEMINI_CALLS.inc(outcome="ok" if ok else "error")
+        if ok:
+            with _cache_lock:
+                _cache_put(key, text)
+        future.set_result(text)
+        return text
+    except BaseException as e:
+        future.set_exception(e)
+        raise
+    finally:
+        with _cache_lock:
+            _in_flight.pop(key, None)
+
+
+def _request_analysis(payload):
+    """POSTs the payload with retries. Returns (text, ok); only ok responses are cached."""
+    import requests
     try:
         for attempt in range(3):
-            response = requests.post(API_URL, headers={'Content-Type': 'application/json'}, json=payload, timeout=30)
+            started = time.perf_counter()
+            try:
+                response = _get_session().post(API_URL, headers={'Content-Type': 'application/json'}, json=payload, timeout=30)
+            except requests.exceptions.RequestException:
+                GEMINI_REQUEST_SECONDS.observe(time.perf_counter() - started, status="error")
+                raise
+            GEMINI_REQUEST_SECONDS.observe(time.perf_counter() - started, status=str(response.status_code))
             
             if response.status_code == 200:
                 result = response.json()
                 if result.get('candidates') and result['candidates'][0].get('content'):
-                    return result['candidates'][0]['content']['parts'][0]['text']
+                    return result['candidates'][0]['content']['parts'][0]['text'], True
                 else:
-                    return f"AI Response Error: The API returned an empty or malformed response. Status: {response.status_code}"
+                    return f"AI Response Error: The API returned an empty or malformed response. Status: {response.status_code}", False
 
             if response.status_code in [429, 500, 503]:
+                if attempt < 2:
+                    GEMINI_RETRIES.inc()
                 time.sleep(2 ** attempt) 
             else:
-                return f"Analysis Error (HTTP {response.status_code}):{response.reason}."
+                return f"Analysis Error (HTTP {response.status_code}):{response.reason}.", False
         
-        return "Analysis Failed:** The API failed to return a valid response after multiple attempts."
+        return "Analysis Failed:** The API failed to return a valid response after multiple attempts.", False
 
     except requests.exceptions.RequestException as e:
-        return f"Analysis Error (Network):** Could not connect to the API. Details: {e}"
+        return f"Analysis Error (Network):** Could not connect to the API. Details: {e}", False
     except Exception as e:
-        return f"Analysis Error (General):** An unexpected error occurred: {e}"
\ No newline at end of file
+        return f"Analysis Error (General):** An unexpected error occurred: {e}", False
\ No newline at end of file
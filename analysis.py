@@ -0,0 +1,111 @@
+import re
+import time
+
+#Issue keywords, in priority order: a text belongs to the first category with any keyword in it
+ISSUE_KEYWORDS = {
+    "Network": ["signal", "disconnect", "outage", "coverage", "5g", "data speed", "no service", "zero bars"],
+    "Billing": ["bill", "charged", "refund", "payment", "fee", "trade-in", "credit", "compensation"],
+    "App/Device": ["app", "crash", "update", "esim", "phone", "tablet", "voicemail", "setup"],
+    "Support": ["help", "service", "resolution", "agent", "compliment", "empathetic", "professional"],
+    "Other": []
+}
+ISSUE_CATEGORIES = list(ISSUE_KEYWORDS)
+
+# One alternation for every keyword, ordered by category priority and wrapped in a lookahead so
+# matches may overlap. At each position the regex engine reports the highest-priority keyword that
+# starts there, so the best category over all positions is the best category over all keywords.
+_KEYWORD_PRIORITY = {}
+for _priority, _words in enumerate(ISSUE_KEYWORDS.values()):
+    for _word in _words:
+        _KEYWORD_PRIORITY.setdefault(_word, _priority)
+_ISSUE_PATTERN = re.compile("(?=(" + "|".join(re.escape(word) for word in _KEYWORD_PRIORITY) + "))")
+_NO_MATCH = len(ISSUE_CATEGORIES) - 1
+
+
+def extract_issue(text):
+    best = _NO_MATCH
+    for match in _ISSUE_PATTERN.finditer(text.lower()):
+        priority = _KEYWORD_PRIORITY[match.group(1)]
+        if priority < best:
+            best = priority
+            if best == 0:
+                break
+    return ISSUE_CATEGORIES[best]
+
+
+#Batch classification stage
+
+def classify_issues(texts):
+    cache = {}
+    issues = []
+    for text in texts:
+        issue = cache.get(text)
+        if issue is None:
+            issue = cache[text] = extract_issue(text)
+        issues.append(issue)
+    return issues
+
+
+def score_sentiments(texts, analyzer):
+    # VADER has no vectorized entry point, so score each distinct text in the batch once
+    cache = {}
+    scores = []
+    for text in texts:
+        score = cache.get(text)
+        if score is None:
+            score = cache[text] = analyzer.polarity_scores(text)['compound']
+        scores.append(score)
+    return scores
+
+
+def analyze_batch(descriptions, analyzer, timings=None):
+    """Classifies a micro-batch of descriptions, returning (issue, sentiment_score) pairs in input order.
+
+    If a timings dict is given, the seconds spent in each stage are stored in it.
+    """
+    start = time.perf_counter()
+    issues = classify_issues(descriptions)
+    classified = time.perf_counter()
+    scores = score_sentiments(descriptions, analyzer)
+    if timings is not None:
+        timings["issue_extraction"] = classified - start
+        timings["sentiment_scoring"] = time.perf_counter() - classified
+    return list(zip(issues, scores))
+
+
+#VADER lexicon: checked on disk first, so startup needs no network once it has been downloaded
+
+_vader_lexicon_ready = False
+
+def ensure_vader_lexicon():
+    """Finds the VADER lexicon in the local nltk_data, downloading it only if it is missing."""
+    global _vader_lexicon_ready
+    if _vader_lexicon_ready:
+        return
+    import nltk
+    try:
+        nltk.data.find('sentiment/vader_lexicon.zip')
+    except LookupError:
+        # nltk.download reports failure (e.g. no network) by returning False, not by raising
+        if not nltk.download('vader_lexicon', quiet=True):
+            raise LookupError("The VADER lexicon is not in nltk_data and could not be downloaded; "
+                              "run python -m nltk.downloader vader_lexicon where there is network access")
+        nltk.data.find('sentiment/vader_lexicon.zip')
+    _vader_lexicon_ready = True
+
+
+#Process-pool workers: each worker builds its own analyzer once, in the initializer
+
+_worker_analyzer = None
+
+def init_scoring_worker():
+    global _worker_analyzer
+    ensure_vader_lexicon()
+    from nltk.sentiment.vader import SentimentIntensityAnalyzer
+    _worker_analyzer = SentimentIntensityAnalyzer()
+
+
+def analyze_batch_in_worker(descriptions):
+    """Returns (results, stage timings), so the parent process can record the worker's stage latency."""
+    timings = {}
+    return analyze_batch(descriptions, _worker_analyzer, timings), timings
@@ -0,0 +1,119 @@
+import math
+import threading
+import time
+from collections import deque
+
+# Online spike detection over the analyzed record stream. Every monitored signal is a 0/1 indicator
+# per record (is this record NEGATIVE? is it a Network issue?) on its own stream of records:
+#
+#   negative_rate  per (source, issue) and per (source, all issues)
+#   network_share  per source: the share of its records that are Network issues
+#
+# Each stream keeps a fast EWMA (the current rate) and a slow EWMA (the baseline). Under the
+# baseline rate p, a fast EWMA with smoothing alpha has variance p(1-p) * alpha / (2 - alpha), so
+# z = (fast - slow) / sqrt(that) says how unusual the current rate is. A stream alerts when z
+# crosses the threshold and re-arms once z falls back below half of it. State is a handful of
+# floats per stream, updated in O(1) per record.
+
+
+class _IndicatorStream:
+    __slots__ = ("fast", "slow", "count", "onset", "alerting")
+
+    def __init__(self):
+        self.fast = None
+        self.slow = None
+        self.count = 0
+        self.onset = 0  # record count at which the current run of fast > slow began
+        self.alerting = False
+
+
+class AlertLog:
+    """Bounded, thread-safe log of the most recent alerts (oldest are dropped first)."""
+
+    def __init__(self, max_events=200):
+        self._events = deque(maxlen=max_events)
+        self._lock = threading.Lock()
+        self.version = 0
+
+    def append(self, event):
+        with self._lock:
+            self._events.append(event)
+            self.version += 1
+
+    def recent(self, limit=None):
+        """Returns the newest alerts first."""
+        with self._lock:
+            events = list(self._events)
+        events.reverse()
+        return events[:limit] if limit else events
+
+
+class SpikeDetector:
+    """Flags spikes in negative sentiment rate and Network issue share as records arrive."""
+
+    def __init__(self, alert_log, fast_alpha=0.2, slow_alpha=0.02, z_threshold=3.0, min_records=10, on_alert=None):
+        self.alert_log = alert_log
+        self.fast_alpha = fast_alpha
+        self.slow_alpha = slow_alpha
+        self.z_threshold = z_threshold
+        self.min_records = min_records
+        self.on_alert = on_alert
+        self.records_seen = 0
+        self._streams = {}
+        self._variance_factor = fast_alpha / (2 - fast_alpha)
+        self._lock = threading.Lock()
+
+    def observe(self, records):
+        """Feeds analyzed record dicts, in arrival order, through every stream they belong to."""
+        with self._lock:
+            for record in records:
+                self.records_seen += 1
+                source = record["source"]
+                is_negative = 1.0 if record["sentiment"] == "NEGATIVE" else 0.0
+                self._update(("negative_rate", source, record["issue"]), is_negative, record)
+                self._update(("negative_rate", source, "All issues"), is_negative, record)
+                self._update(("network_share", source, "Network"), 1.0 if record["issue"] == "Network" else 0.0, record)
+
+    def _update(self, key, value, record):
+        stream = self._streams.get(key)
+        if stream is None:
+            stream = self._streams[key] = _IndicatorStream()
+        stream.count += 1
+        if stream.fast is None:
+            stream.fast = stream.slow = value
+            return
+
+        baseline = stream.slow
+        if stream.fast <= baseline:
+            stream.onset = stream.count
+        # A plain running mean while a stream is young, so its first records aren't overweighted;
+        # the baseline switches to its slow EWMA once the stream may alert
+        stream.fast += max(self.fast_alpha, 1.0 / stream.count) * (value - stream.fast)
+        slow_alpha = 1.0 / stream.count if stream.count <= self.min_records else self.slow_alpha
+        stream.slow += slow_alpha * (value - stream.slow)
+
+        # Floor the baseline away from 0 and 1, where a rate has no variance to measure against
+        p = min(max(baseline, 0.02), 0.98)
+        z = (stream.fast - baseline) / math.sqrt(p * (1 - p) * self._variance_factor)
+        if stream.alerting:
+            stream.alerting = z > self.z_threshold / 2
+        elif z > self.z_threshold and stream.count > self.min_records:
+            stream.alerting = True
+            metric, source, issue = key
+            event = {
+                "time": time.time(),
+                "metric": metric,
+                "source": source,
+                "issue": issue,
+                "rate": round(stream.fast, 3),
+                "baseline": round(baseline, 3),
+                "z": round(z, 2),
+                "record_id": record["record_id"],
+                "date": str(record["date"]),
+                "stream_records": stream.count,
+                "detection_latency_records": stream.count - stream.onset + 1,
+                "records_seen": self.records_seen,
+            }
+            self.alert_log.append(event)
+            if self.on_alert is not None:
+                self.on_alert(event)
@@ -1,13 +1,18 @@
-import threading 
 import time
+_startup_began = time.time()  # before the heavy imports, so time-to-first-response covers them
+import os
+import threading 
 import dash
 from dash import dcc
 from dash import html
-from flask import Flask
+from flask import Flask, jsonify
 from config import MAGENTA, DARK_GRAY, LIGHT_GRAY
-from config import NARRATIVE_START_DATE, NUM_DAYS, DATE_FORMAT
-from data_pipeline import run_pipeline_consumer
+from config import NARRATIVE_START_DATE, NUM_DAYS, DATE_FORMAT, AI_JOB_POLL_MS
+from config import LIVE_UPDATE_MODE, LIVE_POLL_INTERVAL_MS, LIVE_PUSH_RESYNC_MS, INGEST_MODE, QUERY_MODE
+from data_pipeline import run_pipeline_consumer, warm_start, record_store, start_shared_store_follower
 from callbacks import register_callbacks
+from live_updates import register_live_updates
+from metrics import register_metrics, STARTUP_IMPORT_SECONDS, TIME_TO_FIRST_RESPONSE_SECONDS
 import datetime
 
 # --- APP SETUP ---
@@ -21,19 +26,54 @@ date_range = [NARRATIVE_START_DATE + datetime.timedelta(days=i) for i in range(N
 min_date = date_range[0].strftime(DATE_FORMAT)
 max_date = date_range[-1].strftime(DATE_FORMAT)
 
-# Register all callbacks
+# Register all callbacks and the push-mode event stream
 register_callbacks(dash_app)
+register_live_updates(flask_server)
+register_metrics(flask_server)
+
+# In process mode every web worker mirrors the ingest process's store; started on the first request
+# so it also works for workers forked by gunicorn after the app was imported
+if INGEST_MODE == 'process':
+    flask_server.before_request(start_shared_store_follower)
+
+# Time-to-first-response: recorded once per process, when the first response is sent
+_first_response_sent = False
+
+@flask_server.after_request
+def record_first_response(response):
+    global _first_response_sent
+    if not _first_response_sent:
+        _first_response_sent = True
+        elapsed = time.time() - _startup_began
+        TIME_TO_FIRST_RESPONSE_SECONDS.set(round(elapsed, 3))
+        print(f"Time to first response: {elapsed:.2f}s (pid {os.getpid()})")
+    return response
+
+@flask_server.route('/status')
+def status():
+    return jsonify(pid=os.getpid(), records=len(record_store), data_version=record_store.version)
 
 # --- LAYOUT DEFINITION ---
 
 def generate_dashboard_layout():
     return html.Div(style={'backgroundColor': LIGHT_GRAY, 'color': DARK_GRAY, 'fontFamily': 'Inter, sans-serif', 'minHeight': '100vh'}, children=[
         
+        # In push mode the interval only resyncs the full charts now and then; new records arrive over /live-updates
         dcc.Interval(
             id='interval-component',
-            interval=3*1000,
+            interval=LIVE_PUSH_RESYNC_MS if LIVE_UPDATE_MODE == 'push' else LIVE_POLL_INTERVAL_MS,
             n_intervals=0
         ),
+        dcc.Interval(id='initial-load', interval=500, n_intervals=0, max_intervals=1),
+        dcc.Store(id='live-mode', data=LIVE_UPDATE_MODE),
+        dcc.Store(id='live-stream-status'),
+        
+        # Data version, date range and query mode of the charts this browser currently shows
+        dcc.Store(id='charts-version'),
+        
+        # Background AI analysis job: the ID of the running job, polled until its result is ready
+        dcc.Store(id='ai-job-store'),
+        dcc.Interval(id='ai-job-poll', interval=AI_JOB_POLL_MS, n_intervals=0, disabled=True),
         
         html.Div(style={'backgroundColor': MAGENTA, 'color': 'white', 'padding': '20px', 'boxShadow': '0 4px 6px rgba(0,0,0,0.1)'}, children=[
             html.H1(children='T-Mobile Customer Experience Dashboard',
@@ -52,6 +92,14 @@ def generate_dashboard_layout():
                     display_format='YYYY-MM-DD',
                     style={'color': DARK_GRAY}
                 ),
+                # Exact answers from the full rollups; Fast estimates from reservoir samples (with error bounds in the footer)
+                dcc.RadioItems(
+                    id='query-mode',
+                    options=[{'label': 'Exact', 'value': 'exact'}, {'label': 'Fast', 'value': 'fast'}],
+                    value=QUERY_MODE,
+                    inline=True,
+                    inputStyle={'marginRight': '4px', 'marginLeft': '10px'}
+                ),
                 html.Button('Manual Refresh', id='manual-refresh-btn', n_clicks=0, 
                             style={'backgroundColor': 'white', 'color': MAGENTA, 'border': '1px solid white', 'padding': '8px 15px', 'borderRadius': '4px', 'cursor': 'pointer'}),
                 html.Button('Generate AI Analysis', id='ai-analysis-btn', n_clicks=0, 
@@ -69,6 +117,14 @@ def generate_dashboard_layout():
             )
         ]),
 
+        # Spike alerts from the streaming detector, newest first
+        html.Div(style={'padding': '20px', 'backgroundColor': 'white', 'borderRadius': '8px', 'boxShadow': '0 4px 8px rgba(0,0,0,0.05)', 'margin': '20px'}, children=[
+            html.H2("Live Anomaly Alerts", style={'color': MAGENTA, 'marginBottom': '10px', 'borderBottom': f'2px solid {MAGENTA}', 'paddingBottom': '5px'}),
+            html.Div(id='alerts-output', children="No anomalies detected yet.", style={'padding': '10px', 'backgroundColor': LIGHT_GRAY, 'borderRadius': '4px'}),
+            dcc.Store(id='alerts-version'),
+            dcc.Interval(id='alerts-poll', interval=LIVE_POLL_INTERVAL_MS, n_intervals=0),
+        ]),
+
         html.Div(id='charts-container', style={'padding': '20px'}), 
         
         html.Div(id='footer-status', style={'textAlign': 'right', 'padding': '10px 20px 10px 20px', 'color': DARK_GRAY})
@@ -76,6 +132,8 @@ def generate_dashboard_layout():
 
 dash_app.layout = generate_dashboard_layout
 
+STARTUP_IMPORT_SECONDS.set(round(time.time() - _startup_began, 3))
+
 # --- RUN LOGIC ---
 
 def run_pipeline_after_delay():
@@ -83,8 +141,16 @@ def run_pipeline_after_delay():
     run_pipeline_consumer()
 
 if __name__ == '__main__':
-    pipeline_thread = threading.Thread(target=run_pipeline_after_delay, daemon=True)
-    pipeline_thread.start()
+    if INGEST_MODE == 'process':
+        start_shared_store_follower()
+    else:
+        # Map any persisted history before serving, so the first page already shows it
+        warm_start_begin = time.time()
+        warm_start()
+        print(f"Warm start: {len(record_store)} records restored in {time.time() - warm_start_begin:.2f}s")
+        
+        pipeline_thread = threading.Thread(target=run_pipeline_after_delay, daemon=True)
+        pipeline_thread.start()
     
     # FIX: Changed dash_app.run_server to dash_app.run
     dash_app.run(debug=False, host='0.0.0.0', port=5001)
\ No newline at end of file
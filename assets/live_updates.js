@@ -0,0 +1,78 @@
+// Push-mode client: listens on /live-updates and patches the line charts in place.
+(function () {
+    var source = null;
+
+    function graphDiv(graphId) {
+        return document.querySelector('#' + graphId + ' .js-plotly-plot');
+    }
+
+    // Upserts [day, value] points into the first trace: existing days are overwritten, new days
+    // are appended with extendTraces (or the trace is re-sorted if a day arrives out of order).
+    function upsertPoints(graphId, points) {
+        var gd = graphDiv(graphId);
+        if (!gd || !gd.data || !gd.data.length || !points.length || !window.Plotly) {
+            return;
+        }
+        var trace = gd.data[0];
+        var x = Array.from(trace.x || []).map(function (v) { return String(v).slice(0, 10); });
+        var y = Array.from(trace.y || []);
+        var lastDay = x.length ? x[x.length - 1] : '';
+        var appendX = [], appendY = [], restyle = false;
+
+        points.forEach(function (point) {
+            var i = x.indexOf(point[0]);
+            if (i >= 0) {
+                y[i] = point[1];
+                restyle = true;
+            } else if (point[0] > lastDay) {
+                appendX.push(point[0]);
+                appendY.push(point[1]);
+                lastDay = point[0];
+            } else {
+                x.push(point[0]);
+                y.push(point[1]);
+                restyle = true;
+            }
+        });
+
+        if (restyle) {
+            var order = x.map(function (_, i) { return i; }).sort(function (a, b) { return x[a] < x[b] ? -1 : 1; });
+            window.Plotly.restyle(gd, {
+                x: [order.map(function (i) { return x[i]; })],
+                y: [order.map(function (i) { return y[i]; })]
+            }, [0]);
+        }
+        if (appendX.length) {
+            window.Plotly.extendTraces(gd, {x: [appendX], y: [appendY]}, [0]);
+        }
+    }
+
+    function onUpdate(event) {
+        var payload = JSON.parse(event.data);
+        window.dash_clientside.set_props('footer-status', {children: payload.footer});
+        upsertPoints('negative-trend-line', payload.negative);
+        upsertPoints('happy-index-line', payload.happy_index);
+    }
+
+    window.dash_clientside = Object.assign({}, window.dash_clientside, {
+        live_updates: {
+            connect: function (mode, startDate, endDate, chartsKey) {
+                if (source) {
+                    source.close();
+                    source = null;
+                }
+                // Fast-mode charts hold estimated, downsampled points: they refresh on the resync interval instead
+                if (mode !== 'push' || !startDate || !endDate || (chartsKey && chartsKey[3] === 'fast')) {
+                    return 'off';
+                }
+                var params = new URLSearchParams({start: startDate, end: endDate});
+                if (chartsKey && chartsKey[1] === startDate && chartsKey[2] === endDate) {
+                    params.set('version', chartsKey[0]);
+                }
+                source = new EventSource('/live-updates?' + params.toString());
+                source.onmessage = onUpdate;
+                return 'connected';
+            }
+        }
+    });
+})();
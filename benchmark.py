@@ -0,0 +1,185 @@
+import argparse
+import datetime
+import json
+import os
+import platform
+import statistics
+import subprocess
+import time
+import ai_client
+import data_pipeline
+from callbacks import get_filtered_dataframe, render_charts_and_graphs
+from config import NARRATIVE_START_DATE, DATE_FORMAT, PIPELINE_BATCH_SIZE, RECORD_STORE_BACKEND, SCORING_PROCESSES
+from config import AI_PROMPT_TOKEN_BUDGET, AI_PROMPT_MAX_EXAMPLES
+from record_store import slice_by_day
+from prompt_digest import build_digest, fit_to_budget
+from sources import template_source
+from stub_gemini import start_stub_gemini_server
+
+# Reproducible benchmarks of the hot paths, written as JSON so runs can be compared:
+#
+#   python benchmark.py --records 10000 100000 1000000 --output bench_results.json
+#   python benchmark.py --records 10000 --compare bench_results.json
+#   python benchmark.py --records 100000 --scoring-processes 4 --compare bench_results.json
+#
+# Record sets are generated from the hand-crafted narrative (same shape as create_record),
+# spread over --days days with a fixed seed, and pushed through run_pipeline_consumer.
+
+
+def _summary(seconds):
+    ordered = sorted(seconds)
+    return {
+        "runs": len(ordered),
+        "median_ms": round(statistics.median(ordered) * 1000, 3),
+        "p95_ms": round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))] * 1000, 3),
+        "min_ms": round(ordered[0] * 1000, 3),
+    }
+
+
+def _windows(num_days, window_days, repeats):
+    # Slide the window across the data; when it cannot slide (window_days >= num_days) every run reads
+    # the same days, which is why bench_window also clears the store's caches before each run
+    for i in range(repeats):
+        offset = i % max(1, num_days - window_days + 1)
+        start = NARRATIVE_START_DATE + datetime.timedelta(days=offset)
+        end = start + datetime.timedelta(days=window_days - 1)
+        yield start.strftime(DATE_FORMAT), end.strftime(DATE_FORMAT)
+
+
+def bench_pipeline(num_records, num_days, seed):
+    data_pipeline.record_store.reset()
+    source = template_source(data_pipeline.get_hand_crafted_records(), PIPELINE_BATCH_SIZE, num_records,
+                             NARRATIVE_START_DATE, num_days, seed=seed, key="bench")
+    start = time.perf_counter()
+    data_pipeline.run_pipeline_consumer(sources=[source])
+    elapsed = time.perf_counter() - start
+    return {"seconds": round(elapsed, 3), "records": len(data_pipeline.record_store),
+            "records_per_second": round(len(data_pipeline.record_store) / elapsed, 1)}
+
+
+def bench_window(func, num_days, window_days, repeats):
+    timings = []
+    for start, end in _windows(num_days, window_days, repeats):
+        data_pipeline.record_store.clear_caches()  # every run is an uncached query
+        began = time.perf_counter()
+        func(start, end)
+        timings.append(time.perf_counter() - began)
+    return _summary(timings)
+
+
+def bench_prompt(num_days, window_days, repeats):
+    outage_df = data_pipeline.get_outage_df()
+    build_timings, call_timings = [], []
+    for start, end in _windows(num_days, window_days, repeats):
+        filtered_df, date_range_str = get_filtered_dataframe(start, end)
+        window_outages = slice_by_day(outage_df, start, end)
+
+        began = time.perf_counter()
+        fit_to_budget(build_digest(filtered_df, window_outages, date_range_str, AI_PROMPT_MAX_EXAMPLES), AI_PROMPT_TOKEN_BUDGET)
+        build_timings.append(time.perf_counter() - began)
+
+        ai_client.clear_cache()
+        began = time.perf_counter()
+        ai_client.call_gemini_api(filtered_df, date_range_str, window_outages)
+        call_timings.append(time.perf_counter() - began)
+    return {"prompt_build": _summary(build_timings), "call_gemini_api": _summary(call_timings)}
+
+
+def run_benchmarks(record_counts, num_days, window_sizes, repeats, seed):
+    stub = start_stub_gemini_server()
+    ai_client.API_URL = f"http://127.0.0.1:{stub.server_port}/"
+    ai_client.API_KEY = ai_client.API_KEY or "benchmark"
+    results = []
+    try:
+        for num_records in record_counts:
+            print(f"Benchmarking {num_records} records over {num_days} days...")
+            result = {"records": num_records, "pipeline": bench_pipeline(num_records, num_days, seed),
+                      "filter": {}, "charts": {}, "charts_fast": {}, "prompt": {}}
+            for window_days in window_sizes:
+                window_days = min(window_days, num_days)
+                key = f"{window_days}d"
+                result["filter"][key] = bench_window(get_filtered_dataframe, num_days, window_days, repeats)
+                result["charts"][key] = bench_window(
+                    lambda start, end: render_charts_and_graphs(data_pipeline.get_outage_df(), start, end),
+                    num_days, window_days, repeats)
+                result["charts_fast"][key] = bench_window(
+                    lambda start, end: render_charts_and_graphs(data_pipeline.get_outage_df(), start, end, "fast"),
+                    num_days, window_days, repeats)
+                result["prompt"][key] = bench_prompt(num_days, window_days, repeats)
+            results.append(result)
+    finally:
+        stub.shutdown()
+    return results
+
+
+def _git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _flatten(results):
+    # "<records>/<section>/<window>/<metric>" -> value, for comparing two result files
+    flat = {}
+    for result in results:
+        prefix = str(result["records"])
+        flat[f"{prefix}/pipeline/records_per_second"] = result["pipeline"]["records_per_second"]
+        for section in ["filter", "charts", "charts_fast"]:
+            for window, summary in result.get(section, {}).items():
+                flat[f"{prefix}/{section}/{window}/median_ms"] = summary["median_ms"]
+        for window, prompt in result["prompt"].items():
+            for name, summary in prompt.items():
+                flat[f"{prefix}/{name}/{window}/median_ms"] = summary["median_ms"]
+    return flat
+
+
+def compare(baseline_path, results):
+    with open(baseline_path, "r", encoding="utf-8") as f:
+        baseline = _flatten(json.load(f)["results"])
+    current = _flatten(results)
+    print(f"{'metric':<50} {'baseline':>12} {'current':>12} {'ratio':>8}")
+    for key in sorted(baseline.keys() & current.keys()):
+        ratio = current[key] / baseline[key] if baseline[key] else float("nan")
+        print(f"{key:<50} {baseline[key]:>12} {current[key]:>12} {ratio:>8.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="HappyConnect benchmarks")
+    parser.add_argument("--records", type=int, nargs="+", default=[10000, 100000], help="record set sizes (10k to 10M)")
+    parser.add_argument("--days", type=int, default=90, help="days the records are spread over")
+    parser.add_argument("--windows", type=int, nargs="+", default=[1, 7, 30, 90], help="date filter window sizes in days")
+    parser.add_argument("--repeats", type=int, default=10, help="timed runs per window size")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--scoring-processes", type=int, default=SCORING_PROCESSES,
+                        help="sentiment scoring worker processes for the pipeline run (0 scores on the pipeline thread)")
+    parser.add_argument("--output", default="bench_results.json")
+    parser.add_argument("--compare", help="earlier results file to compare against")
+    args = parser.parse_args()
+    data_pipeline.SCORING_PROCESSES = args.scoring_processes
+
+    results = run_benchmarks(args.records, args.days, args.windows, args.repeats, args.seed)
+    report = {
+        "meta": {
+            "timestamp": datetime.datetime.now().isoformat(timespec="seconds"),
+            "git_commit": _git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "record_store_backend": RECORD_STORE_BACKEND,
+            "scoring_processes": args.scoring_processes,
+            "days": args.days,
+            "repeats": args.repeats,
+            "seed": args.seed,
+        },
+        "results": results,
+    }
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"Results written to {args.output}")
+    if args.compare:
+        compare(args.compare, results)
+
+
+if __name__ == "__main__":
+    main()
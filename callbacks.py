@@ -1,45 +1,123 @@
 import dash
 from dash import dcc
 from dash import html
-from dash.dependencies import Input, Output, State
-import plotly.express as px
+from dash.dependencies import Input, Output, State, ClientsideFunction
 import pandas as pd
 import datetime
-from config import MAGENTA, DARK_GRAY, LIGHT_GRAY, BLUE, DATE_FORMAT
-from data_pipeline import all_analyzed_records, TOTAL_EXPECTED_RECORDS, get_outage_df
-from ai_client import call_gemini_api
+import functools
+import threading
+from collections import OrderedDict
+from config import MAGENTA, DARK_GRAY, LIGHT_GRAY, BLUE, DATE_FORMAT, FIGURE_CACHE_SIZE, ALERTS_SHOWN, CHART_POINT_BUDGET
+from record_store import slice_by_day
+from sampling import estimate_issue_breakdown, estimate_daily_sentiment, sample_error_bounds, downsample
+from data_pipeline import record_store, total_expected_records, get_outage_df, alert_log
+from metrics import CALLBACK_SECONDS, timed
 
 #Data Filtering Function
 
-def get_filtered_dataframe(start_date_str, end_date_str):
-    if not all_analyzed_records:
+def get_filtered_dataframe(start_date_str, end_date_str, sampled=False):
+    """The records of the date window, or with sampled=True its weighted reservoir sample (fast mode)."""
+    if len(record_store) == 0:
         return pd.DataFrame(), None
         
-    df = pd.DataFrame(all_analyzed_records)
-    df['date'] = pd.to_datetime(df['date'])
-    
     start_date = pd.to_datetime(start_date_str).normalize()
-    end_date = pd.to_datetime(end_date_str).normalize() + datetime.timedelta(days=1)
+    end_date = pd.to_datetime(end_date_str).normalize()
     
-    filtered_df = df[
-        (df['date'] >= start_date) & 
-        (df['date'] < end_date) 
-    ].copy()
+    # The store resolves the inclusive day window to a contiguous run of day partitions, no row mask needed
+    read = record_store.sample if sampled else record_store.snapshot
+    filtered_df = read(start_date, end_date)
     
-    date_range_str = f"{start_date.strftime('%Y-%m-%d')} to {(end_date - datetime.timedelta(days=1)).strftime('%Y-%m-%d')}"
+    date_range_str = f"{start_date.strftime('%Y-%m-%d')} to {end_date.strftime('%Y-%m-%d')}"
     return filtered_df, date_range_str
 
 
+def format_footer(filtered_count, error_bounds=None):
+    footer = f"Last updated: {datetime.datetime.now().strftime('%H:%M:%S')} | Records Processed: {len(record_store)}/{total_expected_records()} | Filtered Records: {filtered_count}"
+    if error_bounds is not None:
+        footer += (f" | Fast mode: estimated from {error_bounds['sampled']:,} of {error_bounds['records']:,} records, "
+                   f"NEGATIVE share {error_bounds['negative_share']:.1%} ± {error_bounds['negative_share_margin']:.1%}, "
+                   f"Happy Index ± {error_bounds['happy_index_margin']:.2f} per day (95% CI); "
+                   f"lines limited to {CHART_POINT_BUDGET} points")
+    return footer
+
+
+def format_alert(event):
+    """One line of the alerts panel for a SpikeDetector event."""
+    what = "Negative sentiment rate" if event['metric'] == 'negative_rate' else "Network issue share"
+    scope = event['source'] if event['issue'] in ('All issues', 'Network') else f"{event['source']} / {event['issue']}"
+    detected_at = datetime.datetime.fromtimestamp(event['time']).strftime('%H:%M:%S')
+    return html.Div([
+        html.Strong(f"{what} spike ({scope}): ", style={'color': MAGENTA}),
+        f"{event['rate']:.0%} vs baseline {event['baseline']:.0%} (z = {event['z']}) on {event['date']}, "
+        f"detected within {event['detection_latency_records']} record(s) of onset at {detected_at}",
+    ], style={'padding': '4px 0'})
+
+
+#Figure cache, shared by all browser sessions: (data version, start, end, mode) -> charts layout
+
+_figure_cache = OrderedDict()
+_figure_cache_lock = threading.Lock()
+
+def get_cached_charts(data_version, outage_df, start_date_str, end_date_str, mode="exact"):
+    key = (data_version, start_date_str, end_date_str, mode)
+    with _figure_cache_lock:
+        charts = _figure_cache.get(key)
+        if charts is not None:
+            _figure_cache.move_to_end(key)
+            return charts
+    
+    charts = render_charts_and_graphs(outage_df, start_date_str, end_date_str, mode)
+    with _figure_cache_lock:
+        _figure_cache[key] = charts
+        while len(_figure_cache) > FIGURE_CACHE_SIZE:
+            _figure_cache.popitem(last=False)
+    return charts
+
+
+@functools.lru_cache(maxsize=FIGURE_CACHE_SIZE)
+def get_error_bounds(data_version, start_date_str, end_date_str):
+    """Fast-mode margins of error for the footer (data_version is only part of the cache key)."""
+    return sample_error_bounds(record_store.sample(start_date_str, end_date_str))
+
+
+def latency_outage_correlation(latency_daily, outage_df):
+    """Correlates daily p95 call latency with outage reports (0 on days without any).
+
+    Returns (Pearson r or None, mean p95 on outage days, mean p95 on other days).
+    """
+    reports = outage_df.groupby('date')['reported_count'].sum().rename('reports')
+    daily = latency_daily.set_index('Date')[['p95']].join(reports).fillna({'reports': 0})
+    on_outage = daily.loc[daily['reports'] > 0, 'p95']
+    off_outage = daily.loc[daily['reports'] == 0, 'p95']
+    r = None
+    if len(daily) >= 3 and daily['reports'].nunique() > 1 and daily['p95'].nunique() > 1:
+        r = float(daily['p95'].corr(daily['reports']))
+    return r, (float(on_outage.mean()) if len(on_outage) else None), (float(off_outage.mean()) if len(off_outage) else None)
+
+
 #To render the charts 
 
-def render_charts_and_graphs(filtered_df, outage_df, start_date_str, end_date_str):
-    """Generates and returns the charts layout."""
+def render_charts_and_graphs(outage_df, start_date_str, end_date_str, mode="exact"):
+    """Generates and returns the charts layout from the store's per-day rollups.
+
+    In "fast" mode the issue and sentiment charts are estimated from the store's reservoir samples
+    instead, and the line charts are downsampled to CHART_POINT_BUDGET points.
+    """
+    import plotly.express as px  # deferred until the first charts are drawn, off the first-page path
 
-    issue_breakdown = filtered_df.groupby(['issue', 'sentiment', 'source']).size().reset_index(name='Count')
+    fast = mode == "fast"
+    estimated = ' (estimated)' if fast else ''
+    if fast:
+        sample = record_store.sample(start_date_str, end_date_str)
+        issue_breakdown = estimate_issue_breakdown(sample)
+        daily_summary = estimate_daily_sentiment(sample)
+    else:
+        issue_breakdown = record_store.issue_breakdown(start_date_str, end_date_str)
+        daily_summary = record_store.daily_sentiment(start_date_str, end_date_str)
     fig1 = px.bar(
         issue_breakdown, x='Count', y='issue', color='sentiment', 
         facet_col='source', orientation='h', 
-        title='1. Customer Issue Volume by Category',
+        title='1. Customer Issue Volume by Category' + estimated,
         labels={'issue': 'Root Issue Category', 'Count': 'Total Records'},
         color_discrete_map={'POSITIVE':'#00b800', 'NEGATIVE':MAGENTA, 'NEUTRAL':'#cccccc'},
         height=350
@@ -49,11 +127,12 @@ def render_charts_and_graphs(filtered_df, outage_df, start_date_str, end_date_st
 
 
     # 2. NEGATIVE TREND (Time Series)
-    negative_df = filtered_df[filtered_df['sentiment'] == 'NEGATIVE'].groupby(filtered_df['date'].dt.date)['record_id'].count().reset_index(name='Count')
-    negative_df.rename(columns={'date': 'Date'}, inplace=True)
+    negative_df = daily_summary.loc[daily_summary['NEGATIVE'] > 0, ['Date', 'NEGATIVE']].rename(columns={'NEGATIVE': 'Count'})
+    if fast:
+        negative_df = downsample(negative_df, 'Date', 'Count', CHART_POINT_BUDGET)
     fig2 = px.line(
         negative_df, x='Date', y='Count',
-        title='2. Daily Trend of NEGATIVE Records',
+        title='2. Daily Trend of NEGATIVE Records' + estimated,
         labels={'Date': 'Date', 'Count': 'Negative Count'},
         color_discrete_sequence=[MAGENTA],
         markers=True, height=350
@@ -62,13 +141,7 @@ def render_charts_and_graphs(filtered_df, outage_df, start_date_str, end_date_st
 
 
     # 3. OUTAGE REPORT (Time Series)
-    start_date_str_dt = pd.to_datetime(start_date_str).normalize()
-    end_date_str_dt = pd.to_datetime(end_date_str).normalize() + datetime.timedelta(days=1)
-    
-    filtered_outage_df = outage_df[
-        (outage_df['date'] >= start_date_str_dt) & 
-        (outage_df['date'] < end_date_str_dt)
-    ].copy()
+    filtered_outage_df = slice_by_day(outage_df, start_date_str, end_date_str)
     
     if filtered_outage_df.empty:
         fig3 = px.bar(title='3. Network Outage Reports (No Outages in Range)', height=350)
@@ -84,23 +157,10 @@ def render_charts_and_graphs(filtered_df, outage_df, start_date_str, end_date_st
 
 
     # 4. HAPPY INDEX (Time Series)
-    daily_summary = filtered_df.groupby(filtered_df['date'].dt.date)['sentiment'].value_counts().unstack(fill_value=0)
-    
-    for col in ['POSITIVE', 'NEGATIVE']:
-        if col not in daily_summary.columns:
-            daily_summary[col] = 0
-            
-    daily_summary['Total'] = daily_summary.sum(axis=1)
-    
-    daily_summary['Happy_Index'] = daily_summary.apply(
-        lambda row: (row['POSITIVE'] - row['NEGATIVE']) / row['Total'] if row['Total'] > 0 else 0, axis=1
-    )
-    daily_summary = daily_summary.reset_index()
-    daily_summary.rename(columns={'date': 'Date'}, inplace=True)
-
+    happy_df = downsample(daily_summary, 'Date', 'Happy_Index', CHART_POINT_BUDGET) if fast else daily_summary
     fig4 = px.line(
-        daily_summary, x='Date', y='Happy_Index',
-        title='4. Daily Customer Happy Index',
+        happy_df, x='Date', y='Happy_Index',
+        title='4. Daily Customer Happy Index' + estimated,
         labels={'Date': 'Date', 'Happy_Index': 'Index Score'},
         line_shape='spline', markers=True, 
         color_discrete_sequence=[BLUE], 
@@ -111,6 +171,33 @@ def render_charts_and_graphs(filtered_df, outage_df, start_date_str, end_date_st
     fig4.update_layout(title_font_color=DARK_GRAY, plot_bgcolor='white', paper_bgcolor='white', margin={'t': 50, 'r': 20, 'l': 20, 'b': 20})
 
 
+    # 5. CALL LATENCY PERCENTILES (Time Series, from the per-day latency sketches)
+    latency_daily = record_store.latency_percentiles(start_date_str, end_date_str)
+    if latency_daily.empty:
+        fig5 = px.line(title='5. Call Latency Percentiles (No Latency Data in Range)', height=350)
+    else:
+        r, p95_outage, p95_normal = latency_outage_correlation(latency_daily, filtered_outage_df)
+        title = '5. Call Latency Percentiles'
+        if r is not None:
+            title += f' | p95 vs outage reports r = {r:.2f}'
+        if p95_outage is not None and p95_normal is not None:
+            title += f' | p95 on outage days {p95_outage:.0f}ms vs {p95_normal:.0f}ms'
+        if fast:
+            # The points LTTB keeps for p95, so the three percentile lines stay aligned
+            latency_daily = downsample(latency_daily, 'Date', 'p95', CHART_POINT_BUDGET)
+        fig5 = px.line(
+            latency_daily.melt(id_vars=['Date'], value_vars=['p50', 'p95', 'p99'], var_name='Percentile', value_name='Latency'),
+            x='Date', y='Latency', color='Percentile',
+            title=title,
+            labels={'Date': 'Date', 'Latency': 'Latency (ms)'},
+            color_discrete_sequence=[BLUE, MAGENTA, DARK_GRAY],
+            markers=True, height=350
+        )
+        for outage_date in filtered_outage_df['date'].unique():
+            fig5.add_vline(x=pd.Timestamp(outage_date).timestamp() * 1000, line_dash='dot', line_color=MAGENTA, opacity=0.5)
+    fig5.update_layout(title_font_color=DARK_GRAY, plot_bgcolor='white', paper_bgcolor='white', margin={'t': 50, 'r': 20, 'l': 20, 'b': 20})
+
+
     return html.Div(children=[
         html.Div(dcc.Graph(id='issue-breakdown-bar', figure=fig1), 
                  style={'width': '100%', 'marginBottom': '20px', 'padding': '10px', 'backgroundColor': 'white', 'borderRadius': '8px', 'boxShadow': '0 4px 8px rgba(0,0,0,0.05)'}),
@@ -122,68 +209,113 @@ def render_charts_and_graphs(filtered_df, outage_df, start_date_str, end_date_st
         ]),
         html.Div(dcc.Graph(id='happy-index-line', figure=fig4), 
                  style={'width': '100%', 'marginBottom': '20px', 'padding': '10px', 'backgroundColor': 'white', 'borderRadius': '8px', 'boxShadow': '0 4px 8px rgba(0,0,0,0.05)'}),
+        html.Div(dcc.Graph(id='latency-percentiles-line', figure=fig5), 
+                 style={'width': '100%', 'marginBottom': '20px', 'padding': '10px', 'backgroundColor': 'white', 'borderRadius': '8px', 'boxShadow': '0 4px 8px rgba(0,0,0,0.05)'}),
     ])
 
 
 def register_callbacks(app):
     """Registers all Dash callbacks with the provided Dash app instance."""
     
+    #Push-mode live updates: (re)connects the browser's event stream for the current date range
+
+    app.clientside_callback(
+        ClientsideFunction(namespace='live_updates', function_name='connect'),
+        Output('live-stream-status', 'data'),
+        [Input('live-mode', 'data'),
+         Input('date-filter', 'start_date'),
+         Input('date-filter', 'end_date'),
+         Input('charts-version', 'data')]
+    )
+
+    #Anomaly alerts panel
+
+    @app.callback(
+        [Output('alerts-output', 'children'),
+         Output('alerts-version', 'data')],
+        Input('alerts-poll', 'n_intervals'),
+        State('alerts-version', 'data')
+    )
+    def update_alerts(n_intervals, shown_version):
+        if alert_log.version == shown_version:
+            return dash.no_update, dash.no_update
+        events = alert_log.recent(ALERTS_SHOWN)
+        if not events:
+            return "No anomalies detected yet.", alert_log.version
+        return [format_alert(event) for event in events], alert_log.version
+
     #Main Dashboard
 
     @app.callback(
         [Output('charts-container', 'children'),
          Output('ai-analysis-output', 'children', allow_duplicate=True), 
-         Output('footer-status', 'children')],
+         Output('footer-status', 'children'),
+         Output('charts-version', 'data')],
         [Input('interval-component', 'n_intervals'),
+         Input('initial-load', 'n_intervals'),
          Input('manual-refresh-btn', 'n_clicks'),
          Input('date-filter', 'start_date'),
-         Input('date-filter', 'end_date')],
+         Input('date-filter', 'end_date'),
+         Input('query-mode', 'value')],
+        State('charts-version', 'data'),
         prevent_initial_call=True 
     )
-    def update_dashboard_content(n_intervals, refresh_clicks, start_date_str, end_date_str):
+    @timed(CALLBACK_SECONDS, callback="update_dashboard_content")
+    def update_dashboard_content(n_intervals, initial_load, refresh_clicks, start_date_str, end_date_str, query_mode, rendered_key):
         
         if start_date_str is None or end_date_str is None:
-            return dash.no_update, dash.no_update, dash.no_update
+            return dash.no_update, dash.no_update, dash.no_update, dash.no_update
         
         ctx = dash.callback_context
         trigger_id = ctx.triggered[0]['prop_id'].split('.')[0] if ctx.triggered else 'initial'
         
-        filtered_df, date_range_str = get_filtered_dataframe(start_date_str, end_date_str)
+        data_version = record_store.version
+        charts_key = [data_version, start_date_str, end_date_str, query_mode]
+        filtered_count = record_store.count(start_date_str, end_date_str)
         outage_df = get_outage_df()
         
         charts_content = dash.no_update
-        if filtered_df.empty and not all_analyzed_records:
+        if trigger_id in ['interval-component', 'initial-load'] and rendered_key == charts_key:
+            pass  # nothing new since this browser last rendered: leave its charts as they are
+        elif filtered_count == 0 and len(record_store) == 0:
              charts_content = html.Div([
                 html.H2("Waiting for data stream to complete...", style={'textAlign': 'center', 'marginTop': '50px'}),
-                html.P(f"Processing initial records. Charts will load shortly. (0/{TOTAL_EXPECTED_RECORDS})")
+                html.P(f"Processing initial records. Charts will load shortly. (0/{total_expected_records()})")
             ])
-        elif filtered_df.empty:
+        elif filtered_count == 0:
              charts_content = html.Div([html.H2("No data found for the selected date range.", style={'textAlign': 'center', 'marginTop': '50px'})])
         else:
-            charts_content = render_charts_and_graphs(filtered_df, outage_df, start_date_str, end_date_str)
+            charts_content = get_cached_charts(data_version, outage_df, start_date_str, end_date_str, query_mode)
 
         
         ai_output_clear = dash.no_update
         if trigger_id in ['date-filter', 'manual-refresh-btn']:
             ai_output_clear = "Press 'Generate AI Analysis' to summarize the current data filter."
 
-        footer_status = f"Last updated: {datetime.datetime.now().strftime('%H:%M:%S')} | Records Processed: {len(all_analyzed_records)}/{TOTAL_EXPECTED_RECORDS} | Filtered Records: {len(filtered_df)}"
+        error_bounds = None
+        if query_mode == 'fast' and filtered_count:
+            error_bounds = get_error_bounds(data_version, start_date_str, end_date_str)
+        footer_status = format_footer(filtered_count, error_bounds)
         
-        return charts_content, ai_output_clear, footer_status
+        return charts_content, ai_output_clear, footer_status, charts_key
 
 
  
     @app.callback(
-        Output('ai-analysis-output', 'children'),
+        [Output('ai-analysis-output', 'children'),
+         Output('ai-job-store', 'data'),
+         Output('ai-job-poll', 'disabled')],
         Input('ai-analysis-btn', 'n_clicks'),
         [
             State('date-filter', 'start_date'),
             State('date-filter', 'end_date'),
+            State('query-mode', 'value'),
         ]
     )
-    def handle_ai_analysis_request(n_clicks, start_date_str, end_date_str):
+    @timed(CALLBACK_SECONDS, callback="handle_ai_analysis_request")
+    def handle_ai_analysis_request(n_clicks, start_date_str, end_date_str, query_mode):
         if n_clicks is None or n_clicks == 0:
-            return dash.no_update
+            return dash.no_update, dash.no_update, dash.no_update
         
         # Loading State 
         loading_message = html.Div([
@@ -191,10 +323,34 @@ def register_callbacks(app):
                       style={'color': MAGENTA, 'fontStyle': 'italic', 'marginLeft': '10px'})
         ], style={'textAlign': 'center', 'padding': '20px'})
         
-        # Get the Filtered Data
-        filtered_df, date_range_str = get_filtered_dataframe(start_date_str, end_date_str)
+        # Get the Filtered Data (in fast mode, the weighted sample the digest estimates its counts from)
+        filtered_df, date_range_str = get_filtered_dataframe(start_date_str, end_date_str, sampled=query_mode == 'fast')
+        
+        # Start the Gemini API call in the background; the poll callback below picks up the result
+        from ai_client import submit_analysis_job
+        outage_df = slice_by_day(get_outage_df(), start_date_str, end_date_str)
+        job_id = submit_analysis_job(filtered_df, date_range_str, outage_df)
+        
+        return loading_message, job_id, False
+
+
+    @app.callback(
+        [Output('ai-analysis-output', 'children', allow_duplicate=True),
+         Output('ai-job-poll', 'disabled', allow_duplicate=True)],
+        Input('ai-job-poll', 'n_intervals'),
+        State('ai-job-store', 'data'),
+        prevent_initial_call=True
+    )
+    @timed(CALLBACK_SECONDS, callback="poll_ai_analysis_job")
+    def poll_ai_analysis_job(n_intervals, job_id):
+        if not job_id:
+            return dash.no_update, True
         
-        # Call the Gemini API
-        analysis_text = call_gemini_api(filtered_df, date_range_str)
+        from ai_client import get_job_result
+        status, analysis_text = get_job_result(job_id)
+        if status == "running":
+            return dash.no_update, dash.no_update
+        if status == "unknown":
+            return "Analysis Error:** The analysis job was not found. Please generate the analysis again.", True
         
-        return dcc.Markdown(analysis_text)
\ No newline at end of file
+        return dcc.Markdown(analysis_text), True
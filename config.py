@@ -1,9 +1,25 @@
 import datetime
+import os
 
 # GEMINI CONFIGURATION
-#API_KEY = <API_KEY>  # <-- Set your API key here
+API_KEY = os.environ.get("GEMINI_API_KEY", "")  # <-- Set your API key here (or export GEMINI_API_KEY)
 GEMINI_MODEL = "gemini-2.5-flash-preview-09-2025"
-API_URL = f"https://generativelanguage.googleapis.com/v1beta/models/{GEMINI_MODEL}:generateContent?key={API_KEY}"
+# GEMINI_API_URL points the client at another endpoint, e.g. a local stub server for testing
+API_URL = os.environ.get("GEMINI_API_URL", f"https://generativelanguage.googleapis.com/v1beta/models/{GEMINI_MODEL}:generateContent?key={API_KEY}")
+
+#AI analysis HTTP pool and background jobs
+AI_HTTP_POOL_SIZE = 8
+AI_JOB_WORKERS = 4
+AI_MAX_JOBS = 256  # finished jobs kept for polling; the oldest are dropped first
+AI_JOB_POLL_MS = 1000
+
+#AI prompt digest
+AI_PROMPT_TOKEN_BUDGET = 1500  # approximate tokens for the data section of the prompt
+AI_PROMPT_MAX_EXAMPLES = 20  # representative customer comments before budget trimming
+
+#AI analysis response cache
+AI_CACHE_TTL_SECONDS = 600
+AI_CACHE_MAX_ENTRIES = 128
 
 MAGENTA = '#e20074'
 DARK_GRAY = '#333333'
@@ -13,4 +29,69 @@ BLUE = '#00B0FF'
 #This is for the data generation
 NUM_DAYS = 15
 NARRATIVE_START_DATE = datetime.date(2025, 10, 1) 
-DATE_FORMAT = "%Y-%m-%d"
\ No newline at end of file
+DATE_FORMAT = "%Y-%m-%d"
+
+#Live dashboard updates: "poll" re-renders on a timer, "push" streams new records over Server-Sent Events
+LIVE_UPDATE_MODE = "poll"
+LIVE_POLL_INTERVAL_MS = 3 * 1000
+LIVE_PUSH_RESYNC_MS = 60 * 1000  # full chart refresh in push mode (issue and outage charts are not streamed)
+LIVE_PUSH_KEEPALIVE_SECONDS = 15
+
+#Dashboard figure cache (entries are keyed on data version and date range)
+FIGURE_CACHE_SIZE = 64
+
+#Approximate queries: "fast" answers the charts and the AI prompt from per-day, per-source reservoir samples
+QUERY_MODE = "exact"  # initial setting of the dashboard's Exact/Fast toggle
+SAMPLE_RESERVOIR_SIZE = 200  # sampled records kept per day and source
+CHART_POINT_BUDGET = 500  # most points per line chart series in fast mode (LTTB downsampling)
+
+#Analyzed record store
+STORE_INITIAL_CAPACITY = 4096
+PIPELINE_BATCH_SIZE = 8  # records per micro-batch: classified together and appended to the store as one chunk
+RETENTION_DAYS = None  # keep only the newest N days of records (counted back from the newest record); None keeps everything
+
+#Where ingestion runs: "thread" inside app.py, or "process" as a separate `python data_pipeline.py`
+#that writes DATA_DIR while any number of web workers (e.g. gunicorn -w N app:flask_server) follow it
+INGEST_MODE = "thread"
+SHARED_STORE_REFRESH_SECONDS = 1.0
+
+#On-disk persistence of analyzed records (warm start resumes ingestion from the last checkpoint)
+PERSIST_RECORDS = False
+DATA_DIR = "happyconnect_data"
+PERSIST_COMPACT_RECORDS = 50000  # logged records before the append log is sealed into day segments
+PERSIST_FSYNC = False  # fsync the append log after every micro-batch
+
+#Record store backend: "memory" (columnar RecordStore), or an embedded database that runs the
+#dashboard queries as SQL: "sqlite" (standard library) or "duckdb" (pip install duckdb).
+#The database backends are rebuilt from the sources on every start and need INGEST_MODE = "thread".
+RECORD_STORE_BACKEND = "memory"
+SQL_STORE_PATH = os.path.join(DATA_DIR, "records.db")
+
+#Sentiment scoring: 0 scores on the pipeline thread, N > 0 uses a pool of N worker processes.
+#Scoring is CPU-bound, so the pool only pays off with more free cores than the web server needs;
+#on a single core it adds overhead instead (measure with python benchmark.py --scoring-processes N)
+SCORING_PROCESSES = 0
+SCORING_CHUNK_RECORDS = 512  # queued micro-batches are sent to a worker together, up to about this many records
+SCORING_MAX_IN_FLIGHT = 8  # chunks queued on the pool before the pipeline waits for results
+
+#Ingestion sources: any of "hand_crafted" (the narrative above), "synthetic" and "jsonl"
+PIPELINE_SOURCES = ["hand_crafted"]
+INGEST_QUEUE_SIZE = 32  # batches buffered between the sources and the consumer; full queue blocks the sources
+INGEST_MAX_WAIT = 0.25  # seconds a partial micro-batch waits for more records before it is analyzed anyway
+JSONL_SOURCE_PATH = "incoming_records.jsonl"
+JSONL_FOLLOW = True  # keep tailing the file for new lines instead of stopping at EOF
+SYNTHETIC_TOTAL_RECORDS = 10000
+
+#Streaming spike detection on negative sentiment rate and Network issue share (see anomaly.py)
+ANOMALY_FAST_ALPHA = 0.2  # EWMA weight of the current rate (higher reacts within fewer records)
+ANOMALY_SLOW_ALPHA = 0.02  # EWMA weight of the baseline rate
+ANOMALY_Z_THRESHOLD = 3.0
+ANOMALY_MIN_RECORDS = 10  # records a stream needs before it can alert
+ALERT_LOG_SIZE = 200
+ALERTS_SHOWN = 8  # newest alerts listed on the dashboard
+
+#Sampling profiler behind /debug/profile (see metrics.py). Off by default: the endpoint is unauthenticated
+#and shows every thread's stacks, so only enable it where the port is not reachable from outside
+PROFILE_ENDPOINT_ENABLED = False
+PROFILE_SAMPLE_INTERVAL_MS = 10
+PROFILE_MAX_STACK_DEPTH = 64
@@ -1,35 +1,83 @@
 import datetime
-import requests
+import os
+import queue
+import threading
 import time
 import random
-import itertools
+import collections
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
 import pandas as pd
-from nltk.sentiment.vader import SentimentIntensityAnalyzer
-import nltk
-from config import NARRATIVE_START_DATE, NUM_DAYS, DATE_FORMAT
-
-try:
-    nltk.download('vader_lexicon', quiet=True)
-except:
-    pass
+from config import NARRATIVE_START_DATE, NUM_DAYS, DATE_FORMAT, STORE_INITIAL_CAPACITY, PIPELINE_BATCH_SIZE, RETENTION_DAYS
+from config import SAMPLE_RESERVOIR_SIZE
+from config import SCORING_PROCESSES, SCORING_CHUNK_RECORDS, SCORING_MAX_IN_FLIGHT
+from config import PIPELINE_SOURCES, INGEST_QUEUE_SIZE, INGEST_MAX_WAIT, JSONL_SOURCE_PATH, JSONL_FOLLOW, SYNTHETIC_TOTAL_RECORDS
+from config import PERSIST_RECORDS, DATA_DIR, PERSIST_COMPACT_RECORDS, PERSIST_FSYNC
+from config import INGEST_MODE, SHARED_STORE_REFRESH_SECONDS, RECORD_STORE_BACKEND, SQL_STORE_PATH
+from config import ANOMALY_FAST_ALPHA, ANOMALY_SLOW_ALPHA, ANOMALY_Z_THRESHOLD, ANOMALY_MIN_RECORDS, ALERT_LOG_SIZE
+from record_store import RecordStore
+from sql_store import SqlRecordStore
+from analysis import analyze_batch, analyze_batch_in_worker, init_scoring_worker, ensure_vader_lexicon
+from sources import replay_source, synthetic_source, jsonl_tail_source, CURSOR_FIELD
+from persistence import RecordPersister, SharedStoreFollower
+from ingest import start_ingest, iter_batches, SourceError
+from anomaly import AlertLog, SpikeDetector
+from metrics import PIPELINE_STAGE_SECONDS, PIPELINE_RECORDS, PIPELINE_BATCHES, PIPELINE_RECORDS_PER_SECOND
+from metrics import INGEST_QUEUE_DEPTH, SCORING_IN_FLIGHT, STORE_RECORDS, STORE_VERSION, STORE_ARRAY_BYTES, ANOMALY_ALERTS
 
 #Golbal fields 
-all_analyzed_records = [] 
-call_index = 0
-feedback_index = 0
+if INGEST_MODE == "process" and RECORD_STORE_BACKEND != "memory":
+    # Web workers follow the ingest process through RecordPersister's files, which only the memory store writes
+    raise ValueError(f"INGEST_MODE = 'process' needs RECORD_STORE_BACKEND = 'memory', not {RECORD_STORE_BACKEND!r}")
+if RECORD_STORE_BACKEND == "memory":
+    record_store = RecordStore(initial_capacity=STORE_INITIAL_CAPACITY, retention_days=RETENTION_DAYS, sample_size=SAMPLE_RESERVOIR_SIZE)
+    persister = RecordPersister(DATA_DIR, PERSIST_COMPACT_RECORDS, PERSIST_FSYNC) if PERSIST_RECORDS or INGEST_MODE == "process" else None
+else:
+    record_store = SqlRecordStore(RECORD_STORE_BACKEND, SQL_STORE_PATH, retention_days=RETENTION_DAYS, sample_size=SAMPLE_RESERVOIR_SIZE)
+    persister = None
+STORE_RECORDS.set_function(lambda: len(record_store))
+STORE_VERSION.set_function(lambda: record_store.version)
+if hasattr(record_store, "memory_usage"):
+    STORE_ARRAY_BYTES.set_function(record_store.memory_usage)
+resume_cursors = {}
+follower_pid = None
+alert_log = AlertLog(ALERT_LOG_SIZE)
+spike_detector = SpikeDetector(alert_log, ANOMALY_FAST_ALPHA, ANOMALY_SLOW_ALPHA, ANOMALY_Z_THRESHOLD, ANOMALY_MIN_RECORDS,
+                               on_alert=lambda event: ANOMALY_ALERTS.inc(metric=event["metric"]))
 record_id_counter = 0
 
 date_range = [NARRATIVE_START_DATE + datetime.timedelta(days=i) for i in range(NUM_DAYS)]
-sid = SentimentIntensityAnalyzer()
 
-"Generic outage Data(Sample Data)"
-outage_list = [
-    {"date": date_range[4].strftime(DATE_FORMAT), "reported_count": 450, "issue": "Total Network Failure"},
-    {"date": date_range[5].strftime(DATE_FORMAT), "reported_count": 150, "issue": "4G/5G Slowdown"},
-    {"date": date_range[6].strftime(DATE_FORMAT), "reported_count": 75, "issue": "App Log-in Failure"},
-]
-outage_df = pd.DataFrame(outage_list)
-outage_df['date'] = pd.to_datetime(outage_df['date'])
+# The VADER analyzer, the narrative records and the outage table are built on first use rather than
+# at import, so the web server can answer its first request before any of them is needed
+_lazy_lock = threading.Lock()
+_sid = None
+_hand_crafted_records = None
+_outage_df = None
+
+#Lazy setup
+
+def get_analyzer():
+    """The shared SentimentIntensityAnalyzer, built on the first micro-batch scored in this process."""
+    global _sid
+    if _sid is None:
+        with _lazy_lock:
+            if _sid is None:
+                ensure_vader_lexicon()
+                from nltk.sentiment.vader import SentimentIntensityAnalyzer
+                _sid = SentimentIntensityAnalyzer()
+    return _sid
+
+def _build_outage_df():
+    "Generic outage Data(Sample Data)"
+    outage_list = [
+        {"date": date_range[4].strftime(DATE_FORMAT), "reported_count": 450, "issue": "Total Network Failure"},
+        {"date": date_range[5].strftime(DATE_FORMAT), "reported_count": 150, "issue": "4G/5G Slowdown"},
+        {"date": date_range[6].strftime(DATE_FORMAT), "reported_count": 75, "issue": "App Log-in Failure"},
+    ]
+    outage_df = pd.DataFrame(outage_list)
+    outage_df['date'] = pd.to_datetime(outage_df['date'])
+    return outage_df.sort_values('date', kind='stable').reset_index(drop=True)  # sorted so date ranges are a binary search
 
 
 #Helper functions
@@ -51,163 +99,262 @@ def create_record(date_str, source, sentiment, description, extra_data={}):
         "source": source 
     }
 
-def extract_issue(text):
-    keywords = {
-        "Network": ["signal", "disconnect", "outage", "coverage", "5g", "data speed", "no service", "zero bars"],
-        "Billing": ["bill", "charged", "refund", "payment", "fee", "trade-in", "credit", "compensation"],
-        "App/Device": ["app", "crash", "update", "esim", "phone", "tablet", "voicemail", "setup"],
-        "Support": ["help", "service", "resolution", "agent", "compliment", "empathetic", "professional"],
-        "Other": []
-    }
-    text_lower = text.lower()
-    for issue, words in keywords.items():
-        if any(word in text_lower for word in words):
-            return issue
-    return "Other"
-
-
 #Manually Crafted Records
 
-HAND_CRAFTED_RECORDS = []
+def _build_hand_crafted_records():
+    HAND_CRAFTED_RECORDS = []
 
-# Days 1-4: Baseline Stability
-for i in range(4):
-    date_str = date_range[i].strftime(DATE_FORMAT)
-    HAND_CRAFTED_RECORDS.extend([
-        create_record(date_str, "Call Log", "POSITIVE", "The agent was fantastic, very friendly and helped me set up my new device line without any trouble.", {"latency_ms": random.randint(30, 80)}),
-        create_record(date_str, "Call Log", "NEUTRAL", "I called to change my payment method and update my address. Standard procedure.", {"latency_ms": random.randint(60, 100)}),
-        create_record(date_str, "Call Log", "NEGATIVE", "My T-Mobile app keeps crashing when I try to view my data usage. Very frustrating user experience.", {"latency_ms": random.randint(100, 200)}),
-        create_record(date_str, "Feedback Form", "POSITIVE", "Excellent 5G coverage in downtown area, speeds are consistently fast!"),
-        create_record(date_str, "Feedback Form", "NEUTRAL", "The email marketing I received was a little confusing regarding the new plan."),
-    ])
+    # Days 1-4: Baseline Stability
+    for i in range(4):
+        date_str = date_range[i].strftime(DATE_FORMAT)
+        HAND_CRAFTED_RECORDS.extend([
+            create_record(date_str, "Call Log", "POSITIVE", "The agent was fantastic, very friendly and helped me set up my new device line without any trouble.", {"latency_ms": random.randint(30, 80)}),
+            create_record(date_str, "Call Log", "NEUTRAL", "I called to change my payment method and update my address. Standard procedure.", {"latency_ms": random.randint(60, 100)}),
+            create_record(date_str, "Call Log", "NEGATIVE", "My T-Mobile app keeps crashing when I try to view my data usage. Very frustrating user experience.", {"latency_ms": random.randint(100, 200)}),
+            create_record(date_str, "Feedback Form", "POSITIVE", "Excellent 5G coverage in downtown area, speeds are consistently fast!"),
+            create_record(date_str, "Feedback Form", "NEUTRAL", "The email marketing I received was a little confusing regarding the new plan."),
+        ])
 
-# Day 5: Major Network Outage
-date_str = date_range[4].strftime(DATE_FORMAT)
-for _ in range(8): 
-    HAND_CRAFTED_RECORDS.append(
-        create_record(date_str, "Call Log", "NEGATIVE", "My phone has zero service, zero bars! This is the worst network reliability I've ever experienced. I need this fixed immediately!", {"latency_ms": 500}), 
-    )
-HAND_CRAFTED_RECORDS.extend([
-    create_record(date_str, "Call Log", "NEGATIVE", "I was on hold for over an hour and then the call dropped! Unacceptable support during a complete network failure.", {"latency_ms": 650}),
-    create_record(date_str, "Feedback Form", "NEGATIVE", "Complete network down in my area for 4 hours. No data, no calls. This is a business risk."),
-    create_record(date_str, "Feedback Form", "NEGATIVE", "T-Mobile failed us today. Total lack of communication about the system outage."),
-])
-
-# Days 6-8: Post-Crisis Recovery
-for i in range(5, 8):
-    date_str = date_range[i].strftime(DATE_FORMAT)
+    # Day 5: Major Network Outage
+    date_str = date_range[4].strftime(DATE_FORMAT)
+    for _ in range(8): 
+        HAND_CRAFTED_RECORDS.append(
+            create_record(date_str, "Call Log", "NEGATIVE", "My phone has zero service, zero bars! This is the worst network reliability I've ever experienced. I need this fixed immediately!", {"latency_ms": 500}), 
+        )
     HAND_CRAFTED_RECORDS.extend([
-        create_record(date_str, "Call Log", "POSITIVE", "I understand there was an outage, but the agent was extremely empathetic and applied a credit for my inconvenience. Thank you!", {"latency_ms": random.randint(80, 150)}),
-        create_record(date_str, "Call Log", "NEGATIVE", "I need to know exactly how much credit I will receive for the downtime. I was told two different amounts!", {"latency_ms": random.randint(150, 250)}),
-        create_record(date_str, "Call Log", "NEUTRAL", "My signal is back, but my data speed is still slow compared to before the outage.", {"latency_ms": random.randint(100, 180)}),
-        create_record(date_str, "Feedback Form", "POSITIVE", "The quick resolution and the proactive credit offered was fantastic customer service."),
-        create_record(date_str, "Feedback Form", "NEGATIVE", "The auto-pay failed because of the system issues. I was charged a late fee which is unfair!"),
-        create_record(date_str, "Feedback Form", "POSITIVE", "Network is fully functional now. Speeds seem even faster than before the issue."),
+        create_record(date_str, "Call Log", "NEGATIVE", "I was on hold for over an hour and then the call dropped! Unacceptable support during a complete network failure.", {"latency_ms": 650}),
+        create_record(date_str, "Feedback Form", "NEGATIVE", "Complete network down in my area for 4 hours. No data, no calls. This is a business risk."),
+        create_record(date_str, "Feedback Form", "NEGATIVE", "T-Mobile failed us today. Total lack of communication about the system outage."),
     ])
 
-# Days 9-15: New Stable Baseline
-for i in range(8, NUM_DAYS):
-    date_str = date_range[i].strftime(DATE_FORMAT)
-    HAND_CRAFTED_RECORDS.extend([
-        create_record(date_str, "Call Log", "POSITIVE", "Just called to upgrade my plan. The agent made the process seamless and explained all the options clearly.", {"latency_ms": random.randint(30, 70)}),
-        create_record(date_str, "Call Log", "NEUTRAL", "Checking on the availability of the new iPhone model. Standard inquiry.", {"latency_ms": random.randint(50, 100)}),
-        create_record(date_str, "Feedback Form", "POSITIVE", "I'm still impressed by the 5G speed! T-Mobile clearly invested heavily in this."),
-        create_record(date_str, "Feedback Form", "POSITIVE", "Resolved my issue through the app's chat feature in under five minutes. Perfect."),
-    ])
+    # Days 6-8: Post-Crisis Recovery
+    for i in range(5, 8):
+        date_str = date_range[i].strftime(DATE_FORMAT)
+        HAND_CRAFTED_RECORDS.extend([
+            create_record(date_str, "Call Log", "POSITIVE", "I understand there was an outage, but the agent was extremely empathetic and applied a credit for my inconvenience. Thank you!", {"latency_ms": random.randint(80, 150)}),
+            create_record(date_str, "Call Log", "NEGATIVE", "I need to know exactly how much credit I will receive for the downtime. I was told two different amounts!", {"latency_ms": random.randint(150, 250)}),
+            create_record(date_str, "Call Log", "NEUTRAL", "My signal is back, but my data speed is still slow compared to before the outage.", {"latency_ms": random.randint(100, 180)}),
+            create_record(date_str, "Feedback Form", "POSITIVE", "The quick resolution and the proactive credit offered was fantastic customer service."),
+            create_record(date_str, "Feedback Form", "NEGATIVE", "The auto-pay failed because of the system issues. I was charged a late fee which is unfair!"),
+            create_record(date_str, "Feedback Form", "POSITIVE", "Network is fully functional now. Speeds seem even faster than before the issue."),
+        ])
 
+    # Days 9-15: New Stable Baseline
+    for i in range(8, NUM_DAYS):
+        date_str = date_range[i].strftime(DATE_FORMAT)
+        HAND_CRAFTED_RECORDS.extend([
+            create_record(date_str, "Call Log", "POSITIVE", "Just called to upgrade my plan. The agent made the process seamless and explained all the options clearly.", {"latency_ms": random.randint(30, 70)}),
+            create_record(date_str, "Call Log", "NEUTRAL", "Checking on the availability of the new iPhone model. Standard inquiry.", {"latency_ms": random.randint(50, 100)}),
+            create_record(date_str, "Feedback Form", "POSITIVE", "I'm still impressed by the 5G speed! T-Mobile clearly invested heavily in this."),
+            create_record(date_str, "Feedback Form", "POSITIVE", "Resolved my issue through the app's chat feature in under five minutes. Perfect."),
+        ])
 
-fixed_call_records = [r for r in HAND_CRAFTED_RECORDS if r['source'] == 'Call Log']
-fixed_feedback_records = [r for r in HAND_CRAFTED_RECORDS if r['source'] == 'Feedback Form']
-TOTAL_EXPECTED_RECORDS = len(fixed_call_records) + len(fixed_feedback_records)
+    return HAND_CRAFTED_RECORDS
 
+def get_hand_crafted_records():
+    """The narrative records (the same objects on every call), built on first use."""
+    global _hand_crafted_records
+    if _hand_crafted_records is None:
+        with _lazy_lock:
+            if _hand_crafted_records is None:
+                _hand_crafted_records = _build_hand_crafted_records()
+    return _hand_crafted_records
 
-#Simulated API Endpoints
+def total_expected_records():
+    return len(get_hand_crafted_records())
 
-def live_calls():
-    global call_index
-    if call_index >= len(fixed_call_records):
-        return None
-    
-    record = fixed_call_records[call_index]
-    call_index += 1
-    
-    date_str = record["date"].strftime(DATE_FORMAT)
-    
-    return {
-        "record_id": record["record_id"],
-        "date": date_str,
-        "user_id": record["user_id"],
-        "description": record["description"],
-        "fixed_sentiment": record["fixed_sentiment"], 
-        "network": record["network"]
-    }
 
-def live_feedback():
-    global feedback_index
-    if feedback_index >= len(fixed_feedback_records):
-        return None
-    
-    record = fixed_feedback_records[feedback_index]
-    feedback_index += 1
+#Record Sources
 
-    date_str = record["date"].strftime(DATE_FORMAT)
+def hand_crafted_sources(cursors):
+    """The narrative as two independent streams, call logs and feedback forms, merged by the ingest loop."""
+    records = get_hand_crafted_records()
+    fixed_call_records = [r for r in records if r['source'] == 'Call Log']
+    fixed_feedback_records = [r for r in records if r['source'] == 'Feedback Form']
+    return [
+        replay_source(fixed_call_records, PIPELINE_BATCH_SIZE, key="hand_crafted:calls", start=cursors.get("hand_crafted:calls", 0)),
+        replay_source(fixed_feedback_records, PIPELINE_BATCH_SIZE, key="hand_crafted:feedback", start=cursors.get("hand_crafted:feedback", 0)),
+    ]
+
+def build_sources(names=PIPELINE_SOURCES, cursors=None):
+    """Builds the configured sources, resuming each one from its saved cursor."""
+    cursors = cursors or {}
+    sources = []
+    for name in names:
+        if name == "hand_crafted":
+            sources.extend(hand_crafted_sources(cursors))
+        elif name == "synthetic":
+            sources.append(synthetic_source(PIPELINE_BATCH_SIZE, total_records=SYNTHETIC_TOTAL_RECORDS, start_date=NARRATIVE_START_DATE, num_days=NUM_DAYS, start=cursors.get("synthetic", 0)))
+        elif name == "jsonl":
+            key = f"jsonl:{JSONL_SOURCE_PATH}"
+            sources.append(jsonl_tail_source(JSONL_SOURCE_PATH, PIPELINE_BATCH_SIZE, follow=JSONL_FOLLOW, key=key, start=cursors.get(key, 0)))
+        else:
+            raise ValueError(f"Unknown pipeline source: {name}")
+    return sources
+
+def warm_start():
+    """Maps persisted segments into the store and replays the append log; returns the source cursors.
+
+    A database backend is emptied instead, since it is rebuilt from the sources on every run.
+    """
+    global resume_cursors
+    if persister is not None and len(record_store) == 0:
+        resume_cursors = persister.load_into(record_store)
+    elif isinstance(record_store, SqlRecordStore):
+        record_store.reset()
+    return resume_cursors
 
-    return {
-        "record_id": record["record_id"],
-        "date": date_str,
-        "user_id": record["user_id"],
-        "description": record["description"],
-        "fixed_sentiment": record["fixed_sentiment"],
-        "network": {} 
-    }
 #Data Pipeline Core logic
-def run_pipeline_consumer():
-    global all_analyzed_records
-    
-    streams = list(itertools.chain.from_iterable(itertools.zip_longest(
-        ["call"] * len(fixed_call_records), 
-        ["feedback"] * len(fixed_feedback_records), 
-        fillvalue=None
-    )))
-    streams = [s for s in streams if s is not None]
-
-    for stream_type in streams:
-        if stream_type == "call":
-            data = live_calls()
-            source = "Call Log"
-        else: 
-            data = live_feedback()
-            source = "Feedback Form"
-            
-        if data is None:
-            time.sleep(0.1) 
-            continue
-        
+
+def build_analyzed_records(batch, results):
+    """Combines a micro-batch of (source, raw record) pairs with its (issue, score) results."""
+    return [
+        {
+            "record_id": data['record_id'],
+            "source": source,
+            "date": data['date'],
+            "user_id": data['user_id'],
+            "description": data['description'],
+            "sentiment": data.get('fixed_sentiment', 'NEUTRAL'),
+            "issue": issue_category,
+            "sentiment_score": score,
+            "latency_ms": data['network'].get('latency_ms')
+        }
+        for (source, data), (issue_category, score) in zip(batch, results)
+    ]
+
+def _observe_stage_timings(timings):
+    for stage, seconds in timings.items():
+        PIPELINE_STAGE_SECONDS.observe(seconds, stage=stage)
+
+def analyze_records(batch):
+    """Runs the classification stage over a micro-batch on the calling thread."""
+    timings = {}
+    results = analyze_batch([data['description'] for _, data in batch], get_analyzer(), timings)
+    _observe_stage_timings(timings)
+    return build_analyzed_records(batch, results)
+
+def _store_batch(batch, analyzed_records):
+    with PIPELINE_STAGE_SECONDS.time(stage="store_append"):
+        record_store.append_many(analyzed_records)
+    with PIPELINE_STAGE_SECONDS.time(stage="anomaly_detection"):
+        spike_detector.observe(analyzed_records)
+    if persister is not None:
+        with PIPELINE_STAGE_SECONDS.time(stage="persist"):
+            cursors = {data[CURSOR_FIELD][0]: data[CURSOR_FIELD][1] for _, data in batch if CURSOR_FIELD in data}
+            persister.append(analyzed_records, cursors)
+            persister.maybe_compact(record_store)
+    PIPELINE_RECORDS.inc(len(analyzed_records))
+    PIPELINE_BATCHES.inc()
+    PIPELINE_RECORDS_PER_SECOND.add(len(analyzed_records))
+
+def _start_scoring_pool():
+    ensure_vader_lexicon()  # once here, so the workers don't all try to download a missing lexicon
+    # Not fork: the pipeline runs next to the web server's threads. A fork server imports the app (the
+    # __main__ module) and nltk once and forks every worker from it; spawn would import them per worker
+    if "forkserver" in multiprocessing.get_all_start_methods():
+        context = multiprocessing.get_context("forkserver")
+        context.set_forkserver_preload(["__main__", "analysis", "nltk.sentiment.vader"])
+    else:
+        context = multiprocessing.get_context("spawn")
+    return ProcessPoolExecutor(max_workers=SCORING_PROCESSES, initializer=init_scoring_worker, mp_context=context)
+
+def _submit_chunk(executor, in_flight, chunk):
+    descriptions = [data['description'] for _, data in chunk]
+    in_flight.append((chunk, executor.submit(analyze_batch_in_worker, descriptions)))
+    _drain_scoring_pool(in_flight, keep=SCORING_MAX_IN_FLIGHT)
+
+def _drain_scoring_pool(in_flight, keep):
+    # Futures are drained oldest-first so chunks reach the store (and the append log) in ingestion order
+    while len(in_flight) > keep:
+        batch, future = in_flight.popleft()
+        results, timings = future.result()
+        _observe_stage_timings(timings)
+        _store_batch(batch, build_analyzed_records(batch, results))
+
+def _timed_batches(batches):
+    # The ingest stage is the time the consumer waits for its next micro-batch
+    while True:
+        with PIPELINE_STAGE_SECONDS.time(stage="ingest"):
+            batch = next(batches, None)
+        if batch is None:
+            return
+        yield batch
+
+def run_pipeline_consumer(sources=None):
+    sources = build_sources(cursors=warm_start()) if sources is None else sources
+    batch_queue = queue.Queue(maxsize=INGEST_QUEUE_SIZE)
+    stop_ingest = threading.Event()
+    start_ingest(sources, batch_queue, PIPELINE_BATCH_SIZE, INGEST_MAX_WAIT, stop_ingest)
+    INGEST_QUEUE_DEPTH.set_function(batch_queue.qsize)
+
+    executor = _start_scoring_pool() if SCORING_PROCESSES > 0 else None
+    in_flight = collections.deque()
+    SCORING_IN_FLIGHT.set_function(lambda: len(in_flight))
+
+    batch = []
+    chunk = []  # micro-batches waiting to go to the pool together, so each round trip carries more records
+    source_error = None
+    try:
         try:
-            sentiment = data.get('fixed_sentiment', 'NEUTRAL')
-            score = sid.polarity_scores(data['description'])['compound']
-            issue_category = extract_issue(data['description'])
-            
-            new_record = {
-                "record_id": data['record_id'],
-                "source": source,
-                "date": data['date'],
-                "user_id": data['user_id'],
-                "description": data['description'],
-                "sentiment": sentiment,
-                "issue": issue_category,
-                "sentiment_score": score,
-                "extra_data": f"Latency: {data['network'].get('latency_ms', 'N/A')}ms" if source == 'Call Log' else "N/A"
-            }
-            all_analyzed_records.append(new_record)
-            
-            time.sleep(0.05) 
-        
+            for batch in _timed_batches(iter_batches(batch_queue)):
+                if executor is None:
+                    _store_batch(batch, analyze_records(batch))
+                    continue
+                chunk.extend(batch)
+                # A partial chunk goes as soon as nothing else is queued, so a slow stream is not held back
+                if len(chunk) >= SCORING_CHUNK_RECORDS or batch_queue.empty():
+                    _submit_chunk(executor, in_flight, chunk)
+                    chunk = []
+        except SourceError as e:
+            source_error = e  # raised below, once the other sources' records are stored
+
+        if chunk:
+            _submit_chunk(executor, in_flight, chunk)
+        _drain_scoring_pool(in_flight, keep=0)
+        if persister is not None:
+            persister.compact(record_store)
+    except Exception as e:
+        # Re-raised, so the standalone ingest process exits non-zero instead of looking finished
+        print(f"Error processing micro-batch of {len(batch)} records: {e}.")
+        raise
+    finally:
+        stop_ingest.set()  # lets the sources go even if the consumer stopped early
+        if executor is not None:
+            executor.shutdown(cancel_futures=True)
+
+    if source_error is not None:
+        # Ends the pipeline thread with the source's traceback, or the standalone ingest process non-zero
+        raise source_error
+    print(f"Pipeline Complete! Final records analyzed: {len(record_store)}")
+
+def _follow_shared_store(follower):
+    while True:
+        try:
+            follower.sync(record_store)
         except Exception as e:
-            print(f"Error processing record from {source}: {e}.")
-            break
+            print(f"Error syncing shared record store: {e}.")
+        time.sleep(SHARED_STORE_REFRESH_SECONDS)
 
-    print(f"Pipeline Complete! Final records analyzed: {len(all_analyzed_records)}")
+def start_shared_store_follower():
+    """Starts (once per process) the thread that mirrors the ingest process's store into this web worker."""
+    global follower_pid
+    if follower_pid == os.getpid():
+        return
+    follower_pid = os.getpid()
+    # Web workers run their own detector over the records they follow, so each has the alerts to show
+    follower = SharedStoreFollower(DATA_DIR, on_records=spike_detector.observe)
+    threading.Thread(target=_follow_shared_store, args=(follower,), daemon=True).start()
 
 def get_outage_df():
-    return outage_df
\ No newline at end of file
+    global _outage_df
+    if _outage_df is None:
+        with _lazy_lock:
+            if _outage_df is None:
+                _outage_df = _build_outage_df()
+    return _outage_df
+
+
+if __name__ == '__main__':
+    # Standalone ingest process for INGEST_MODE = "process"; web workers follow what it writes to DATA_DIR
+    run_pipeline_consumer()
@@ -0,0 +1,173 @@
+import asyncio
+import concurrent.futures
+import queue
+import threading
+from metrics import INGEST_SOURCE_ERRORS
+
+# Concurrent ingestion: one asyncio loop pulls from every source at once, merges their records in
+# arrival order and hands micro-batches to the analysis stage through a bounded thread-safe queue.
+# Sources may be async iterables or plain iterables of batches (sources.py); plain ones are read
+# on their own daemon threads so a slow or blocking source never stalls the others, and never
+# keeps the process from exiting. Setting the stop event shuts the whole loop down.
+# A source that raises drops out while the others keep going; the failure is counted at /metrics
+# and iter_batches raises it as a SourceError once the remaining sources have finished.
+
+END_OF_STREAM = object()
+_SOURCE_DONE = object()
+_STOP_POLL_SECONDS = 0.1
+
+
+class SourceError(Exception):
+    """An ingestion source stopped on an exception (the original one is the __cause__)."""
+
+
+def _source_failed(source, e):
+    INGEST_SOURCE_ERRORS.inc()
+    print(f"Error reading from source {source!r}: {e}.")
+    error = SourceError(f"Source {source!r} failed: {e}")
+    error.__cause__ = e
+    return error
+
+
+def _read_blocking_source(source, loop, merged, stop_event):
+    # Runs on a daemon thread: each batch is handed to the loop and waits for room in the merge queue
+    done = _SOURCE_DONE
+    try:
+        for batch in source:
+            future = asyncio.run_coroutine_threadsafe(merged.put(batch), loop)
+            while True:
+                try:
+                    future.result(timeout=_STOP_POLL_SECONDS)
+                    break
+                except concurrent.futures.TimeoutError:
+                    if stop_event.is_set():
+                        future.cancel()
+                        return
+            if stop_event.is_set():
+                return
+    except Exception as e:
+        done = _source_failed(source, e)
+    finally:
+        if not stop_event.is_set():
+            try:
+                asyncio.run_coroutine_threadsafe(merged.put(done), loop)
+            except RuntimeError:
+                pass  # the loop is already closed
+
+
+async def _pump(source, merged):
+    done = _SOURCE_DONE
+    try:
+        async for batch in source:
+            await merged.put(batch)
+    except Exception as e:
+        done = _source_failed(source, e)
+    finally:
+        await merged.put(done)
+
+
+async def merge_sources(sources, batch_size, max_wait, stop_event=None):
+    """Async generator of micro-batches drawn from all sources in arrival order.
+
+    A micro-batch is emitted once it holds batch_size records, or max_wait seconds after its first
+    record arrived, whichever comes first. Ends early (without flushing) once stop_event is set.
+    If a source failed, raises its SourceError after the records of every other source.
+    """
+    stop_event = stop_event or threading.Event()
+    loop = asyncio.get_running_loop()
+    merged = asyncio.Queue(maxsize=2 * len(sources))
+    pumps = []
+    for source in sources:
+        if hasattr(source, "__aiter__"):
+            pumps.append(asyncio.create_task(_pump(source, merged)))
+        else:
+            threading.Thread(target=_read_blocking_source, args=(source, loop, merged, stop_event),
+                             daemon=True, name="ingest-source").start()
+    active = len(sources)
+    errors = []
+    pending = []
+    deadline = None
+
+    try:
+        while active and not stop_event.is_set():
+            timeout = _STOP_POLL_SECONDS if deadline is None else min(_STOP_POLL_SECONDS, max(0.0, deadline - loop.time()))
+            try:
+                item = await asyncio.wait_for(merged.get(), timeout)
+            except asyncio.TimeoutError:
+                item = None
+
+            if item is _SOURCE_DONE:
+                active -= 1
+            elif isinstance(item, SourceError):
+                errors.append(item)
+                active -= 1
+            elif item is not None:
+                if not pending:
+                    deadline = loop.time() + max_wait
+                pending.extend(item)
+
+            while len(pending) >= batch_size:
+                yield pending[:batch_size]
+                pending = pending[batch_size:]
+            if pending and loop.time() >= deadline:
+                yield pending
+                pending = []
+            if not pending:
+                deadline = None
+
+        if pending and not stop_event.is_set():
+            yield pending
+        if errors and not stop_event.is_set():
+            raise errors[0]
+    finally:
+        for pump in pumps:
+            pump.cancel()
+
+
+async def _put(out_queue, item, stop_event):
+    # A full queue means the consumer is busy: wait (backpressure) without blocking the loop
+    while not stop_event.is_set():
+        try:
+            out_queue.put_nowait(item)
+            return True
+        except queue.Full:
+            await asyncio.sleep(0.01)
+    return False
+
+
+async def _ingest(sources, out_queue, batch_size, max_wait, stop_event):
+    end = END_OF_STREAM
+    try:
+        async for batch in merge_sources(sources, batch_size, max_wait, stop_event):
+            if not await _put(out_queue, batch, stop_event):
+                return
+    except SourceError as e:
+        end = e  # handed to the consumer in place of the end marker
+    finally:
+        await _put(out_queue, end, stop_event)
+
+
+def start_ingest(sources, out_queue, batch_size, max_wait, stop_event=None):
+    """Runs the ingestion loop on a daemon thread, feeding micro-batches into out_queue.
+
+    Set stop_event (e.g. when the consumer stops early) to shut the loop and its source threads down.
+    """
+    stop_event = stop_event or threading.Event()
+    thread = threading.Thread(target=asyncio.run, args=(_ingest(sources, out_queue, batch_size, max_wait, stop_event),),
+                              daemon=True, name="ingest-loop")
+    thread.start()
+    return thread
+
+
+def iter_batches(in_queue):
+    """Yields micro-batches from the queue until the ingestion loop reports the end of all streams.
+
+    Raises SourceError at the end if a source failed.
+    """
+    while True:
+        batch = in_queue.get()
+        if batch is END_OF_STREAM:
+            return
+        if isinstance(batch, SourceError):
+            raise batch
+        yield batch
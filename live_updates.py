@@ -0,0 +1,48 @@
+import json
+from flask import Response, request, stream_with_context
+from config import LIVE_PUSH_KEEPALIVE_SECONDS, DATE_FORMAT
+from data_pipeline import record_store
+from callbacks import format_footer
+
+# Push mode: a Server-Sent Events stream per dashboard that only speaks when new records land.
+# Each event carries just the days that changed, which assets/live_updates.js merges into the
+# NEGATIVE trend and Happy Index traces in place instead of re-rendering the figures.
+
+
+def build_live_update(since_version, start_date_str, end_date_str):
+    """Payload for one push event: the footer plus the changed days of the two line charts."""
+    version = record_store.version
+    daily = record_store.daily_sentiment(start_date_str, end_date_str, changed_since=since_version)
+    days = daily['Date'].dt.strftime(DATE_FORMAT).tolist()
+    return {
+        "version": version,
+        "footer": format_footer(record_store.count(start_date_str, end_date_str)),
+        "negative": [[day, int(count)] for day, count in zip(days, daily['NEGATIVE']) if count > 0],
+        "happy_index": [[day, float(value)] for day, value in zip(days, daily['Happy_Index'])],
+    }
+
+
+def register_live_updates(server):
+    """Adds the /live-updates SSE route to the Flask server."""
+
+    @server.route('/live-updates')
+    def live_updates():
+        start_date_str = request.args.get('start')
+        end_date_str = request.args.get('end')
+        since_version = request.args.get('version', type=int)
+        if since_version is None:
+            since_version = record_store.version
+
+        def stream():
+            yield "retry: 3000\n\n"  # sent straight away so proxies and browsers open the stream
+            last_version = since_version
+            while True:
+                if record_store.wait_for_version(last_version, timeout=LIVE_PUSH_KEEPALIVE_SECONDS) == last_version:
+                    yield ": keep-alive\n\n"
+                    continue
+                payload = build_live_update(last_version, start_date_str, end_date_str)
+                last_version = payload["version"]
+                yield f"id: {last_version}\ndata: {json.dumps(payload)}\n\n"
+
+        return Response(stream_with_context(stream()), mimetype='text/event-stream',
+                        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
@@ -0,0 +1,309 @@
+import bisect
+import sys
+import threading
+import time
+from collections import Counter as _Tally, deque
+from contextlib import contextmanager
+from functools import wraps
+from flask import Response, request
+from config import PROFILE_SAMPLE_INTERVAL_MS, PROFILE_MAX_STACK_DEPTH, PROFILE_ENDPOINT_ENABLED
+
+# In-process metrics in the Prometheus text format, plus a sampling profiler that can be switched
+# on and off while the app runs. Deliberately dependency-free: every metric is a few counters
+# behind a lock, cheap enough to update on every micro-batch and callback.
+
+_registry = []
+
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+def _format_labels(names, values, extra=()):
+    pairs = list(zip(names, values)) + list(extra)
+    if not pairs:
+        return ""
+    escaped = (str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, value in pairs)
+    return "{" + ",".join(f'{name}="{value}"' for (name, _), value in zip(pairs, escaped)) + "}"
+
+
+class _Metric:
+    kind = None
+
+    def __init__(self, name, help_text, labels=()):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = tuple(labels)
+        self._lock = threading.Lock()
+        _registry.append(self)
+
+    def _key(self, labels):
+        return tuple(labels[name] for name in self.label_names)
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} {self.kind}"]
+        lines.extend(self._samples())
+        return lines
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name, help_text, labels=()):
+        super().__init__(name, help_text, labels)
+        self._values = {}
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels):
+        with self._lock:
+            return self._values.get(self._key(labels), 0)
+
+    def _samples(self):
+        with self._lock:
+            values = list(self._values.items())
+        return [f"{self.name}{_format_labels(self.label_names, key)} {value}" for key, value in values]
+
+
+class Gauge(_Metric):
+    """A value that is either set directly or read from a callback at scrape time."""
+
+    kind = "gauge"
+
+    def __init__(self, name, help_text, function=None):
+        super().__init__(name, help_text)
+        self._value = 0
+        self._function = function
+
+    def set(self, value):
+        self._value = value
+
+    def set_function(self, function):
+        self._function = function
+
+    def _samples(self):
+        value = self._value
+        if self._function is not None:
+            try:
+                value = self._function()
+            except Exception:
+                return []
+        return [f"{self.name} {value}"]
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name, help_text, labels=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, help_text, labels)
+        self.buckets = tuple(buckets)
+        self._series = {}  # label values -> [bucket counts..., +Inf count, sum]
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [0] * (len(self.buckets) + 2)
+            series[index] += 1
+            series[-1] += value
+
+    @contextmanager
+    def time(self, **labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def _samples(self):
+        with self._lock:
+            series = [(key, list(values)) for key, values in self._series.items()]
+        lines = []
+        for key, values in series:
+            cumulative = 0
+            for bound, count in zip(self.buckets + ("+Inf",), values[:-1]):
+                cumulative += count
+                lines.append(f"{self.name}_bucket{_format_labels(self.label_names, key, [('le', bound)])} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.label_names, key)} {values[-1]}")
+            lines.append(f"{self.name}_count{_format_labels(self.label_names, key)} {cumulative}")
+        return lines
+
+
+class RateGauge(Gauge):
+    """Events per second over a sliding window."""
+
+    def __init__(self, name, help_text, window_seconds=10.0):
+        super().__init__(name, help_text)
+        self.window_seconds = window_seconds
+        self._events = deque()
+        self.set_function(self.rate)
+
+    def add(self, count):
+        now = time.monotonic()
+        with self._lock:
+            self._events.append((now, count))
+            self._trim(now)
+
+    def _trim(self, now):
+        while self._events and self._events[0][0] < now - self.window_seconds:
+            self._events.popleft()
+
+    def rate(self):
+        now = time.monotonic()
+        with self._lock:
+            self._trim(now)
+            return sum(count for _, count in self._events) / self.window_seconds
+
+
+def render_metrics():
+    lines = []
+    for metric in _registry:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+def timed(histogram, **labels):
+    """Decorator that observes the wrapped function's latency (exceptions included) in histogram."""
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            with histogram.time(**labels):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+#Metrics of the pipeline, the dashboard and the Gemini client
+
+PIPELINE_STAGE_SECONDS = Histogram(
+    "happyconnect_pipeline_stage_seconds", "Time spent per micro-batch in each pipeline stage.", labels=["stage"])
+PIPELINE_RECORDS = Counter("happyconnect_pipeline_records_total", "Records analyzed and stored.")
+PIPELINE_BATCHES = Counter("happyconnect_pipeline_batches_total", "Micro-batches analyzed and stored.")
+PIPELINE_RECORDS_PER_SECOND = RateGauge("happyconnect_pipeline_records_per_second", "Records stored per second over the last 10 seconds.")
+INGEST_SOURCE_ERRORS = Counter("happyconnect_ingest_source_errors_total", "Ingestion sources that stopped on an exception.")
+INGEST_QUEUE_DEPTH = Gauge("happyconnect_ingest_queue_depth", "Micro-batches waiting between ingestion and analysis.")
+SCORING_IN_FLIGHT = Gauge("happyconnect_scoring_in_flight", "Micro-batches submitted to the scoring process pool and not yet stored.")
+STORE_RECORDS = Gauge("happyconnect_store_records", "Records held by the record store.")
+STORE_VERSION = Gauge("happyconnect_store_version", "Data version of the record store.")
+STORE_ARRAY_BYTES = Gauge("happyconnect_store_array_bytes", "Bytes held by the in-memory record store's column arrays.")
+
+ANOMALY_ALERTS = Counter("happyconnect_anomaly_alerts_total", "Spike alerts raised by the streaming detector.", labels=["metric"])
+
+STARTUP_IMPORT_SECONDS = Gauge("happyconnect_startup_import_seconds", "Seconds spent importing the app (modules, callbacks, layout).")
+TIME_TO_FIRST_RESPONSE_SECONDS = Gauge(
+    "happyconnect_time_to_first_response_seconds", "Seconds from the start of the app import to its first HTTP response in this process.")
+
+CALLBACK_SECONDS = Histogram("happyconnect_callback_seconds", "Latency of Dash callbacks.", labels=["callback"])
+
+GEMINI_REQUEST_SECONDS = Histogram(
+    "happyconnect_gemini_request_seconds", "Latency of single HTTP attempts to the Gemini API.", labels=["status"])
+GEMINI_RETRIES = Counter("happyconnect_gemini_retries_total", "Gemini API attempts retried after a 429/500/503 response.")
+GEMINI_CALLS = Counter("happyconnect_gemini_calls_total", "Gemini analyses by outcome.", labels=["outcome"])
+GEMINI_CACHE_LOOKUPS = Counter(
+    "happyconnect_gemini_cache_lookups_total", "AI response cache lookups by result (hit, miss, or coalesced onto an identical in-flight request).",
+    labels=["result"])
+GEMINI_CACHE_ENTRIES = Gauge("happyconnect_gemini_cache_entries", "Analyses held in the AI response cache.")
+
+
+#Sampling profiler: periodically records every thread's Python stack while enabled
+
+class SamplingProfiler:
+    """Collects collapsed stacks ("outer;inner;leaf count", the flame graph input format) of all threads.
+
+    Sampling from a side thread costs nothing while stopped and only a few percent while running,
+    so it can be left available in production and switched on when something is slow.
+    """
+
+    def __init__(self, interval_ms=10, max_depth=64):
+        self.interval = interval_ms / 1000.0
+        self.max_depth = max_depth
+        self.samples = _Tally()
+        self.sample_count = 0
+        self._lock = threading.Lock()
+        self._stop = None
+        self._thread = None
+
+    @property
+    def running(self):
+        return self._thread is not None
+
+    def start(self):
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._stop = threading.Event()
+            self._thread = threading.Thread(target=self._run, args=(self._stop,), name="sampling-profiler", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        with self._lock:
+            if self._thread is None:
+                return
+            self._stop.set()
+            thread, self._thread = self._thread, None
+        thread.join()
+
+    def reset(self):
+        with self._lock:
+            self.samples = _Tally()
+            self.sample_count = 0
+
+    def _run(self, stop):
+        own_id = threading.get_ident()
+        while not stop.wait(self.interval):
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            stacks = []
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id:
+                    continue
+                stack = []
+                while frame is not None and len(stack) < self.max_depth:
+                    code = frame.f_code
+                    stack.append(f"{code.co_name} ({code.co_filename.rsplit('/', 1)[-1]}:{code.co_firstlineno})")
+                    frame = frame.f_back
+                stack.append(names.get(thread_id, str(thread_id)))
+                stacks.append(";".join(reversed(stack)))
+            with self._lock:
+                self.samples.update(stacks)
+                self.sample_count += 1
+
+    def collapsed(self, limit=None):
+        with self._lock:
+            return "\n".join(f"{stack} {count}" for stack, count in self.samples.most_common(limit)) + "\n"
+
+
+profiler = SamplingProfiler(PROFILE_SAMPLE_INTERVAL_MS, PROFILE_MAX_STACK_DEPTH)
+
+
+def register_metrics(server, profile_endpoint=PROFILE_ENDPOINT_ENABLED):
+    """Adds /metrics (Prometheus text format) and, with profile_endpoint, /debug/profile to the Flask server.
+
+    POST /debug/profile?action=start|stop|reset switches the sampling profiler; GET returns the
+    stacks collected so far (most frequent first, ?limit=N to truncate).
+    """
+
+    @server.route('/metrics')
+    def metrics():
+        return Response(render_metrics(), mimetype='text/plain; version=0.0.4')
+
+    if not profile_endpoint:
+        return
+
+    @server.route('/debug/profile', methods=['GET', 'POST'])
+    def debug_profile():
+        if request.method == 'GET':
+            return Response(profiler.collapsed(request.args.get('limit', type=int)), mimetype='text/plain')
+        action = request.values.get('action')
+        if action == 'start':
+            profiler.start()
+        elif action == 'stop':
+            profiler.stop()
+        elif action == 'reset':
+            profiler.reset()
+        else:
+            return Response(f"Unknown action: {action}\n", status=400, mimetype='text/plain')
+        return Response(f"profiler {'running' if profiler.running else 'stopped'}, {profiler.sample_count} samples\n",
+                        mimetype='text/plain')
@@ -0,0 +1,315 @@
+import json
+import os
+import shutil
+from collections import Counter
+import numpy as np
+from record_store import COLUMNS, CATEGORICAL_COLUMNS
+from sketches import LatencySketch
+
+# On-disk layout of the analyzed-record store:
+#
+#   checkpoint.json              generation, data version, segment list, category labels and source cursors
+#   log-<generation>.jsonl       append log: one line per analyzed micro-batch since the last compaction
+#   segments/<day>/g<generation>/<column>.npy + meta.json
+#
+# Segments hold one file per column (record_store.COLUMNS): category codes for the categorical
+# columns (labels in the checkpoint) and fixed-width strings for the ids. Descriptions repeat
+# heavily, so segments store them dictionary-encoded: description.codes.npy (int32 codes) plus
+# description.strings.json (the distinct texts in code order).
+#
+# Compaction turns the current log into one sealed segment per day (plain .npy files that load with
+# mmap_mode='r', with the day's rollup counts, latency sketch and a per-source row sample in
+# meta.json) and starts a new log generation. A warm start therefore maps the segments in
+# O(number of segments) and replays at most one log.
+#
+# The log of the generation just compacted is kept until the next compaction, so SharedStoreFollower
+# (a read-only web worker tailing the files of a separate ingest process) can finish reading it.
+
+CHECKPOINT_FILE = "checkpoint.json"
+DICTIONARY_COLUMNS = ["description"]
+
+
+def _segment_day(segment):
+    return segment.split("/")[1]
+
+
+def _write_json_atomic(path, obj):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(obj, f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def read_checkpoint(data_dir):
+    checkpoint_path = os.path.join(data_dir, CHECKPOINT_FILE)
+    if not os.path.exists(checkpoint_path):
+        return {"generation": 0, "version": 0, "segments": [], "categories": {}, "cursors": {}}
+    with open(checkpoint_path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def attach_segment(data_dir, store, segment, version=None):
+    segment_dir = os.path.join(data_dir, segment)
+    with open(os.path.join(segment_dir, "meta.json"), "r", encoding="utf-8") as f:
+        meta = json.load(f)
+    arrays = {}
+    for name in COLUMNS:
+        if name in DICTIONARY_COLUMNS:
+            with open(os.path.join(segment_dir, f"{name}.strings.json"), "r", encoding="utf-8") as f:
+                strings = np.array(json.load(f), dtype=object)
+            # One shared object per distinct text; only the row pointers are materialized
+            arrays[name] = strings[np.load(os.path.join(segment_dir, f"{name}.codes.npy"), mmap_mode="r")]
+        else:
+            arrays[name] = np.load(os.path.join(segment_dir, f"{name}.npy"), mmap_mode="r")
+    rollup = {tuple(key): count for *key, count in meta["rollup"]}
+    latency = LatencySketch.from_dict(meta["latency"]) if "latency" in meta else None
+    sample = None
+    if meta.get("sample_size", 0) >= store.sample_size:
+        # Saved with at least as many rows as the store keeps; otherwise the rows are sampled again
+        sample = {int(source): np.array(rows, dtype=np.int64) for source, rows in meta["sample"].items()}
+    store.attach_segment(meta["day"], arrays, rollup, latency, version=version, sample=sample)
+
+
+def log_path(data_dir, generation):
+    return os.path.join(data_dir, f"log-{generation:06d}.jsonl")
+
+
+class RecordPersister:
+    """Persists analyzed micro-batches and restores them into a RecordStore on startup.
+
+    Every logged micro-batch carries the writer's data version (one more than the previous batch's,
+    kept across compactions and restarts in the checkpoint), so every web worker following the
+    same ingest process means the same contents by the same version.
+    """
+
+    def __init__(self, data_dir, compact_records=50000, fsync=False):
+        self.data_dir = data_dir
+        self.compact_records = compact_records
+        self.fsync = fsync
+        self.generation = 0
+        self.version = 0
+        self.segments = []
+        self.cursors = {}
+        self._log = None
+        self._log_records = 0
+        self._rng = np.random.default_rng()
+        os.makedirs(os.path.join(data_dir, "segments"), exist_ok=True)
+
+    def _log_path(self, generation):
+        return log_path(self.data_dir, generation)
+
+    #Warm start
+
+    def load_into(self, store):
+        """Maps every segment into the (empty) store, replays the append log and returns the source cursors."""
+        checkpoint = read_checkpoint(self.data_dir)
+        self.generation = checkpoint["generation"]
+        self.version = checkpoint["version"]
+        self.segments = checkpoint["segments"]
+        self.cursors = checkpoint["cursors"]
+        store.restore_categories(checkpoint["categories"])
+
+        for segment in self.segments:
+            self._attach_segment(store, segment)
+        self._remove_stale_files()
+        self._replay_log(store)
+        return dict(self.cursors)
+
+    def _attach_segment(self, store, segment):
+        attach_segment(self.data_dir, store, segment)
+
+    def _remove_stale_files(self):
+        # Logs of older generations and segments a crashed compaction never committed
+        for name in os.listdir(self.data_dir):
+            if name.startswith("log-") and name != os.path.basename(self._log_path(self.generation)):
+                os.remove(os.path.join(self.data_dir, name))
+        committed = set(self.segments)
+        segments_root = os.path.join(self.data_dir, "segments")
+        for day in os.listdir(segments_root):
+            for generation in os.listdir(os.path.join(segments_root, day)):
+                segment = f"segments/{day}/{generation}"
+                if segment not in committed:
+                    shutil.rmtree(os.path.join(self.data_dir, segment))
+
+    def _replay_log(self, store):
+        path = self._log_path(self.generation)
+        if not os.path.exists(path):
+            return
+        good_offset = 0
+        with open(path, "rb") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    break  # torn final line from a crash: drop it and everything after
+                store.append_many(entry["records"])
+                self.version = entry["version"]
+                self.cursors.update(entry["cursors"])
+                self._log_records += len(entry["records"])
+                good_offset += len(line)
+        with open(path, "r+b") as f:
+            f.truncate(good_offset)
+
+    #Writing
+
+    def append(self, records, cursors):
+        """Logs one analyzed micro-batch with the source cursors reached after it."""
+        if not records:
+            return
+        self.cursors.update(cursors)
+        self.version += 1
+        if self._log is None:
+            self._log = open(self._log_path(self.generation), "ab")
+        line = json.dumps({"records": records, "cursors": cursors, "version": self.version}, separators=(",", ":"), default=str)
+        self._log.write(line.encode("utf-8") + b"\n")
+        self._log.flush()
+        if self.fsync:
+            os.fsync(self._log.fileno())
+        self._log_records += len(records)
+
+    def maybe_compact(self, store):
+        if self._log_records >= self.compact_records:
+            self.compact(store)
+
+    def compact(self, store):
+        """Seals the current log into per-day segments and starts the next log generation."""
+        if self._log_records == 0:
+            return
+        self.close()
+        categories = store.categories()
+        records = []
+        with open(self._log_path(self.generation), "rb") as f:
+            for line in f:
+                records.extend(json.loads(line)["records"])
+
+        # Days the store's retention window has already dropped are left out of the new segments
+        # and their old segments are deleted once the new checkpoint is in place
+        oldest_day = store.oldest_day()
+        oldest_day = str(oldest_day) if oldest_day is not None else None
+        by_day = {}
+        for record in records:
+            by_day.setdefault(str(np.datetime64(record["date"], "D")), []).append(record)
+        new_segments = [self._write_segment(day, day_records, categories, store.sample_size)
+                        for day, day_records in sorted(by_day.items()) if oldest_day is None or day >= oldest_day]
+        expired_segments = [segment for segment in self.segments if oldest_day is not None and _segment_day(segment) < oldest_day]
+
+        previous_log = self._log_path(self.generation - 1)
+        self.generation += 1
+        self.segments = [segment for segment in self.segments if segment not in expired_segments] + new_segments
+        _write_json_atomic(os.path.join(self.data_dir, CHECKPOINT_FILE), {
+            "generation": self.generation,
+            "version": self.version,
+            "segments": self.segments,
+            "categories": categories,
+            "cursors": self.cursors,
+        })
+        if os.path.exists(previous_log):
+            os.remove(previous_log)
+        for segment in expired_segments:
+            segment_dir = os.path.join(self.data_dir, segment)
+            shutil.rmtree(segment_dir, ignore_errors=True)
+            try:
+                os.rmdir(os.path.dirname(segment_dir))  # the day's directory, once its last segment is gone
+            except OSError:
+                pass
+        self._log_records = 0
+
+    def _write_segment(self, day, records, categories, sample_size):
+        segment = f"segments/{day}/g{self.generation:06d}"
+        segment_dir = os.path.join(self.data_dir, segment)
+        tmp_dir = f"{segment_dir}.tmp"
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        os.makedirs(tmp_dir)
+
+        codes = {name: {label: code for code, label in enumerate(categories[name])} for name in CATEGORICAL_COLUMNS}
+        arrays = {
+            "date": np.array([r["date"] for r in records], dtype="datetime64[D]").astype("datetime64[ns]"),
+            "sentiment_score": np.array([r["sentiment_score"] for r in records], dtype=np.float64),
+            "latency_ms": np.array([r["latency_ms"] for r in records], dtype=np.float32),
+        }
+        for name in ["record_id", "user_id"]:
+            arrays[name] = np.array([str(r[name]) for r in records], dtype=str)
+        for name in DICTIONARY_COLUMNS:
+            strings = {}
+            np.save(os.path.join(tmp_dir, f"{name}.codes.npy"),
+                    np.array([strings.setdefault(str(r[name]), len(strings)) for r in records], dtype=np.int32))
+            with open(os.path.join(tmp_dir, f"{name}.strings.json"), "w", encoding="utf-8") as f:
+                json.dump(list(strings), f)
+        for name in CATEGORICAL_COLUMNS:
+            arrays[name] = np.array([codes[name][r[name]] for r in records], dtype=np.int16)
+        for name in COLUMNS:
+            if name not in DICTIONARY_COLUMNS:
+                np.save(os.path.join(tmp_dir, f"{name}.npy"), arrays[name])
+
+        rollup = Counter(zip(arrays["issue"].tolist(), arrays["sentiment"].tolist(), arrays["source"].tolist()))
+        latency = LatencySketch()
+        latency.add(arrays["latency_ms"])
+        # A uniform sample of each source's rows, so attaching the segment needn't scan them for the store's reservoirs
+        sample = {}
+        for source in np.unique(arrays["source"]).tolist():
+            rows = np.flatnonzero(arrays["source"] == source)
+            sample[source] = np.sort(self._rng.choice(rows, min(sample_size, len(rows)), replace=False)).tolist()
+        with open(os.path.join(tmp_dir, "meta.json"), "w", encoding="utf-8") as f:
+            json.dump({"day": day, "rows": len(records), "rollup": [[*key, count] for key, count in rollup.items()],
+                       "latency": latency.to_dict(), "sample_size": sample_size, "sample": sample}, f)
+
+        shutil.rmtree(segment_dir, ignore_errors=True)
+        os.replace(tmp_dir, segment_dir)
+        return segment
+
+    def close(self):
+        if self._log is not None:
+            self._log.close()
+            self._log = None
+
+
+class SharedStoreFollower:
+    """Keeps a web worker's RecordStore in sync with the files of a separate ingest process.
+
+    Read-only: it never truncates, compacts or deletes anything. Each sync reads only the log lines
+    written since the last one. When the writer compacts, a new store is built from the checkpoint's
+    segments (memory-mapped, so their pages are shared by every worker) plus the new log, and swapped
+    in; the heap buffers filled from the sealed log go with the old store. The store's version is
+    set from the versions the writer logs (see RecordPersister), so it is the same on every worker.
+    """
+
+    def __init__(self, data_dir, on_records=None):
+        self.data_dir = data_dir
+        self.on_records = on_records  # called with every batch of records read from the log
+        self.generation = None
+        self.offset = 0
+
+    def sync(self, store):
+        checkpoint = read_checkpoint(self.data_dir)
+        generation = checkpoint["generation"]
+        if self.generation != generation:
+            if self.generation is not None and os.path.exists(log_path(self.data_dir, self.generation)):
+                # Finish the log that has just been sealed first, so on_records sees every record
+                self._read_log(store)
+            # Rebuild off to the side and swap it in, so readers never see a half-loaded store
+            rebuilt = store.empty_copy()
+            rebuilt.restore_categories(checkpoint["categories"])
+            for segment in checkpoint["segments"]:
+                attach_segment(self.data_dir, rebuilt, segment, version=checkpoint["version"])
+            self.generation, self.offset = generation, 0
+            self._read_log(rebuilt)
+            store.replace_with(rebuilt)
+        self._read_log(store)
+
+    def _read_log(self, store):
+        path = log_path(self.data_dir, self.generation)
+        if not os.path.exists(path):
+            return
+        with open(path, "rb") as f:
+            f.seek(self.offset)
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break  # the writer is mid-line; pick it up next time
+                entry = json.loads(line)
+                records = entry["records"]
+                self.offset += len(line)
+                store.append_many(records, version=entry["version"])
+                if self.on_records is not None:
+                    self.on_records(records)
@@ -0,0 +1,107 @@
+import json
+import pandas as pd
+from record_store import add_happy_index
+
+# Builds the data section of the AI prompt: a compact statistical digest of the whole filtered
+# window instead of its last 50 raw rows, trimmed to fit a token budget.
+
+CHARS_PER_TOKEN = 4
+MAX_DESCRIPTION_CHARS = 240
+
+
+def estimate_tokens(text):
+    """Rough token count (about four characters per token for English JSON)."""
+    return len(text) // CHARS_PER_TOKEN + 1
+
+
+def to_compact_json(obj):
+    return json.dumps(obj, separators=(",", ":"), ensure_ascii=False, default=str)
+
+
+def _table(df):
+    # Column names once, then plain rows: far fewer tokens than a list of keyed records
+    return {"columns": list(df.columns), "rows": df.values.tolist()}
+
+
+def _counts(df, by):
+    # Record counts per group; a sampled frame (fast mode) counts each row as `weight` records
+    if 'weight' in df.columns:
+        return df.groupby(by)['weight'].sum().round().astype(int)
+    return df.groupby(by).size()
+
+
+def build_digest(df, outage_df=None, date_range_str=None, max_examples=20):
+    """Summarizes the filtered records: counts, daily Happy Index, outage overlap and representative comments.
+
+    df may also be a weighted sample from store.sample(), in which case the counts are estimates.
+    """
+    weighted = 'weight' in df.columns
+    df = df.assign(day=df['date'].dt.strftime('%Y-%m-%d'), sentiment=df['sentiment'].astype(str),
+                   issue=df['issue'].astype(str), source=df['source'].astype(str))
+    if not weighted:
+        df = df.assign(weight=1)
+
+    breakdown = _counts(df, ['issue', 'sentiment', 'source']).reset_index(name='count')
+    breakdown = breakdown.sort_values('count', ascending=False)
+
+    daily = pd.crosstab(df['day'], df['sentiment'], values=df['weight'], aggfunc='sum').fillna(0).round().astype(int)
+    daily.columns.name = None
+    daily = add_happy_index(daily).assign(Happy_Index=daily['Happy_Index'].round(3))
+    daily = daily.reset_index()[['day', 'POSITIVE', 'NEGATIVE', 'Total', 'Happy_Index']]
+    daily.columns = ['day', 'positive', 'negative', 'total', 'happy_index']
+
+    outages = []
+    if outage_df is not None and not outage_df.empty:
+        daily_by_day = daily.set_index('day')
+        for row in outage_df.itertuples(index=False):
+            day = pd.Timestamp(row.date).strftime('%Y-%m-%d')
+            stats = daily_by_day.loc[day] if day in daily_by_day.index else None
+            outages.append([day, row.issue, int(row.reported_count),
+                            int(stats['negative']) if stats is not None else 0,
+                            float(stats['happy_index']) if stats is not None else None])
+
+    # Representative comments: distinct texts ranked by how often they occur, negatives first
+    examples = (df.groupby(['description', 'issue', 'sentiment'])
+                  .agg(count=('weight', 'sum'), source=('source', 'first'), first_day=('day', 'min'))
+                  .reset_index())
+    examples['count'] = examples['count'].round().astype(int)
+    examples['is_negative'] = examples['sentiment'] == 'NEGATIVE'
+    examples = examples.sort_values(['is_negative', 'count'], ascending=[False, False]).head(max_examples)
+    examples['description'] = examples['description'].str.slice(0, MAX_DESCRIPTION_CHARS)
+
+    digest = {
+        "window": date_range_str,
+        "records": int(round(df['weight'].sum())),
+        "by_sentiment": _counts(df, 'sentiment').sort_values(ascending=False).to_dict(),
+        "by_source": _counts(df, 'source').sort_values(ascending=False).to_dict(),
+        "by_issue": _counts(df, 'issue').sort_values(ascending=False).to_dict(),
+        "issue_sentiment_source": _table(breakdown),
+        "daily": _table(daily),
+        "outages": {"columns": ["day", "issue", "reported_count", "negative_records", "happy_index"], "rows": outages},
+        "examples": _table(examples[['description', 'issue', 'sentiment', 'source', 'count', 'first_day']]),
+    }
+    if weighted:
+        digest["estimated_from_sample"] = int(len(df))
+    return digest
+
+
+def fit_to_budget(digest, token_budget):
+    """Serializes the digest as compact JSON, dropping detail until it fits token_budget.
+
+    Least valuable detail goes first: the rarest examples, then every other day of the daily
+    series, then the issue x sentiment x source cross-tab (the per-field totals remain).
+    """
+    digest = json.loads(to_compact_json(digest))
+    text = to_compact_json(digest)
+    while estimate_tokens(text) > token_budget:
+        if digest["examples"]["rows"]:
+            digest["examples"]["rows"].pop()
+        elif len(digest["daily"]["rows"]) > 2:
+            digest["daily"]["rows"] = digest["daily"]["rows"][::2]
+            digest["daily"]["sampled"] = True
+        elif digest.get("issue_sentiment_source"):
+            del digest["issue_sentiment_source"]
+        else:
+            break
+        text = to_compact_json(digest)
+    return text
@@ -0,0 +1,647 @@
+import bisect
+import threading
+from collections import Counter
+import numpy as np
+import pandas as pd
+from sketches import LatencySketch, merged
+
+#Column layout of an analyzed record (same order as the old dict records; latency_ms replaced the
+#formatted "Latency: Xms" extra_data string, NaN when the source reported no latency)
+COLUMNS = ["record_id", "source", "date", "user_id", "description", "sentiment", "issue", "sentiment_score", "latency_ms"]
+CATEGORICAL_COLUMNS = ["source", "sentiment", "issue"]
+POOLED_COLUMNS = ["description"]  # ids are unique per record, so pooling them would only grow the pool
+
+COLUMN_DTYPES = {
+    "record_id": object,
+    "source": np.int16,
+    "date": "datetime64[ns]",
+    "user_id": object,
+    "description": object,
+    "sentiment": np.int16,
+    "issue": np.int16,
+    "sentiment_score": np.float64,
+    "latency_ms": np.float32,
+}
+
+
+class _ColumnBuffer:
+    """Growable typed arrays for a block of rows. Rows are only ever appended, never changed."""
+
+    def __init__(self, capacity):
+        self.size = 0
+        self.initial_capacity = capacity
+        # Allocated on first append, so partitions that only hold sealed segments cost nothing
+        self.arrays = {name: np.empty(0, dtype=COLUMN_DTYPES[name]) for name in COLUMNS}
+
+    def _reserve(self, extra):
+        needed = self.size + extra
+        capacity = len(self.arrays["date"])
+        if needed <= capacity:
+            return
+        new_capacity = max(needed, capacity * 2, self.initial_capacity)
+        for name, arr in self.arrays.items():
+            grown = np.empty(new_capacity, dtype=arr.dtype)
+            grown[:self.size] = arr[:self.size]
+            self.arrays[name] = grown
+
+    def append(self, columns, count):
+        self._reserve(count)
+        start, end = self.size, self.size + count
+        for name, values in columns.items():
+            self.arrays[name][start:end] = values
+        self.size = end
+
+    def shrink(self):
+        # Gives back the spare capacity of a partition that is unlikely to grow again
+        if len(self.arrays["date"]) > self.size:
+            self.arrays = {name: arr[:self.size].copy() for name, arr in self.arrays.items()}
+
+    def views(self):
+        # Slices of the live buffers. Rows below `size` never change, so readers can hold these
+        # without copying even while the writer keeps appending (or reallocates the buffer).
+        return {name: arr[:self.size] for name, arr in self.arrays.items()}
+
+
+class _Partition:
+    """One day of records: read-only sealed segments (e.g. memory-mapped from disk) plus a growable buffer."""
+
+    def __init__(self, capacity):
+        self.sealed = []
+        self.sealed_size = 0
+        self.buffer = _ColumnBuffer(capacity)
+
+    @property
+    def size(self):
+        return self.sealed_size + self.buffer.size
+
+    def append(self, columns, count):
+        self.buffer.append(columns, count)
+
+    def attach(self, arrays):
+        self.sealed.append(arrays)
+        self.sealed_size += len(arrays["date"])
+
+    def views(self):
+        chunks = list(self.sealed)
+        if self.buffer.size:
+            chunks.append(self.buffer.views())
+        return chunks
+
+
+class DailyRollups:
+    """Per-day issue x sentiment x source counters, updated incrementally as records are appended."""
+
+    def __init__(self):
+        self.counts = {}
+
+    def add(self, day, issue_codes, sentiment_codes, source_codes):
+        self.add_counts(day, Counter(zip(issue_codes.tolist(), sentiment_codes.tolist(), source_codes.tolist())))
+
+    def add_counts(self, day, counts):
+        counter = self.counts.get(day)
+        if counter is None:
+            counter = self.counts[day] = Counter()
+        counter.update(counts)
+
+    def drop(self, day):
+        self.counts.pop(day, None)
+
+    def total(self, days):
+        combined = Counter()
+        for day in days:
+            combined.update(self.counts[day])
+        return combined
+
+    def sentiment_matrix(self, days, num_sentiments):
+        """Returns a (len(days), num_sentiments) array of per-day sentiment counts."""
+        matrix = np.zeros((len(days), num_sentiments), dtype=np.int64)
+        for row, day in enumerate(days):
+            for (_, sentiment, _), count in self.counts[day].items():
+                matrix[row, sentiment] += count
+        return matrix
+
+
+class _Reservoir:
+    """A uniform sample of at most `capacity` rows from one stratum's stream (Algorithm R)."""
+
+    __slots__ = ("arrays", "size", "seen")
+
+    def __init__(self, capacity):
+        self.arrays = {name: np.empty(capacity, dtype=COLUMN_DTYPES[name]) for name in COLUMNS}
+        self.size = 0
+        self.seen = 0
+
+    def add(self, columns, count, rng):
+        capacity = len(self.arrays["date"])
+        take = min(capacity - self.size, count)
+        for name, values in columns.items():
+            self.arrays[name][self.size:self.size + take] = values[:take]
+        self.size += take
+
+        rest = count - take
+        if rest:
+            # The i-th row of the stream replaces a random slot with probability capacity / i
+            positions = self.seen + take + np.arange(1, rest + 1)
+            slots = rng.integers(0, positions)
+            rows = np.flatnonzero(slots < capacity) + take
+            slots = slots[slots < capacity]
+            # A slot replaced twice in one chunk keeps the later row, as in the one-row-at-a-time algorithm
+            _, last = np.unique(slots[::-1], return_index=True)
+            last = len(slots) - 1 - last
+            for name, values in columns.items():
+                self.arrays[name][slots[last]] = values[rows[last]]
+        self.seen += count
+
+    def merge(self, columns, size, seen, rng):
+        """Merges in a uniform sample of `size` rows out of `seen` other rows of the same stratum."""
+        capacity = len(self.arrays["date"])
+        keep = min(capacity, self.seen + seen)
+        # How many of the merged sample's rows come from each side is hypergeometric in the two counts
+        mine = rng.hypergeometric(self.seen, seen, keep) if keep else 0
+        mine_rows = rng.choice(self.size, mine, replace=False)
+        their_rows = rng.choice(size, keep - mine, replace=False)
+        for name, arr in self.arrays.items():
+            arr[:keep] = np.concatenate([arr[mine_rows], np.asarray(columns[name])[their_rows]])
+        self.size = keep
+        self.seen += seen
+
+    def copy_rows(self):
+        # A copy, not views: unlike partition buffers, sampled rows are overwritten as the stream goes on
+        return {name: arr[:self.size].copy() for name, arr in self.arrays.items()}
+
+
+class StratifiedSamples:
+    """Reservoir samples of every (day, source) stratum, kept up to date as records are appended.
+
+    Each stratum holds a uniform sample of up to `capacity` of its rows, and how many rows it has
+    seen, so a sampled row stands for seen / sampled rows of its stratum.
+    """
+
+    def __init__(self, capacity, seed=None):
+        self.capacity = capacity
+        self.reservoirs = {}  # day -> {source code: _Reservoir}
+        self._rng = np.random.default_rng(seed)
+
+    def add(self, day, columns):
+        by_source = self.reservoirs.setdefault(day, {})
+        sources = np.asarray(columns["source"])
+        for source in np.unique(sources).tolist():
+            rows = np.flatnonzero(sources == source)
+            reservoir = by_source.get(source)
+            if reservoir is None:
+                reservoir = by_source[source] = _Reservoir(self.capacity)
+            reservoir.add({name: values[rows] for name, values in columns.items()}, len(rows), self._rng)
+
+    def add_sample(self, day, source, columns, seen):
+        """Adds `seen` rows of one stratum, given only a uniform sample of them (e.g. saved with a segment)."""
+        by_source = self.reservoirs.setdefault(day, {})
+        reservoir = by_source.get(source)
+        if reservoir is None:
+            reservoir = by_source[source] = _Reservoir(self.capacity)
+        reservoir.merge(columns, len(columns["date"]), seen, self._rng)
+
+    def drop(self, day):
+        self.reservoirs.pop(day, None)
+
+    def strata(self, days):
+        """Yields (rows, records in the stratum) for every stratum of the given days."""
+        for day in days:
+            for reservoir in self.reservoirs.get(day, {}).values():
+                yield reservoir.copy_rows(), reservoir.seen
+
+
+class _StringPool:
+    """Interns repeated strings (descriptions) so every row holding the same text shares one object.
+
+    Cleared whenever old days are evicted, and whenever it reaches max_size distinct texts: rows
+    already stored keep sharing their objects, and the pool itself only holds the texts seen since,
+    so it stays bounded even without a retention window.
+    """
+
+    def __init__(self, max_size=100000):
+        self.max_size = max_size
+        self.strings = {}
+
+    def intern(self, values):
+        if len(self.strings) >= self.max_size:
+            self.clear()
+        strings = self.strings
+        return np.array([strings.setdefault(value, value) for value in values], dtype=object)
+
+    def clear(self):
+        self.strings = {}
+
+
+def add_happy_index(daily):
+    """Completes a per-day frame of sentiment counts (one column per sentiment label) in place.
+
+    Adds any missing POSITIVE/NEGATIVE/NEUTRAL column as zeros, then Total and Happy_Index:
+    (POSITIVE - NEGATIVE) / Total, or 0 for a day without records. Returns the frame.
+    """
+    for col in ["POSITIVE", "NEGATIVE", "NEUTRAL"]:
+        if col not in daily.columns:
+            daily[col] = 0
+    total = daily.to_numpy().sum(axis=1)
+    daily["Total"] = total
+    daily["Happy_Index"] = np.divide(
+        (daily["POSITIVE"] - daily["NEGATIVE"]).to_numpy(dtype=np.float64), total,
+        out=np.zeros(len(daily), dtype=np.float64), where=total > 0
+    )
+    return daily
+
+
+def _to_day(value):
+    return np.datetime64(pd.Timestamp(value).date(), "D")
+
+
+def day_slice_bounds(days, start_date=None, end_date=None):
+    """Binary-searches a sorted array/list of days for the inclusive [start_date, end_date] window."""
+    lo = 0 if start_date is None else bisect.bisect_left(days, _to_day(start_date))
+    hi = len(days) if end_date is None else bisect.bisect_right(days, _to_day(end_date))
+    return lo, max(lo, hi)
+
+
+def slice_by_day(df, start_date=None, end_date=None, column="date"):
+    """Returns the rows of a date-sorted DataFrame that fall inside the inclusive day window."""
+    days = df[column].to_numpy().astype("datetime64[D]")
+    lo = 0 if start_date is None else np.searchsorted(days, _to_day(start_date), side="left")
+    hi = len(days) if end_date is None else np.searchsorted(days, _to_day(end_date), side="right")
+    return df.iloc[lo:max(lo, hi)]
+
+
+class RecordStore:
+    """Thread-safe, append-only columnar store for analyzed records.
+
+    Records are partitioned by day, and a sorted day index resolves a date range to a contiguous
+    run of partitions, so reads cost in proportion to the selected window rather than total history.
+    The pipeline appends in chunks with `append_many`; the dashboard reads with `snapshot`.
+
+    With retention_days, only the newest retention_days days (counted back from the newest record,
+    not the wall clock) are kept; older day partitions are dropped as new days arrive.
+
+    Every (day, source) stratum also keeps a reservoir sample of up to sample_size rows, which
+    `sample` returns for approximate queries over long date ranges.
+    """
+
+    def __init__(self, initial_capacity=1024, retention_days=None, sample_size=200):
+        self._lock = threading.Lock()
+        self._changed = threading.Condition(self._lock)
+        self._initial_capacity = initial_capacity
+        self._retention_days = retention_days
+        self._string_pool = _StringPool()
+        self._partitions = {}
+        self._days = []
+        self._size = 0
+        self._version = 0
+        self._categories = {name: [] for name in CATEGORICAL_COLUMNS}
+        self._category_codes = {name: {} for name in CATEGORICAL_COLUMNS}
+        self._rollups = DailyRollups()
+        self._latency = {}  # day -> LatencySketch of that day's latency_ms values
+        self._samples = StratifiedSamples(sample_size)
+        self._day_versions = {}
+        self._snapshot_key = None
+        self._snapshot = None
+        self._sample_key = None
+        self._sample = None
+
+    def __len__(self):
+        return self._size
+
+    @property
+    def sample_size(self):
+        """Most rows kept in the reservoir sample of one (day, source) stratum."""
+        return self._samples.capacity
+
+    @property
+    def version(self):
+        """Monotonic data version, bumped by every append. Equal versions mean identical contents.
+
+        Appends can also set it explicitly, so processes that replay the same writer's log (see
+        SharedStoreFollower) agree on what each version means.
+        """
+        return self._version
+
+    def wait_for_version(self, after_version, timeout=None):
+        """Blocks until the version moves past after_version (or timeout) and returns the current version."""
+        with self._changed:
+            self._changed.wait_for(lambda: self._version > after_version, timeout=timeout)
+            return self._version
+
+    def days(self):
+        with self._lock:
+            return list(self._days)
+
+    def _encode(self, name, values):
+        codes = self._category_codes[name]
+        categories = self._categories[name]
+        encoded = np.empty(len(values), dtype=np.int16)
+        for i, value in enumerate(values):
+            code = codes.get(value)
+            if code is None:
+                code = len(categories)
+                codes[value] = code
+                categories.append(value)
+            encoded[i] = code
+        return encoded
+
+    def _partition(self, day):
+        partition = self._partitions.get(day)
+        if partition is None:
+            if self._days and day > self._days[-1]:
+                # A new newest day: the previous one will hardly grow any more
+                self._partitions[self._days[-1]].buffer.shrink()
+            partition = _Partition(self._initial_capacity)
+            self._partitions[day] = partition
+            bisect.insort(self._days, day)
+        return partition
+
+    def _latency_sketch(self, day):
+        sketch = self._latency.get(day)
+        if sketch is None:
+            sketch = self._latency[day] = LatencySketch()
+        return sketch
+
+    def _evict_expired(self):
+        if self._retention_days is None or not self._days:
+            return
+        cutoff = self._days[-1] - np.timedelta64(self._retention_days - 1, "D")
+        expired = bisect.bisect_left(self._days, cutoff)
+        if not expired:
+            return
+        for day in self._days[:expired]:
+            self._size -= self._partitions.pop(day).size
+            self._rollups.drop(day)
+            self._latency.pop(day, None)
+            self._samples.drop(day)
+            self._day_versions.pop(day, None)
+        del self._days[:expired]
+        self._string_pool.clear()
+
+    def oldest_day(self):
+        with self._lock:
+            return self._days[0] if self._days else None
+
+    def memory_usage(self):
+        """Bytes held by the column arrays (string columns count their object pointers only)."""
+        with self._lock:
+            return sum(
+                arr.nbytes
+                for partition in self._partitions.values()
+                for arrays in partition.sealed + [partition.buffer.arrays]
+                for arr in arrays.values()
+            )
+
+    def append_many(self, records, version=None):
+        """Appends a chunk of analyzed record dicts, routing each row to its day partition.
+
+        version is the data version after the append; by default the current one plus one.
+        """
+        if not records:
+            return
+        columns = {name: np.array([r[name] for r in records], dtype=object) for name in COLUMNS}
+        days = columns["date"].astype("datetime64[D]")
+        columns["date"] = days
+        columns["sentiment_score"] = columns["sentiment_score"].astype(np.float64)
+        columns["latency_ms"] = columns["latency_ms"].astype(np.float32)
+
+        order = np.argsort(days, kind="stable")
+        unique_days, starts = np.unique(days[order], return_index=True)
+        ends = list(starts[1:]) + [len(records)]
+
+        with self._lock:
+            for name in CATEGORICAL_COLUMNS:
+                columns[name] = self._encode(name, columns[name])
+            for name in POOLED_COLUMNS:
+                columns[name] = self._string_pool.intern(columns[name])
+            for day, start, end in zip(unique_days, starts, ends):
+                rows = order[start:end]
+                day_columns = {name: values[rows] for name, values in columns.items()}
+                self._partition(day).append(day_columns, len(rows))
+                self._samples.add(day, day_columns)
+                self._rollups.add(day, columns["issue"][rows], columns["sentiment"][rows], columns["source"][rows])
+                self._latency_sketch(day).add(columns["latency_ms"][rows])
+            self._size += len(records)
+            self._version = self._version + 1 if version is None else version
+            for day in unique_days:
+                self._day_versions[day] = self._version
+            self._evict_expired()
+            self._changed.notify_all()
+
+    def append(self, record):
+        self.append_many([record])
+
+    #Restoring persisted data (see persistence.py)
+
+    def reset(self):
+        """Drops every record (the version keeps counting up, so caches keyed on it stay valid)."""
+        with self._lock:
+            self._partitions = {}
+            self._days = []
+            self._size = 0
+            self._version += 1
+            self._categories = {name: [] for name in CATEGORICAL_COLUMNS}
+            self._category_codes = {name: {} for name in CATEGORICAL_COLUMNS}
+            self._rollups = DailyRollups()
+            self._latency = {}
+            self._samples = StratifiedSamples(self._samples.capacity)
+            self._day_versions = {}
+            self._string_pool.clear()
+            self._changed.notify_all()
+
+    def empty_copy(self):
+        """A new, empty store with the same capacity, retention and sample settings."""
+        return RecordStore(self._initial_capacity, self._retention_days, self.sample_size)
+
+    def replace_with(self, other):
+        """Takes over the contents of another store (built off to the side) in one step.
+
+        Readers see either the old records or the new ones, never a partly rebuilt store. The
+        version and per-day versions are taken over too, so `other` must not be behind this store.
+        `other` must not be used afterwards.
+        """
+        with other._lock, self._lock:
+            self._partitions = other._partitions
+            self._days = other._days
+            self._size = other._size
+            self._version = other._version
+            self._categories = other._categories
+            self._category_codes = other._category_codes
+            self._rollups = other._rollups
+            self._latency = other._latency
+            self._samples = other._samples
+            self._day_versions = other._day_versions
+            self._string_pool = other._string_pool
+            self._changed.notify_all()
+
+    def categories(self):
+        """Returns the category labels per categorical column; codes are indexes into these lists."""
+        with self._lock:
+            return {name: list(cats) for name, cats in self._categories.items()}
+
+    def restore_categories(self, categories):
+        """Seeds the category lists before any data is loaded, so persisted codes stay valid."""
+        with self._lock:
+            if self._size:
+                raise ValueError("Categories can only be restored into an empty store")
+            for name in CATEGORICAL_COLUMNS:
+                self._categories[name] = list(categories.get(name, []))
+                self._category_codes[name] = {value: code for code, value in enumerate(self._categories[name])}
+
+    def attach_segment(self, day, arrays, rollup_counts, latency_sketch=None, version=None, sample=None):
+        """Adds a sealed, read-only block of one day's rows without copying it.
+
+        rollup_counts maps (issue, sentiment, source) code triples to counts, latency_sketch
+        summarizes the block's latencies and sample maps each source code to the row indexes of a
+        uniform sample of that source's rows (at least sample_size of them, or all), so none of
+        them has to be rebuilt by scanning the rows. version works as in append_many.
+        """
+        day = np.datetime64(day, "D")
+        if latency_sketch is None:
+            latency_sketch = LatencySketch()
+            latency_sketch.add(arrays["latency_ms"])
+        with self._lock:
+            self._partition(day).attach(arrays)
+            self._rollups.add_counts(day, rollup_counts)
+            self._latency_sketch(day).merge(latency_sketch)
+            if sample is None:
+                self._samples.add(day, arrays)
+            else:
+                seen = Counter()
+                for (_, _, source), count in rollup_counts.items():
+                    seen[source] += count
+                for source, rows in sample.items():
+                    self._samples.add_sample(day, source, {name: values[rows] for name, values in arrays.items()}, seen[source])
+            self._size += len(arrays["date"])
+            self._version = self._version + 1 if version is None else version
+            self._day_versions[day] = self._version
+            self._evict_expired()
+            self._changed.notify_all()
+
+    def clear_caches(self):
+        """Forgets the cached snapshot and sample frames (for benchmarks that time uncached reads)."""
+        with self._lock:
+            self._snapshot_key = self._snapshot = None
+            self._sample_key = self._sample = None
+
+    def snapshot(self, start_date=None, end_date=None):
+        """Returns a read-only DataFrame of the records in the inclusive day window (all records by default)."""
+        with self._lock:
+            lo, hi = day_slice_bounds(self._days, start_date, end_date)
+            key = (self._version, lo, hi)
+            if self._snapshot_key == key:
+                return self._snapshot
+            parts = [chunk for day in self._days[lo:hi] for chunk in self._partitions[day].views()]
+            categories = {name: list(cats) for name, cats in self._categories.items()}
+
+        frame = _columns_frame(parts, categories)
+        with self._lock:
+            self._snapshot_key, self._snapshot = key, frame
+        return frame
+
+    def sample(self, start_date=None, end_date=None):
+        """Returns the reservoir samples of the day window as a DataFrame of records (see sampling.py).
+
+        Besides the record columns it has stratum_records, the number of records in the row's
+        (day, source) stratum, and weight, the number of records each sampled row stands for.
+        """
+        with self._lock:
+            lo, hi = day_slice_bounds(self._days, start_date, end_date)
+            key = (self._version, lo, hi)
+            if self._sample_key == key:
+                return self._sample
+            strata = list(self._samples.strata(self._days[lo:hi]))
+            categories = {name: list(cats) for name, cats in self._categories.items()}
+
+        frame = _columns_frame([rows for rows, _ in strata], categories)
+        sampled = np.array([len(rows["date"]) for rows, _ in strata], dtype=np.int64)
+        seen = np.array([records for _, records in strata], dtype=np.int64)
+        frame["stratum_records"] = np.repeat(seen, sampled)
+        frame["weight"] = np.repeat(seen / np.maximum(sampled, 1), sampled)
+        with self._lock:
+            self._sample_key, self._sample = key, frame
+        return frame
+
+    #Pre-aggregated chart data, answered from the day rollups without touching raw rows
+
+    def count(self, start_date=None, end_date=None):
+        with self._lock:
+            lo, hi = day_slice_bounds(self._days, start_date, end_date)
+            return sum(self._partitions[day].size for day in self._days[lo:hi])
+
+    def issue_breakdown(self, start_date=None, end_date=None):
+        """Returns issue/sentiment/source/Count rows for the day window."""
+        with self._lock:
+            lo, hi = day_slice_bounds(self._days, start_date, end_date)
+            combined = self._rollups.total(self._days[lo:hi])
+            issues, sentiments, sources = (list(self._categories[name]) for name in ("issue", "sentiment", "source"))
+
+        rows = [(issues[i], sentiments[s], sources[src], count) for (i, s, src), count in combined.items() if count]
+        return pd.DataFrame(rows, columns=["issue", "sentiment", "source", "Count"]).astype({"Count": np.int64})
+
+    def daily_sentiment(self, start_date=None, end_date=None, changed_since=None):
+        """Returns one row per day with POSITIVE/NEGATIVE/NEUTRAL counts, Total and Happy_Index.
+
+        With changed_since, only the days that received records after that version are returned.
+        """
+        with self._lock:
+            lo, hi = day_slice_bounds(self._days, start_date, end_date)
+            days = self._days[lo:hi]
+            if changed_since is not None:
+                days = [day for day in days if self._day_versions[day] > changed_since]
+            sentiments = list(self._categories["sentiment"])
+            matrix = self._rollups.sentiment_matrix(days, len(sentiments))
+
+        daily = add_happy_index(pd.DataFrame(matrix, columns=sentiments))
+        daily.insert(0, "Date", pd.to_datetime(np.array(days, dtype="datetime64[D]")))
+        return daily
+
+    def latency_percentiles(self, start_date=None, end_date=None, quantiles=(0.5, 0.95, 0.99)):
+        """Returns one row per day with the latency sample Count and a pNN column per quantile.
+
+        Answered from the per-day sketches (within 1% of the exact percentiles); days without
+        latency telemetry are left out.
+        """
+        with self._lock:
+            lo, hi = day_slice_bounds(self._days, start_date, end_date)
+            rows = [
+                (day, sketch.count, *(sketch.quantile(q) for q in quantiles))
+                for day, sketch in ((day, self._latency.get(day)) for day in self._days[lo:hi])
+                if sketch is not None and sketch.count
+            ]
+        return _latency_frame(rows, quantiles)
+
+    def latency_summary(self, start_date=None, end_date=None, quantiles=(0.5, 0.95, 0.99)):
+        """Returns {"count": n, "p50": ..., ...} for the whole window by merging the day sketches."""
+        with self._lock:
+            lo, hi = day_slice_bounds(self._days, start_date, end_date)
+            sketch = merged(self._latency[day] for day in self._days[lo:hi] if day in self._latency)
+        return dict({"count": sketch.count}, **{_quantile_label(q): sketch.quantile(q) for q in quantiles})
+
+
+def _concat_column(parts, name):
+    if len(parts) == 1:
+        return parts[0][name]
+    if parts:
+        return np.concatenate([part[name] for part in parts])
+    return np.empty(0, dtype=COLUMN_DTYPES[name])
+
+
+def _columns_frame(parts, categories):
+    # One DataFrame over chunks of stored column arrays, decoding the categorical codes
+    data = {}
+    for name in COLUMNS:
+        values = _concat_column(parts, name)
+        if name in CATEGORICAL_COLUMNS:
+            values = pd.Categorical.from_codes(values, categories=categories[name])
+        data[name] = values
+    return pd.DataFrame(data, columns=COLUMNS, copy=False)
+
+
+def _quantile_label(q):
+    return f"p{q * 100:g}"
+
+
+def _latency_frame(rows, quantiles):
+    frame = pd.DataFrame(rows, columns=["Date", "Count", *(_quantile_label(q) for q in quantiles)])
+    frame["Date"] = pd.to_datetime(np.array(frame["Date"].tolist(), dtype="datetime64[D]"))
+    return frame
@@ -0,0 +1,117 @@
+import numpy as np
+import pandas as pd
+from record_store import add_happy_index
+
+# Fast (approximate) dashboard mode. The record store keeps a reservoir sample of up to
+# SAMPLE_RESERVOIR_SIZE records per (day, source) stratum; `store.sample(start, end)` returns them
+# with a weight column, the number of records each sampled row stands for. The estimators here
+# turn such a sample into the same frames as the store's exact aggregations, and the error bounds
+# are the usual stratified-sampling ones: a stratum of N records sampled n times adds
+#
+#   N^2 * (1 - n/N) * s^2 / n
+#
+# to the variance of an estimated total (s^2 is the sample variance of the value in the stratum),
+# so strata that are small enough to be kept whole contribute no error at all.
+#
+# The line charts are downsampled with Largest-Triangle-Three-Buckets (LTTB), which keeps the
+# points that shape the line (peaks, dips, the outage day) rather than every n-th point.
+
+Z_95 = 1.96
+STRATUM = ["date", "source"]
+
+
+def estimate_issue_breakdown(sample):
+    """Estimated issue/sentiment/source/Count rows, as from RecordStore.issue_breakdown."""
+    counts = sample.groupby(["issue", "sentiment", "source"], observed=True)["weight"].sum()
+    counts = counts[counts > 0].round().astype(np.int64)
+    return counts.rename("Count").reset_index().astype({"issue": str, "sentiment": str, "source": str})
+
+
+def estimate_daily_sentiment(sample):
+    """Estimated per-day POSITIVE/NEGATIVE/NEUTRAL counts, Total and Happy_Index, as from daily_sentiment.
+
+    The weights of a stratum add up to its record count, so Total is exact; the sentiment counts
+    are estimates (rounded for display; Happy_Index uses the unrounded values).
+    """
+    daily = pd.crosstab(sample["date"], sample["sentiment"].astype(str), values=sample["weight"], aggfunc="sum")
+    daily = daily.fillna(0.0)
+    daily.columns.name = None
+    add_happy_index(daily)
+    counts = daily.columns.drop("Happy_Index")
+    daily[counts] = daily[counts].round().astype(np.int64)
+    daily.index.name = "Date"
+    return daily.reset_index()
+
+
+def _total_variance(sample, values, by=None):
+    # Variance of the estimated total of `values`, summed over strata (per `by` group if given)
+    strata = (sample[STRATUM].assign(value=values, records=sample["stratum_records"])
+              .groupby(STRATUM, observed=True)
+              .agg(records=("records", "first"), sampled=("value", "size"), s2=("value", "var")))
+    strata["s2"] = strata["s2"].fillna(0.0)
+    strata["variance"] = strata["records"] ** 2 * (1 - strata["sampled"] / strata["records"]) * strata["s2"] / strata["sampled"]
+    if by is None:
+        return float(strata["variance"].sum()), float(strata["records"].sum())
+    grouped = strata.groupby(level=by)
+    return grouped["variance"].sum(), grouped["records"].sum()
+
+
+def sample_error_bounds(sample):
+    """95% margins of error of the fast-mode estimates, for the dashboard footer.
+
+    Returns the sampled and total record counts, the estimated NEGATIVE share with its margin, and
+    the widest Happy Index margin of any single day.
+    """
+    if sample.empty:
+        return None
+    sentiment = sample["sentiment"].astype(str)
+    negative = (sentiment == "NEGATIVE").to_numpy(dtype=np.float64)
+    variance, records = _total_variance(sample, negative)
+    negative_share = float((negative * sample["weight"]).sum()) / records
+
+    # Happy Index of a day = mean of +1 (POSITIVE) / -1 (NEGATIVE) / 0 over that day's records
+    score = (sentiment == "POSITIVE").to_numpy(dtype=np.float64) - negative
+    day_variance, day_records = _total_variance(sample, score, by="date")
+    happy_index_margin = float((Z_95 * np.sqrt(day_variance) / day_records).max())
+
+    return {
+        "sampled": len(sample),
+        "records": int(records),
+        "negative_share": negative_share,
+        "negative_share_margin": float(Z_95 * np.sqrt(variance) / records),
+        "happy_index_margin": happy_index_margin,
+    }
+
+
+def lttb_indices(x, y, threshold):
+    """Indices of the `threshold` points that Largest-Triangle-Three-Buckets keeps (all of them if fewer)."""
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    every = (n - 2) / (threshold - 2)
+    selected = np.empty(threshold, dtype=np.int64)
+    selected[0], selected[-1] = 0, n - 1
+    a = 0
+    for i in range(threshold - 2):
+        start = int(i * every) + 1
+        end = int((i + 1) * every) + 1
+        next_end = min(int((i + 2) * every) + 1, n)
+        # Keep the point of this bucket that spans the largest triangle with the last kept point and
+        # the average of the next bucket
+        avg_x, avg_y = x[end:next_end].mean(), y[end:next_end].mean()
+        area = np.abs((x[a] - avg_x) * (y[start:end] - y[a]) - (x[a] - x[start:end]) * (avg_y - y[a]))
+        a = start + int(np.argmax(area))
+        selected[i + 1] = a
+    return selected
+
+
+def downsample(df, x, y, threshold):
+    """Rows of a sorted frame that LTTB keeps for the x/y line (the frame itself when it already fits)."""
+    if len(df) <= threshold:
+        return df
+    x_values = df[x].to_numpy()
+    if np.issubdtype(x_values.dtype, np.datetime64):
+        x_values = x_values.astype("datetime64[ns]").astype(np.int64)
+    return df.iloc[lttb_indices(x_values, df[y].to_numpy(), threshold)]
@@ -0,0 +1,74 @@
+import math
+from collections import Counter
+import numpy as np
+
+# Mergeable quantile sketch for latency percentiles (the DDSketch scheme): values are counted in
+# logarithmic buckets whose width is a fixed fraction of their value, so any quantile is answered
+# within RELATIVE_ACCURACY of the true value. Sketches of different days merge by adding bucket
+# counts, so a date range is answered from the per-day sketches without touching raw records.
+
+RELATIVE_ACCURACY = 0.01
+
+
+class LatencySketch:
+    """Counts of positive values in log-spaced buckets; bucket i covers (gamma**(i-1), gamma**i]."""
+
+    def __init__(self, relative_accuracy=RELATIVE_ACCURACY):
+        self.relative_accuracy = relative_accuracy
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self.gamma)
+        self.bins = Counter()
+        self.zero_count = 0  # values <= 0
+        self.count = 0
+
+    def add(self, values):
+        """Adds an array of values; NaNs (records without telemetry) are skipped."""
+        values = np.asarray(values, dtype=np.float64)
+        values = values[~np.isnan(values)]
+        if not len(values):
+            return
+        positive = values[values > 0]
+        self.zero_count += len(values) - len(positive)
+        indexes, counts = np.unique(np.ceil(np.log(positive) / self._log_gamma).astype(np.int64), return_counts=True)
+        self.bins.update(dict(zip(indexes.tolist(), counts.tolist())))
+        self.count += len(values)
+
+    def merge(self, other):
+        self.bins.update(other.bins)
+        self.zero_count += other.zero_count
+        self.count += other.count
+        return self
+
+    def quantile(self, q):
+        """Returns the q-quantile (0 <= q <= 1), or NaN for an empty sketch."""
+        if self.count == 0:
+            return float("nan")
+        rank = q * (self.count - 1)
+        seen = self.zero_count
+        if rank < seen:
+            return 0.0
+        for index in sorted(self.bins):
+            seen += self.bins[index]
+            if seen > rank:
+                # 2 * gamma**i / (gamma + 1) is within relative_accuracy of both edges of (gamma**(i-1), gamma**i],
+                # so of every value counted in the bucket
+                return 2 * self.gamma ** index / (self.gamma + 1)
+        return 2 * self.gamma ** max(self.bins) / (self.gamma + 1)
+
+    def to_dict(self):
+        return {"zero": self.zero_count, "bins": [[index, count] for index, count in sorted(self.bins.items())]}
+
+    @classmethod
+    def from_dict(cls, data, relative_accuracy=RELATIVE_ACCURACY):
+        sketch = cls(relative_accuracy)
+        sketch.zero_count = data["zero"]
+        sketch.bins.update({index: count for index, count in data["bins"]})
+        sketch.count = sketch.zero_count + sum(sketch.bins.values())
+        return sketch
+
+
+def merged(sketches):
+    total = LatencySketch()
+    for sketch in sketches:
+        total.merge(sketch)
+    return total
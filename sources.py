@@ -0,0 +1,184 @@
+import datetime
+import itertools
+import json
+import math
+import random
+import time
+from config import DATE_FORMAT
+
+# A source is any iterable (or async iterable) that yields batches: lists of (source name, raw record)
+# pairs, where the raw record has the shape the old live_calls()/live_feedback() endpoints returned.
+# ingest.py merges the sources and applies backpressure, so sources never need to sleep.
+#
+# Every raw record also carries a resume cursor under CURSOR_FIELD: (source key, position after
+# this record). Passing a saved position back as `start` resumes the source after that record.
+
+_generated_ids = itertools.count(1)
+CURSOR_FIELD = "_cursor"
+REQUIRED_FIELDS = ["source", "date", "description"]
+
+
+def normalize_raw_record(source, data):
+    """Fills in optional fields so records from any source look like the simulated endpoints.
+
+    Raises ValueError if a required field is missing or blank, the date is not in DATE_FORMAT,
+    or network.latency_ms is not a finite number.
+    """
+    fields = dict(data, source=source)
+    missing = [name for name in REQUIRED_FIELDS if not isinstance(fields.get(name), str) or not fields[name].strip()]
+    if missing:
+        raise ValueError(f"missing or blank field(s): {', '.join(missing)}")
+    datetime.datetime.strptime(data["date"], DATE_FORMAT)  # ValueError for a malformed date
+    data = dict(data)
+    if data.get("record_id") is None:
+        data["record_id"] = f"{source.split()[0].upper()}_EXT_{next(_generated_ids)}"
+    data["record_id"] = str(data["record_id"])
+    data["user_id"] = str(data.get("user_id", "unknown"))
+    data["fixed_sentiment"] = str(data.get("fixed_sentiment", "NEUTRAL"))
+    network = data.get("network")
+    data["network"] = network = dict(network) if isinstance(network, dict) else {}
+    latency = network.get("latency_ms")
+    if latency is not None and (isinstance(latency, bool) or not isinstance(latency, (int, float))):
+        del network["latency_ms"]  # the store keeps latency as a number (NaN when unknown)
+    elif latency is not None and not _is_finite(latency):
+        raise ValueError(f"latency_ms is not a finite number: {latency!r}")
+    return source, data
+
+
+def _is_finite(number):
+    try:
+        return math.isfinite(number)
+    except OverflowError:  # an int too large for a float
+        return False
+
+
+def batched(pairs, batch_size):
+    """Groups an iterable of (source, raw record) pairs into lists of at most batch_size."""
+    iterator = iter(pairs)
+    while True:
+        batch = list(itertools.islice(iterator, batch_size))
+        if not batch:
+            return
+        yield batch
+
+
+#Source adapters
+
+def replay_source(records, batch_size, key="replay", start=0):
+    """Replays analyzed-shape records (e.g. the hand-crafted narrative records) as raw endpoint records."""
+    def pairs():
+        for position, record in enumerate(records[start:], start + 1):
+            yield record["source"], {
+                "record_id": record["record_id"],
+                "date": record["date"].strftime(DATE_FORMAT),
+                "user_id": record["user_id"],
+                "description": record["description"],
+                "fixed_sentiment": record["fixed_sentiment"],
+                "network": record["network"],
+                CURSOR_FIELD: (key, position),
+            }
+    return batched(pairs(), batch_size)
+
+
+def template_source(templates, batch_size, total_records, start_date, num_days, seed=None, key="template", start=0):
+    """Replays analyzed-shape template records (e.g. the hand-crafted narrative records) at any scale.
+
+    Record i reuses template i % len(templates) with a fresh record_id and a random day out of num_days.
+    """
+    rng = random.Random(seed)
+
+    def pairs():
+        for i in range(start + 1, total_records + 1):
+            template = templates[(i - 1) % len(templates)]
+            day = start_date + datetime.timedelta(days=rng.randrange(num_days))
+            yield template["source"], {
+                "record_id": f"{template['record_id']}_{i}",
+                "date": day.strftime(DATE_FORMAT),
+                "user_id": f"{template['user_id']}_{i}",
+                "description": template["description"],
+                "fixed_sentiment": template["fixed_sentiment"],
+                "network": template["network"],
+                CURSOR_FIELD: (key, i),
+            }
+    return batched(pairs(), batch_size)
+
+
+def _parse_jsonl_line(line, cursor):
+    """The (source, raw record) pair of one line, or None (logged) if the line is not a valid record."""
+    try:
+        obj = json.loads(line)
+        if not isinstance(obj, dict):
+            raise ValueError("not a JSON object")
+        obj[CURSOR_FIELD] = cursor
+        return normalize_raw_record(obj.pop("source", None), obj)
+    except ValueError as e:  # json.JSONDecodeError and UnicodeDecodeError are ValueErrors too
+        print(f"Skipping malformed record at {cursor[0]} offset {cursor[1]}: {e}.")
+        return None
+
+
+def jsonl_tail_source(path, batch_size, follow=True, poll_interval=0.5, stop_event=None, key=None, start=0):
+    """Tails a JSONL file of raw records, one object per line with at least source, date and description.
+
+    With follow=True the source waits for new lines at EOF (like `tail -f`) until stop_event is set.
+    Cursors are byte offsets into the file.
+    """
+    key = key or f"jsonl:{path}"
+    with open(path, "rb") as f:
+        f.seek(start)
+        batch = []
+        partial = b""
+        while True:
+            line = f.readline()
+            if line.endswith(b"\n"):
+                line, partial = partial + line, b""
+                record = _parse_jsonl_line(line, (key, f.tell())) if line.strip() else None
+                if record is not None:
+                    batch.append(record)
+                if len(batch) >= batch_size:
+                    yield batch
+                    batch = []
+                continue
+
+            # At EOF, possibly mid-line: hand over what we have, then wait for the writer
+            partial += line
+            done = not follow or (stop_event is not None and stop_event.is_set())
+            if done and partial.strip():
+                record = _parse_jsonl_line(partial, (key, f.tell()))
+                if record is not None:
+                    batch.append(record)
+            if batch:
+                yield batch
+                batch = []
+            if done:
+                return
+            time.sleep(poll_interval)
+
+
+def synthetic_source(batch_size, total_records=None, start_date=None, num_days=1, seed=None, key="synthetic", start=0):
+    """Generates random call-log and feedback records in-process, as fast as the consumer takes them."""
+    rng = random.Random(seed)
+    start_date = start_date or datetime.date.today()
+    templates = [
+        ("Call Log", "POSITIVE", "The agent was fantastic and helped me set up my new phone."),
+        ("Call Log", "NEUTRAL", "I called to change my payment method. Standard procedure."),
+        ("Call Log", "NEGATIVE", "My phone has no service and keeps disconnecting. Fix the outage!"),
+        ("Feedback Form", "POSITIVE", "Excellent 5G coverage, speeds are consistently fast!"),
+        ("Feedback Form", "NEGATIVE", "I was charged a late fee on my bill which is unfair."),
+        ("Feedback Form", "NEUTRAL", "The email about the new plan was a little confusing."),
+    ]
+
+    def pairs():
+        for i in itertools.count(start + 1) if total_records is None else range(start + 1, total_records + 1):
+            source, sentiment, description = rng.choice(templates)
+            day = start_date + datetime.timedelta(days=rng.randrange(num_days))
+            prefix = "CALL" if source == "Call Log" else "FEEDBACK"
+            yield source, {
+                "record_id": f"SYN_{prefix}_{i}",
+                "date": day.strftime(DATE_FORMAT),
+                "user_id": f"{source.split()[0].lower()}_user_{i}",
+                "description": description,
+                "fixed_sentiment": sentiment,
+                "network": {"latency_ms": rng.randint(30, 250)} if source == "Call Log" else {},
+                CURSOR_FIELD: (key, i),
+            }
+    return batched(pairs(), batch_size)
@@ -0,0 +1,334 @@
+import os
+import threading
+from collections import Counter
+import numpy as np
+import pandas as pd
+from record_store import COLUMNS, CATEGORICAL_COLUMNS, add_happy_index, _to_day, _latency_frame, _quantile_label
+from sketches import LatencySketch
+
+# Optional record store backed by an embedded database (SQLite from the standard library, or DuckDB
+# when installed). It has the same interface as RecordStore, but every read is a SQL query that
+# runs inside the database, so only the query result is materialized in Python:
+#
+#   records(day, ..., sample_key)                  one row per analyzed record, indexed on (day, source, sample_key)
+#   daily_counts(day, issue, sentiment, source, n) per-day rollup, upserted with every append
+#   latency_bins(day, bin, n)                      per-day latency sketch buckets (see sketches.py)
+#
+# The chart aggregations read daily_counts, whose size depends on the number of days and
+# categories, not on the number of records. Every record gets a random sample_key on insert, so the
+# sample_size rows with the smallest keys are a uniform sample of their (day, source) stratum, and
+# `sample` reads them off the index instead of maintaining reservoirs on append.
+
+_EPOCH_DAY = np.datetime64(0, "D")
+_ZERO_BIN = -2 ** 62  # latency_bins row holding a day's zero_count
+STRING_COLUMNS = ["record_id", "source", "user_id", "description", "sentiment", "issue"]
+
+
+def _day_number(value):
+    return int((_to_day(value) - _EPOCH_DAY).astype(np.int64))
+
+
+def _records_frame(frame):
+    # Query result (with a day number column) -> the DataFrame shape of RecordStore.snapshot
+    frame = frame.rename(columns={"day": "date"})
+    frame["date"] = (_EPOCH_DAY + frame["date"].to_numpy(dtype=np.int64)).astype("datetime64[ns]")
+    frame["latency_ms"] = frame["latency_ms"].astype(np.float32)
+    for name in CATEGORICAL_COLUMNS:
+        frame[name] = frame[name].astype("category")
+    return frame
+
+
+def _connect(backend, path):
+    if backend == "duckdb":
+        try:
+            import duckdb
+        except ImportError:
+            raise ImportError("RECORD_STORE_BACKEND = 'duckdb' needs the duckdb package (pip install duckdb)")
+        return duckdb.connect(path)
+    if backend == "sqlite":
+        import sqlite3
+        connection = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute("PRAGMA synchronous=NORMAL")
+        return connection
+    raise ValueError(f"Unknown record store backend: {backend!r}")
+
+
+class SqlRecordStore:
+    """RecordStore interface over an embedded SQLite or DuckDB database.
+
+    Opening a store only creates missing tables, since every process that imports data_pipeline
+    (spawned scoring workers too) opens the same file. The ingesting process empties it with reset,
+    so each run starts from scratch (the pipeline re-ingests from its sources); PERSIST_RECORDS
+    applies to the in-memory RecordStore only. retention_days works as in RecordStore.
+    """
+
+    def __init__(self, backend="sqlite", path=":memory:", retention_days=None, sample_size=200):
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.backend = backend
+        self._retention_days = retention_days
+        self._sample_size = sample_size
+        self._rng = np.random.default_rng()
+        self._lock = threading.Lock()
+        self._changed = threading.Condition(self._lock)
+        self._connection = _connect(backend, path)
+        self._size = 0
+        self._version = 0
+        self._day_versions = {}
+        self._snapshot_key = None
+        self._snapshot = None
+        self._sample_key = None
+        self._sample = None
+        self._create_schema()
+
+    def reset(self):
+        """Drops every record (the version keeps counting up, so caches keyed on it stay valid)."""
+        with self._lock:
+            self._connection.execute("BEGIN")
+            try:
+                for table in ["records", "daily_counts", "latency_bins"]:
+                    self._connection.execute(f"DELETE FROM {table}")
+                self._connection.execute("COMMIT")
+            except Exception:
+                self._connection.execute("ROLLBACK")
+                raise
+            self._size = 0
+            self._version += 1
+            self._day_versions = {}
+            self._changed.notify_all()
+
+    def _create_schema(self):
+        text_columns = ", ".join(f"{name} TEXT" for name in STRING_COLUMNS)
+        for statement in [
+            f"CREATE TABLE IF NOT EXISTS records (day INTEGER, {text_columns}, sentiment_score DOUBLE, latency_ms DOUBLE, sample_key DOUBLE)",
+            # Day-range queries use the index's day prefix; sample reads a stratum's lowest sample_keys
+            "CREATE INDEX IF NOT EXISTS records_day ON records (day, source, sample_key)",
+            "CREATE TABLE IF NOT EXISTS daily_counts (day INTEGER, issue TEXT, sentiment TEXT, source TEXT, n BIGINT, "
+            "PRIMARY KEY (day, issue, sentiment, source))",
+            "CREATE TABLE IF NOT EXISTS latency_bins (day INTEGER, bin BIGINT, n BIGINT, PRIMARY KEY (day, bin))",
+        ]:
+            self._connection.execute(statement)
+
+    def _query(self, sql, params=()):
+        if self.backend == "duckdb":
+            return self._connection.execute(sql, list(params)).df()
+        return pd.read_sql_query(sql, self._connection, params=list(params))
+
+    def _day_bounds(self, start_date, end_date):
+        lo = -2 ** 31 if start_date is None else _day_number(start_date)
+        hi = 2 ** 31 if end_date is None else _day_number(end_date)
+        return lo, hi
+
+    def __len__(self):
+        return self._size
+
+    @property
+    def version(self):
+        """Monotonic data version, bumped by every append. Equal versions mean identical contents."""
+        return self._version
+
+    def wait_for_version(self, after_version, timeout=None):
+        """Blocks until the version moves past after_version (or timeout) and returns the current version."""
+        with self._changed:
+            self._changed.wait_for(lambda: self._version > after_version, timeout=timeout)
+            return self._version
+
+    def days(self):
+        with self._lock:
+            return sorted(np.datetime64(int(day), "D") for day in self._day_versions)
+
+    def append_many(self, records):
+        """Inserts a chunk of analyzed record dicts and upserts their per-day rollup counts in one transaction."""
+        if not records:
+            return
+        days = (np.array([r["date"] for r in records], dtype="datetime64[D]") - _EPOCH_DAY).astype(np.int64).tolist()
+        rows = [
+            (day, *(str(r[name]) for name in STRING_COLUMNS), float(r["sentiment_score"]),
+             None if r["latency_ms"] is None else float(r["latency_ms"]), sample_key)
+            for day, r, sample_key in zip(days, records, self._rng.random(len(records)).tolist())
+        ]
+        rollup = Counter((day, r["issue"], r["sentiment"], r["source"]) for day, r in zip(days, records))
+        latencies_by_day = {}
+        for row in rows:
+            latencies_by_day.setdefault(row[0], []).append(np.nan if row[-2] is None else row[-2])
+        latency_bins = []
+        for day, latencies in latencies_by_day.items():
+            sketch = LatencySketch()
+            sketch.add(latencies)
+            latency_bins.extend((day, index, count) for index, count in sketch.bins.items())
+            if sketch.zero_count:
+                latency_bins.append((day, _ZERO_BIN, sketch.zero_count))
+
+        placeholders = ", ".join("?" * (len(STRING_COLUMNS) + 4))
+        with self._lock:
+            connection = self._connection
+            connection.execute("BEGIN")
+            try:
+                if self.backend == "duckdb":
+                    batch = pd.DataFrame(rows, columns=["day", *STRING_COLUMNS, "sentiment_score", "latency_ms", "sample_key"])
+                    connection.register("incoming_batch", batch)
+                    connection.execute("INSERT INTO records SELECT * FROM incoming_batch")
+                    connection.unregister("incoming_batch")
+                else:
+                    connection.executemany(f"INSERT INTO records VALUES ({placeholders})", rows)
+                connection.executemany(
+                    "INSERT INTO daily_counts VALUES (?, ?, ?, ?, ?) "
+                    "ON CONFLICT (day, issue, sentiment, source) DO UPDATE SET n = daily_counts.n + excluded.n",
+                    [(*key, count) for key, count in rollup.items()]
+                )
+                connection.executemany(
+                    "INSERT INTO latency_bins VALUES (?, ?, ?) "
+                    "ON CONFLICT (day, bin) DO UPDATE SET n = latency_bins.n + excluded.n", latency_bins
+                )
+                expired_days = self._expired_days(days)
+                if expired_days:
+                    cutoff = max(expired_days) + 1
+                    connection.execute("DELETE FROM records WHERE day < ?", (cutoff,))
+                    connection.execute("DELETE FROM daily_counts WHERE day < ?", (cutoff,))
+                    connection.execute("DELETE FROM latency_bins WHERE day < ?", (cutoff,))
+                connection.execute("COMMIT")
+            except Exception:
+                connection.execute("ROLLBACK")
+                raise
+            self._version += 1
+            for day in set(days):
+                self._day_versions[day] = self._version
+            if expired_days:
+                self._size = int(self._query("SELECT COALESCE(SUM(n), 0) AS n FROM daily_counts")["n"].iloc[0])
+                for day in expired_days:
+                    del self._day_versions[day]
+            else:
+                self._size += len(records)
+            self._changed.notify_all()
+
+    def _expired_days(self, new_days):
+        if self._retention_days is None:
+            return []
+        cutoff = max(max(new_days), max(self._day_versions, default=0)) - self._retention_days + 1
+        return [day for day in set(self._day_versions) | set(new_days) if day < cutoff]
+
+    def append(self, record):
+        self.append_many([record])
+
+    def clear_caches(self):
+        """Forgets the cached snapshot and sample frames (for benchmarks that time uncached reads)."""
+        with self._lock:
+            self._snapshot_key = self._snapshot = None
+            self._sample_key = self._sample = None
+
+    def snapshot(self, start_date=None, end_date=None):
+        """Returns a DataFrame of the records in the inclusive day window (all records by default)."""
+        lo, hi = self._day_bounds(start_date, end_date)
+        with self._lock:
+            key = (self._version, lo, hi)
+            if self._snapshot_key == key:
+                return self._snapshot
+            select = ", ".join("day" if name == "date" else name for name in COLUMNS)
+            frame = self._query(f"SELECT {select} FROM records WHERE day BETWEEN ? AND ? ORDER BY day", (lo, hi))
+
+        frame = _records_frame(frame)
+        with self._lock:
+            self._snapshot_key, self._snapshot = key, frame
+        return frame
+
+    def sample(self, start_date=None, end_date=None):
+        """Returns up to sample_size random records per (day, source) stratum, as RecordStore.sample does."""
+        lo, hi = self._day_bounds(start_date, end_date)
+        with self._lock:
+            key = (self._version, lo, hi)
+            if self._sample_key == key:
+                return self._sample
+            columns = ["day" if name == "date" else name for name in COLUMNS]
+            strata = self._connection.execute(
+                "SELECT day, source, SUM(n) FROM daily_counts WHERE day BETWEEN ? AND ? "
+                "GROUP BY day, source ORDER BY day, source", [lo, hi]
+            ).fetchall()
+            # One index range scan per stratum, so the cost follows the sample size, not the window's rows
+            rows = []
+            for day, source, stratum_records in strata:
+                rows.extend(
+                    (*row, stratum_records) for row in self._connection.execute(
+                        f"SELECT {', '.join(columns)} FROM records WHERE day = ? AND source = ? ORDER BY sample_key LIMIT ?",
+                        [day, source, self._sample_size]
+                    ).fetchall()
+                )
+
+        frame = _records_frame(pd.DataFrame(rows, columns=[*columns, "stratum_records"]))
+        frame["stratum_records"] = frame["stratum_records"].astype(np.int64)
+        frame["weight"] = frame["stratum_records"] / np.minimum(frame["stratum_records"], self._sample_size)
+        with self._lock:
+            self._sample_key, self._sample = key, frame
+        return frame
+
+    #Chart aggregations, answered from daily_counts
+
+    def count(self, start_date=None, end_date=None):
+        lo, hi = self._day_bounds(start_date, end_date)
+        with self._lock:
+            result = self._query("SELECT COALESCE(SUM(n), 0) AS n FROM daily_counts WHERE day BETWEEN ? AND ?", (lo, hi))
+        return int(result["n"].iloc[0])
+
+    def issue_breakdown(self, start_date=None, end_date=None):
+        """Returns issue/sentiment/source/Count rows for the day window."""
+        lo, hi = self._day_bounds(start_date, end_date)
+        with self._lock:
+            breakdown = self._query(
+                "SELECT issue, sentiment, source, SUM(n) AS Count FROM daily_counts "
+                "WHERE day BETWEEN ? AND ? GROUP BY issue, sentiment, source", (lo, hi)
+            )
+        breakdown["Count"] = breakdown["Count"].astype(np.int64)
+        return breakdown
+
+    def daily_sentiment(self, start_date=None, end_date=None, changed_since=None):
+        """Returns one row per day with POSITIVE/NEGATIVE/NEUTRAL counts, Total and Happy_Index.
+
+        With changed_since, only the days that received records after that version are returned.
+        """
+        lo, hi = self._day_bounds(start_date, end_date)
+        with self._lock:
+            counts = self._query(
+                "SELECT day, sentiment, SUM(n) AS n FROM daily_counts "
+                "WHERE day BETWEEN ? AND ? GROUP BY day, sentiment", (lo, hi)
+            )
+            if changed_since is not None:
+                changed = [day for day, version in self._day_versions.items() if version > changed_since]
+                counts = counts[counts["day"].isin(changed)]
+
+        daily = counts.pivot_table(index="day", columns="sentiment", values="n", aggfunc="sum", fill_value=0)
+        daily = daily.sort_index().astype(np.int64)
+        daily.columns.name = None
+        add_happy_index(daily)
+        daily.insert(0, "Date", pd.to_datetime(_EPOCH_DAY + daily.index.to_numpy(dtype=np.int64)))
+        return daily.reset_index(drop=True)
+
+    def _latency_sketches(self, start_date, end_date):
+        lo, hi = self._day_bounds(start_date, end_date)
+        with self._lock:
+            bins = self._query("SELECT day, bin, n FROM latency_bins WHERE day BETWEEN ? AND ? ORDER BY day", (lo, hi))
+        sketches = {}
+        for day, index, count in bins.itertuples(index=False):
+            sketch = sketches.get(day)
+            if sketch is None:
+                sketch = sketches[day] = LatencySketch()
+            if index == _ZERO_BIN:
+                sketch.zero_count += int(count)
+            else:
+                sketch.bins[int(index)] += int(count)
+            sketch.count += int(count)
+        return sketches
+
+    def latency_percentiles(self, start_date=None, end_date=None, quantiles=(0.5, 0.95, 0.99)):
+        """Returns one row per day with the latency sample Count and a pNN column per quantile."""
+        rows = [
+            (_EPOCH_DAY + int(day), sketch.count, *(sketch.quantile(q) for q in quantiles))
+            for day, sketch in sorted(self._latency_sketches(start_date, end_date).items())
+        ]
+        return _latency_frame(rows, quantiles)
+
+    def latency_summary(self, start_date=None, end_date=None, quantiles=(0.5, 0.95, 0.99)):
+        """Returns {"count": n, "p50": ..., ...} for the whole window by merging the day sketches."""
+        sketch = LatencySketch()
+        for day_sketch in self._latency_sketches(start_date, end_date).values():
+            sketch.merge(day_sketch)
+        return dict({"count": sketch.count}, **{_quantile_label(q): sketch.quantile(q) for q in quantiles})
@@ -0,0 +1,45 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# A local stand-in for the Gemini endpoint, shared by benchmark.py and the tests: every POST gets a
+# canned analysis, so AI requests can be timed and tested without network access or an API key.
+
+STUB_ANALYSIS = "Stub analysis."
+
+
+class _StubGeminiHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    response_body = json.dumps({"candidates": [{"content": {"parts": [{"text": STUB_ANALYSIS}]}}]}).encode()
+
+    def setup(self):
+        super().setup()
+        self.server.connections += 1
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        self.server.requests += 1
+        self.server.release.wait(timeout=10)
+        status = self.server.statuses.pop(0) if self.server.statuses else 200
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(self.response_body)))
+        self.end_headers()
+        self.wfile.write(self.response_body)
+
+    def log_message(self, *args):
+        pass
+
+
+def start_stub_gemini_server():
+    """Serves the canned response on a free local port; returns the server (shutdown() to stop).
+
+    The server counts its connections and requests. Statuses put in its statuses list are answered
+    first (then 200), and clearing its release event holds every request until it is set again.
+    """
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _StubGeminiHandler)
+    server.connections, server.requests, server.statuses = 0, 0, []
+    server.release = threading.Event()
+    server.release.set()
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
@@ -0,0 +1,29 @@
+import os
+import sys
+
+# The modules live at the repository root (there is no package), so make them importable
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def vader_lexicon_missing():
+    import nltk
+    try:
+        nltk.data.find('sentiment/vader_lexicon.zip')
+    except LookupError:
+        return True
+    return False
+
+
+def analyzed_records(count, day):
+    """count analyzed record dicts for one day, cycling through three sentiments/issues and two sources."""
+    return [{
+        "record_id": f"CALL_{day.day}_{i}",
+        "source": "Call Log" if i % 2 else "Feedback Form",
+        "date": day,
+        "user_id": f"user_{i}",
+        "description": ["No service again", "Great coverage", "Billing mix-up"][i % 3],
+        "sentiment": ["NEGATIVE", "POSITIVE", "NEUTRAL"][i % 3],
+        "issue": ["Network", "Other", "Billing"][i % 3],
+        "sentiment_score": [-0.5, 0.6, 0.0][i % 3],
+        "latency_ms": float(40 + i) if i % 2 else None,
+    } for i in range(count)]
@@ -0,0 +1,69 @@
+import time
+
+import pandas as pd
+import pytest
+
+import ai_client
+from metrics import render_metrics, GEMINI_CACHE_LOOKUPS
+from stub_gemini import STUB_ANALYSIS, start_stub_gemini_server
+
+
+@pytest.fixture
+def gemini(monkeypatch):
+    server = start_stub_gemini_server()
+    monkeypatch.setattr(ai_client, "API_URL", f"http://127.0.0.1:{server.server_address[1]}/generate")
+    monkeypatch.setattr(ai_client, "API_KEY", "test-key")
+    ai_client.clear_cache()
+    yield server
+    server.release.set()
+    server.shutdown()
+
+
+def _records(label):
+    return pd.DataFrame({
+        "date": pd.to_datetime(["2025-10-01", "2025-10-02"]),
+        "source": ["Call Log", "Feedback Form"],
+        "description": [f"No service again ({label})", "Great coverage"],
+        "issue": ["Network", "Other"],
+        "sentiment": ["NEGATIVE", "POSITIVE"],
+    })
+
+
+def test_requests_reuse_one_keep_alive_connection(gemini):
+    for label in ["a", "b", "c"]:
+        assert ai_client.call_gemini_api(_records(label), label) == STUB_ANALYSIS
+    assert gemini.requests == 3
+    assert gemini.connections == 1
+
+
+def test_retries_on_503(gemini, monkeypatch):
+    sleeps = []
+    monkeypatch.setattr(ai_client.time, "sleep", sleeps.append)
+    gemini.statuses = [503, 503]
+    assert ai_client.call_gemini_api(_records("retry"), "retry") == STUB_ANALYSIS
+    assert gemini.requests == 3
+    assert sleeps == [1, 2]
+
+
+def test_job_runs_in_background_until_done(gemini):
+    gemini.release.clear()
+    job_id = ai_client.submit_analysis_job(_records("job"), "job")
+    assert ai_client.get_job_result(job_id) == ("running", None)
+
+    gemini.release.set()
+    deadline = time.monotonic() + 10
+    while ai_client.get_job_result(job_id)[0] == "running" and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert ai_client.get_job_result(job_id) == ("done", STUB_ANALYSIS)
+    assert ai_client.get_job_result("no-such-job") == ("unknown", None)
+
+
+def test_cache_lookups_and_size_are_reported_in_metrics(gemini):
+    hits, misses = GEMINI_CACHE_LOOKUPS.value(result="hit"), GEMINI_CACHE_LOOKUPS.value(result="miss")
+    for _ in range(3):
+        ai_client.call_gemini_api(_records("cached"), "cached")
+    assert GEMINI_CACHE_LOOKUPS.value(result="hit") == hits + 2
+    assert GEMINI_CACHE_LOOKUPS.value(result="miss") == misses + 1
+    exposition = render_metrics()
+    assert 'happyconnect_gemini_cache_lookups_total{result="hit"}' in exposition
+    assert "happyconnect_gemini_cache_entries 1\n" in exposition
@@ -0,0 +1,61 @@
+import random
+import nltk
+import pytest
+import analysis
+from analysis import ISSUE_KEYWORDS, analyze_batch, extract_issue
+from data_pipeline import get_analyzer, get_hand_crafted_records
+from conftest import vader_lexicon_missing
+
+
+def baseline_extract_issue(text):
+    # The original per-record classifier: first category with any keyword as a substring
+    text_lower = text.lower()
+    for issue, words in ISSUE_KEYWORDS.items():
+        if any(word in text_lower for word in words):
+            return issue
+    return "Other"
+
+
+def random_keyword_texts(count, seed=0):
+    rng = random.Random(seed)
+    keywords = [word for words in ISSUE_KEYWORDS.values() for word in words]
+    filler = ["the", "my", "was", "very", "slow", "today", "xx", "", " ", "-", "APP", "Signal"]
+    texts = []
+    for _ in range(count):
+        parts = rng.choices(keywords + filler, k=rng.randint(0, 8))
+        # Glue some parts together so keywords also appear inside other words and overlap each other
+        texts.append("".join(part + rng.choice(["", " ", " ", ".", "-"]) for part in parts))
+    return texts
+
+
+@pytest.fixture(scope="module")
+def texts():
+    return [record["description"] for record in get_hand_crafted_records()] + random_keyword_texts(2000)
+
+
+def test_extract_issue_matches_baseline(texts):
+    for text in texts:
+        assert extract_issue(text) == baseline_extract_issue(text), text
+
+
+@pytest.mark.skipif(vader_lexicon_missing(), reason="VADER lexicon not in nltk_data (python -m nltk.downloader vader_lexicon)")
+def test_analyze_batch_matches_per_record_scoring(texts):
+    analyzer = get_analyzer()
+    batch = texts[:300] + texts[:50]  # repeated texts go through the per-batch caches
+    timings = {}
+    results = analyze_batch(batch, analyzer, timings)
+
+    assert results == [(baseline_extract_issue(text), analyzer.polarity_scores(text)["compound"]) for text in batch]
+    assert set(timings) == {"issue_extraction", "sentiment_scoring"}
+
+
+def test_failed_lexicon_download_raises(monkeypatch):
+    def not_found(resource):
+        raise LookupError(resource)
+
+    monkeypatch.setattr(analysis, "_vader_lexicon_ready", False)
+    monkeypatch.setattr(nltk.data, "find", not_found)
+    monkeypatch.setattr(nltk, "download", lambda *args, **kwargs: False)
+    with pytest.raises(LookupError, match="could not be downloaded"):
+        analysis.ensure_vader_lexicon()
+    assert not analysis._vader_lexicon_ready
@@ -0,0 +1,43 @@
+import random
+
+from analysis import extract_issue
+from anomaly import AlertLog, SpikeDetector
+from config import ANOMALY_FAST_ALPHA, ANOMALY_SLOW_ALPHA, ANOMALY_Z_THRESHOLD, ANOMALY_MIN_RECORDS
+from data_pipeline import date_range, get_hand_crafted_records
+
+
+def detector():
+    log = AlertLog()
+    return log, SpikeDetector(log, ANOMALY_FAST_ALPHA, ANOMALY_SLOW_ALPHA, ANOMALY_Z_THRESHOLD, ANOMALY_MIN_RECORDS)
+
+
+def test_narrative_outage_raises_network_share_then_negative_rate_alerts():
+    records = [{"record_id": r["record_id"], "source": r["source"], "date": r["date"], "sentiment": r["fixed_sentiment"],
+                "issue": extract_issue(r["description"])} for r in get_hand_crafted_records()]
+    outage_start = next(i for i, r in enumerate(records) if r["date"] == date_range[4])
+    log, spikes = detector()
+    spikes.observe(records)
+
+    network, negative = reversed(log.recent())
+    assert (network["metric"], network["source"], network["issue"]) == ("network_share", "Call Log", "Network")
+    assert network["record_id"] == records[outage_start]["record_id"]  # on the outage's first record
+    assert network["detection_latency_records"] == 1
+    assert (negative["metric"], negative["source"], negative["issue"]) == ("negative_rate", "Call Log", "All issues")
+    assert negative["date"] == str(date_range[4])
+    assert negative["detection_latency_records"] == 9
+
+
+def test_stationary_input_stays_quiet():
+    log, spikes = detector()
+    spikes.observe([{"record_id": f"R{i}", "source": ["Call Log", "Feedback Form"][i % 2], "date": "2025-10-01",
+                     "sentiment": ["NEGATIVE", "POSITIVE", "NEUTRAL"][i % 3], "issue": ["Network", "Billing", "Other", "App"][i % 4]}
+                    for i in range(5000)])
+    assert log.recent() == []
+
+    # Random but stationary rates: false alarms stay under one per thousand records
+    rng = random.Random(0)
+    log, spikes = detector()
+    spikes.observe([{"record_id": f"R{i}", "source": rng.choice(["Call Log", "Feedback Form"]), "date": "2025-10-01",
+                     "sentiment": "NEGATIVE" if rng.random() < 0.3 else "POSITIVE", "issue": rng.choice(["Network", "Billing", "Other"])}
+                    for i in range(5000)])
+    assert len(log.recent()) < 5
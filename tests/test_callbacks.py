@@ -0,0 +1,66 @@
+import datetime
+
+import pytest
+
+import callbacks
+from record_store import RecordStore
+from conftest import analyzed_records
+
+
+@pytest.fixture
+def store(monkeypatch):
+    store = RecordStore()
+    for day in range(1, 6):
+        store.append_many(analyzed_records(day * 3, datetime.datetime(2025, 10, day)))
+    monkeypatch.setattr(callbacks, "record_store", store)
+    return store
+
+
+def test_filtered_dataframe_covers_the_inclusive_day_window(store):
+    # The date picker sends either plain days or full timestamps
+    for start, end in [("2025-10-02", "2025-10-04"), ("2025-10-02T00:00:00", "2025-10-04T23:59:59")]:
+        filtered_df, date_range_str = callbacks.get_filtered_dataframe(start, end)
+        assert len(filtered_df) == 6 + 9 + 12
+        assert filtered_df["date"].dt.day.unique().tolist() == [2, 3, 4]
+        assert date_range_str == "2025-10-02 to 2025-10-04"
+
+    filtered_df, _ = callbacks.get_filtered_dataframe("2025-10-05", "2025-10-05")
+    assert len(filtered_df) == 15
+    sampled_df, _ = callbacks.get_filtered_dataframe("2025-10-05", "2025-10-05", sampled=True)
+    assert len(sampled_df) == 15 and sampled_df["weight"].eq(1).all()
+    assert callbacks.get_filtered_dataframe("2025-10-06", "2025-10-09")[0].empty
+
+
+def issue_total(charts):
+    # Records counted by the issue breakdown bar chart of a rendered charts layout
+    figure = charts.children[0].children.figure
+    return sum(sum(trace.x) for trace in figure.data)
+
+
+def test_rendered_charts_are_cached_until_the_data_version_changes(store, monkeypatch):
+    renders = []
+    render = callbacks.render_charts_and_graphs
+    monkeypatch.setattr(callbacks, "render_charts_and_graphs", lambda *args: renders.append(args) or render(*args))
+    monkeypatch.setattr(callbacks, "_figure_cache", type(callbacks._figure_cache)())
+    monkeypatch.setattr(callbacks, "FIGURE_CACHE_SIZE", 2)
+    outage_df = callbacks.get_outage_df()
+
+    first = callbacks.get_cached_charts(store.version, outage_df, "2025-10-01", "2025-10-05")
+    assert callbacks.get_cached_charts(store.version, outage_df, "2025-10-01", "2025-10-05") is first
+    assert len(renders) == 1 and issue_total(first) == 45
+
+    # New records bump the version, so the same window is drawn again from the new data
+    store.append_many(analyzed_records(5, datetime.datetime(2025, 10, 3)))
+    second = callbacks.get_cached_charts(store.version, outage_df, "2025-10-01", "2025-10-05")
+    assert len(renders) == 2 and issue_total(second) == 50
+
+    # Each date range and query mode is its own entry, and only the newest FIGURE_CACHE_SIZE are kept
+    callbacks.get_cached_charts(store.version, outage_df, "2025-10-01", "2025-10-05", "fast")
+    assert len(renders) == 3
+    assert callbacks.get_cached_charts(store.version, outage_df, "2025-10-01", "2025-10-05") is second
+    callbacks.get_cached_charts(store.version, outage_df, "2025-10-02", "2025-10-02")
+    assert len(callbacks._figure_cache) == 2 and len(renders) == 4
+    callbacks.get_cached_charts(store.version, outage_df, "2025-10-01", "2025-10-05")
+    assert len(renders) == 4  # the entry read last is kept over the older fast-mode one
+    callbacks.get_cached_charts(store.version, outage_df, "2025-10-01", "2025-10-05", "fast")
+    assert len(renders) == 5
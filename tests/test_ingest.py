@@ -0,0 +1,104 @@
+import os
+import queue
+import subprocess
+import sys
+import threading
+import time
+
+import pytest
+
+from ingest import start_ingest, iter_batches, SourceError
+from metrics import INGEST_SOURCE_ERRORS
+
+
+def delayed_source(name, delays):
+    """A blocking fake source: batch i is one record, produced delays[i] seconds after the previous one."""
+    for i, delay in enumerate(delays):
+        time.sleep(delay)
+        yield [(name, {"seq": i, "arrived": time.monotonic()})]
+
+
+def test_slow_source_does_not_stall_fast_one():
+    out = queue.Queue(maxsize=100)
+    start = time.monotonic()
+    start_ingest([delayed_source("slow", [1.0]), delayed_source("fast", [0.01] * 10)], out, 1, 0.01)
+
+    records = [record for batch in iter_batches(out) for record in batch]
+    fast = [data for source, data in records if source == "fast"]
+    assert [data["seq"] for data in fast] == list(range(10))
+    assert fast[-1]["arrived"] - start < 0.8  # long before the slow source produced anything
+    # Arrival order: the merged stream is sorted by the time each record was produced
+    arrived = [data["arrived"] for _, data in records]
+    assert arrived == sorted(arrived)
+    assert records[-1][0] == "slow"
+
+
+def test_stop_event_unblocks_a_full_queue():
+    out = queue.Queue(maxsize=1)
+    stop = threading.Event()
+    thread = start_ingest([delayed_source("endless", [0.0] * 10_000)], out, 1, 0.01, stop)
+    time.sleep(0.2)  # the consumer has stopped reading and the queue is full
+    stop.set()
+    thread.join(timeout=2)
+    assert not thread.is_alive()
+
+
+def test_following_source_does_not_block_exit(tmp_path):
+    path = tmp_path / "records.jsonl"
+    path.write_text('{"source": "Call Log", "date": "2025-10-02", "description": "hello"}\n')
+    script = (
+        "import queue, sys; from ingest import start_ingest, iter_batches; from sources import jsonl_tail_source\n"
+        "out = queue.Queue(maxsize=1)\n"
+        f"start_ingest([jsonl_tail_source({str(path)!r}, 8, follow=True, poll_interval=0.05)], out, 8, 0.05)\n"
+        "print(len(next(iter_batches(out))))\n"
+    )
+    repo = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    result = subprocess.run([sys.executable, "-c", script], cwd=repo, capture_output=True, text=True, timeout=10)
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.strip() == "1"
+
+
+def failing_source(name, batches):
+    yield from delayed_source(name, [0.0] * batches)
+    raise OSError("connection reset")
+
+
+async def failing_async_source(name, batches):
+    for batch in failing_source(name, batches):
+        yield batch
+
+
+def test_failing_source_is_reported_after_the_other_sources_finish():
+    for failing in [failing_source, failing_async_source]:
+        errors = INGEST_SOURCE_ERRORS.value()
+        out = queue.Queue(maxsize=100)
+        start_ingest([failing("broken", 3), delayed_source("healthy", [0.05] * 5)], out, 1, 0.01)
+
+        records = []
+        with pytest.raises(SourceError) as raised:
+            for batch in iter_batches(out):
+                records.extend(batch)
+        assert isinstance(raised.value.__cause__, OSError)
+        # Every record read before the failure, and every record of the healthy source, came through first
+        assert sorted(data["seq"] for source, data in records if source == "broken") == [0, 1, 2]
+        assert [data["seq"] for source, data in records if source == "healthy"] == list(range(5))
+        assert INGEST_SOURCE_ERRORS.value() == errors + 1
+
+
+def test_pipeline_stores_the_healthy_records_then_exits_with_the_source_error():
+    script = (
+        "import data_pipeline, sources\n"
+        "def broken():\n"
+        "    yield from sources.synthetic_source(8, total_records=16, num_days=2, seed=2)\n"
+        "    raise OSError('connection reset')\n"
+        "try:\n"
+        "    data_pipeline.run_pipeline_consumer([broken(), sources.synthetic_source(8, total_records=40, num_days=2, seed=1)])\n"
+        "finally:\n"
+        "    print(len(data_pipeline.record_store))\n"
+    )
+    repo = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    result = subprocess.run([sys.executable, "-c", script], cwd=repo, capture_output=True, text=True, timeout=60)
+    assert result.returncode != 0
+    assert "ingest.SourceError" in result.stderr and "OSError: connection reset" in result.stderr
+    assert result.stdout.strip().splitlines()[-1] == "56"
+    assert "Pipeline Complete" not in result.stdout
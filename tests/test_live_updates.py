@@ -0,0 +1,78 @@
+import datetime
+import json
+import threading
+
+import pytest
+from flask import Flask
+
+import callbacks
+import live_updates
+from record_store import RecordStore
+from conftest import analyzed_records
+
+
+@pytest.fixture
+def store(monkeypatch):
+    store = RecordStore()
+    for day in range(1, 4):
+        store.append_many(analyzed_records(6, datetime.datetime(2025, 10, day)))
+    monkeypatch.setattr(live_updates, "record_store", store)
+    monkeypatch.setattr(callbacks, "record_store", store)
+    return store
+
+
+def test_update_carries_only_the_days_changed_since_the_rendered_version(store):
+    rendered = store.version
+    store.append_many(analyzed_records(3, datetime.datetime(2025, 10, 2)))  # NEGATIVE, POSITIVE, NEUTRAL
+    store.append_many(analyzed_records(1, datetime.datetime(2025, 10, 9)))  # outside the window
+
+    payload = live_updates.build_live_update(rendered, "2025-10-01", "2025-10-05")
+    assert payload["version"] == store.version
+    assert payload["negative"] == [["2025-10-02", 3]]
+    assert payload["happy_index"] == [["2025-10-02", 0.0]]
+    assert "Filtered Records: 21" in payload["footer"]
+
+    store.append_many(analyzed_records(2, datetime.datetime(2025, 10, 4)))  # NEGATIVE, POSITIVE
+    payload = live_updates.build_live_update(payload["version"], "2025-10-01", "2025-10-05")
+    assert payload["negative"] == [["2025-10-04", 1]]
+    assert payload["happy_index"] == [["2025-10-04", 0.0]]
+    assert live_updates.build_live_update(store.version, "2025-10-01", "2025-10-05")["happy_index"] == []
+
+
+def events(response):
+    # Parses the Server-Sent Events stream chunk by chunk
+    for chunk in response.response:
+        for event in chunk.decode().split("\n\n"):
+            if event:
+                yield event
+
+
+def test_stream_resyncs_from_the_rendered_version_then_follows_new_records(store, monkeypatch):
+    monkeypatch.setattr(live_updates, "LIVE_PUSH_KEEPALIVE_SECONDS", 0.05)
+    server = Flask(__name__)
+    live_updates.register_live_updates(server)
+    client = server.test_client()
+
+    # Records that landed between the charts render and the connect are sent straight away
+    rendered = store.version
+    store.append_many(analyzed_records(1, datetime.datetime(2025, 10, 3)))
+    response = client.get(f"/live-updates?start=2025-10-01&end=2025-10-05&version={rendered}", buffered=False)
+    stream = events(response)
+    assert next(stream) == "retry: 3000"
+    event_id, data = next(stream).split("\n")
+    assert event_id == f"id: {store.version}"
+    assert json.loads(data[len("data: "):])["negative"] == [["2025-10-03", 3]]
+
+    # Then the stream only keeps the connection alive until the next append
+    assert next(stream) == ": keep-alive"
+    threading.Timer(0.1, store.append_many, [analyzed_records(1, datetime.datetime(2025, 10, 1))]).start()
+    event = next(event for event in stream if event != ": keep-alive")
+    assert json.loads(event.split("\n")[1][len("data: "):])["negative"] == [["2025-10-01", 3]]
+    response.close()
+
+    # Without a rendered version (e.g. after a date range change) the stream starts from the current one
+    response = client.get("/live-updates?start=2025-10-01&end=2025-10-05", buffered=False)
+    stream = events(response)
+    assert next(stream) == "retry: 3000"
+    assert next(stream) == ": keep-alive"
+    response.close()
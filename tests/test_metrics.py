@@ -0,0 +1,22 @@
+from flask import Flask
+
+from metrics import profiler, register_metrics
+
+
+def client(profile_endpoint):
+    server = Flask(__name__)
+    register_metrics(server, profile_endpoint=profile_endpoint)
+    return server.test_client()
+
+
+def test_profile_endpoint_is_off_by_default():
+    assert client(profile_endpoint=False).get('/debug/profile').status_code == 404
+
+
+def test_profiler_is_switched_with_post_only():
+    c = client(profile_endpoint=True)
+    assert c.get('/debug/profile?action=start').status_code == 200
+    assert not profiler.running  # GET only reads the stacks
+    assert c.post('/debug/profile?action=start').data.decode().startswith("profiler running")
+    assert c.post('/debug/profile', data={'action': 'stop'}).data.decode().startswith("profiler stopped")
+    assert c.post('/debug/profile').status_code == 400
@@ -0,0 +1,86 @@
+import datetime
+import os
+
+import numpy as np
+import pandas as pd
+
+from persistence import RecordPersister, SharedStoreFollower
+from record_store import RecordStore
+from conftest import analyzed_records
+
+
+def test_records_survive_compaction_and_restart(tmp_path):
+    store = RecordStore()
+    persister = RecordPersister(str(tmp_path))
+    for day in [datetime.datetime(2025, 10, 1), datetime.datetime(2025, 10, 2)]:
+        records = analyzed_records(50, day)
+        store.append_many(records)
+        persister.append(records, {"replay": 50})  # a fresh persister logs without a warm start first
+    persister.compact(store)
+    tail = analyzed_records(5, datetime.datetime(2025, 10, 3))
+    store.append_many(tail)
+    persister.append(tail, {"replay": 105})
+    persister.close()
+
+    segment_dir = os.path.join(str(tmp_path), persister.segments[0])
+    assert not os.path.exists(os.path.join(segment_dir, "description.npy"))
+    assert os.path.exists(os.path.join(segment_dir, "description.codes.npy"))
+
+    restored = RecordStore()
+    cursors = RecordPersister(str(tmp_path)).load_into(restored)
+    assert cursors == {"replay": 105}
+    expected = store.snapshot().astype({"description": str, "record_id": str, "user_id": str})
+    actual = restored.snapshot().astype({"description": str, "record_id": str, "user_id": str})
+    pd.testing.assert_frame_equal(actual, expected)
+
+
+def test_followers_agree_on_versions_and_map_sealed_segments(tmp_path):
+    writer_store = RecordStore()
+    persister = RecordPersister(str(tmp_path))
+    early, late = RecordStore(), RecordStore()
+    early_follower, late_follower = SharedStoreFollower(str(tmp_path)), SharedStoreFollower(str(tmp_path))
+
+    for day in [datetime.datetime(2025, 10, 1), datetime.datetime(2025, 10, 2)]:
+        records = analyzed_records(50, day)
+        writer_store.append_many(records)
+        persister.append(records, {})
+        early_follower.sync(early)
+    persister.compact(writer_store)
+    tail = analyzed_records(5, datetime.datetime(2025, 10, 3))
+    writer_store.append_many(tail)
+    persister.append(tail, {})
+    persister.close()
+
+    early_follower.sync(early)
+    late_follower.sync(late)
+    assert early.version == late.version == 3  # one version per logged micro-batch, across the compaction
+    assert len(early) == len(late) == 105
+    for store in (early, late):
+        # The sealed log's rows now come from the memory-mapped segments, not from heap buffers
+        for day in store.days()[:2]:
+            partition = store._partitions[day]
+            assert partition.buffer.size == 0
+            assert all(isinstance(arrays["sentiment"], np.memmap) for arrays in partition.sealed)
+    pd.testing.assert_frame_equal(early.daily_sentiment(changed_since=early.version - 1),
+                                  late.daily_sentiment(changed_since=late.version - 1))
+
+
+def test_restored_reservoirs_come_from_the_saved_segment_samples(tmp_path):
+    store = RecordStore(sample_size=10)
+    persister = RecordPersister(str(tmp_path))
+    # Two segments for the first day, so their saved samples are merged into one reservoir per source
+    for day in [datetime.datetime(2025, 10, 1), datetime.datetime(2025, 10, 1), datetime.datetime(2025, 10, 2)]:
+        records = analyzed_records(60, day)
+        store.append_many(records)
+        persister.append(records, {})
+        persister.compact(store)
+    persister.close()
+
+    restored = RecordStore(sample_size=10)
+    RecordPersister(str(tmp_path)).load_into(restored)
+    sample = restored.sample()
+    assert len(sample) == 2 * 2 * 10  # two days, two sources, ten rows each
+    assert sample.groupby(sample["date"].dt.day)["stratum_records"].unique().map(list).to_dict() == {1: [60], 2: [30]}
+    for (day, _), rows in sample.groupby([sample["date"].dt.day, "source"], observed=True):
+        assert (rows["record_id"].str.split("_").str[1].astype(int) == day).all()
+    pd.testing.assert_series_equal(restored.sample()["weight"], store.sample()["weight"])
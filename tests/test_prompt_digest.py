@@ -0,0 +1,40 @@
+import datetime
+import json
+
+from config import AI_PROMPT_TOKEN_BUDGET
+from prompt_digest import build_digest, estimate_tokens, fit_to_budget
+from record_store import RecordStore
+from conftest import analyzed_records
+
+
+def over_budget_digest():
+    store = RecordStore()
+    for day in range(90):
+        records = analyzed_records(60, datetime.datetime(2025, 10, 1) + datetime.timedelta(days=day))
+        for i, record in enumerate(records):
+            record["description"] = f"{record['description']} (case {i % 20})"  # many distinct comments
+        store.append_many(records)
+    return build_digest(store.snapshot(), date_range_str="2025-10-01 to 2025-12-29", max_examples=40)
+
+
+def test_digest_is_trimmed_to_the_budget_least_valuable_detail_first():
+    digest = over_budget_digest()
+    full_tokens = estimate_tokens(json.dumps(digest, separators=(",", ":"), default=str))
+    assert full_tokens > AI_PROMPT_TOKEN_BUDGET
+    totals = {key: digest[key] for key in ["window", "records", "by_sentiment", "by_source", "by_issue"]}
+
+    smallest = estimate_tokens(fit_to_budget(digest, 1))  # only the sections that are never trimmed are left
+    assert "issue_sentiment_source" not in json.loads(fit_to_budget(digest, 1))
+    for budget in [AI_PROMPT_TOKEN_BUDGET, *range(smallest, full_tokens, 25)]:
+        fitted = json.loads(fit_to_budget(digest, budget))
+        assert estimate_tokens(fit_to_budget(digest, budget)) <= budget
+        assert {key: fitted[key] for key in totals} == totals  # the totals are never trimmed
+        assert fitted["outages"] == digest["outages"]
+        # Examples go first (rarest first), then every other day, then the cross-tab
+        assert fitted["examples"]["rows"] == digest["examples"]["rows"][:len(fitted["examples"]["rows"])]
+        if fitted["daily"].get("sampled"):
+            assert fitted["examples"]["rows"] == []
+        if "issue_sentiment_source" not in fitted:
+            assert len(fitted["daily"]["rows"]) <= 2
+
+    assert json.loads(fit_to_budget(digest, full_tokens)) == json.loads(json.dumps(digest, default=str))
@@ -0,0 +1,86 @@
+import datetime
+
+import numpy as np
+import pandas as pd
+
+from record_store import RecordStore, _StringPool, slice_by_day
+
+
+def record(record_id, user_id, description="No service again"):
+    return {"record_id": record_id, "source": "Call Log", "date": datetime.datetime(2025, 10, 1), "user_id": user_id,
+            "description": description, "sentiment": "NEGATIVE", "issue": "Network", "sentiment_score": -0.5, "latency_ms": None}
+
+
+def test_ids_are_read_back_unchanged():
+    ids = ["CALL_1", "CALL_20", "x007", "A_1_0", "0", "", "plain", "feedback_user_12345678901234567890"]
+    store = RecordStore()
+    store.append_many([record(record_id, f"call_user_{i}") for i, record_id in enumerate(ids)])
+
+    snapshot = store.snapshot()
+    assert snapshot["record_id"].tolist() == ids
+    assert snapshot["user_id"].tolist() == [f"call_user_{i}" for i in range(len(ids))]
+
+
+def test_string_pool_only_holds_descriptions_and_stays_bounded():
+    store = RecordStore()
+    store.append_many([record(f"CALL_{i}", f"call_user_{i}", ["a", "b"][i % 2]) for i in range(1000)])
+    assert len(store._string_pool.strings) == 2
+
+    pool = _StringPool(max_size=3)
+    first = pool.intern(["a", "b", "c"])
+    assert len(pool.strings) == 3
+    assert pool.intern(["d", "a"]).tolist() == ["d", "a"]
+    assert len(pool.strings) == 2
+    assert first[0] == "a"
+
+
+def random_records(rng, count):
+    days = [datetime.datetime(2025, 9, 28) + datetime.timedelta(days=int(day)) for day in rng.choice(
+        [0, 1, 2, 4, 5, 6, 9, 10, 11, 12, 15, 20], size=count)]  # some days have no records
+    return [{
+        "record_id": f"R{i}", "source": ["Call Log", "Feedback Form"][i % 2],
+        "date": day + datetime.timedelta(minutes=int(rng.integers(0, 24 * 60))), "user_id": f"user_{i}",
+        "description": "No service again", "sentiment": str(rng.choice(["POSITIVE", "NEGATIVE", "NEUTRAL"])),
+        "issue": str(rng.choice(["Network", "Billing", "Other"])), "sentiment_score": 0.0, "latency_ms": None,
+    } for i, day in enumerate(days)]
+
+
+def test_day_slicing_and_rollups_match_a_full_scan():
+    rng = np.random.default_rng(3)
+    records = random_records(rng, 3000)
+    store = RecordStore(initial_capacity=16)
+    for start in range(0, len(records), 250):  # chunks span many days, and days arrive out of order
+        store.append_many(records[start:start + 250])
+    scan = pd.DataFrame(records)
+    scan_days = scan["date"].dt.normalize()
+
+    windows = [(None, None), ("2025-10-01", "2025-10-01"), ("2025-09-01", "2025-10-03"), ("2025-10-02", "2025-10-02"),
+               ("2025-10-07 13:45", datetime.datetime(2025, 10, 10, 1)), ("2025-10-08", None), (None, "2025-09-28"),
+               ("2025-11-01", "2025-11-30"), ("2025-10-10", "2025-10-01")]
+    for start, end in windows:
+        in_window = pd.Series(True, index=scan.index)
+        if start is not None:
+            in_window &= scan_days >= pd.Timestamp(start).normalize()
+        if end is not None:
+            in_window &= scan_days <= pd.Timestamp(end).normalize()
+        expected = scan[in_window].assign(day=scan_days[in_window]).sort_values("day", kind="stable")
+
+        snapshot = store.snapshot(start, end)
+        assert snapshot["record_id"].tolist() == expected["record_id"].tolist(), (start, end)
+        assert snapshot["date"].tolist() == expected["day"].tolist()  # the store keeps the day of each record
+        assert store.count(start, end) == len(expected)
+
+        breakdown = store.issue_breakdown(start, end).set_index(["issue", "sentiment", "source"])["Count"]
+        expected_breakdown = expected.groupby(["issue", "sentiment", "source"]).size()
+        assert breakdown.sort_index().to_dict() == expected_breakdown.to_dict()
+
+        daily = store.daily_sentiment(start, end)
+        counts = expected.groupby(["day", "sentiment"]).size().unstack(fill_value=0)
+        assert daily["Date"].tolist() == counts.index.tolist()
+        for sentiment in ["POSITIVE", "NEGATIVE", "NEUTRAL"]:
+            assert daily[sentiment].tolist() == (counts[sentiment].tolist() if sentiment in counts else [0] * len(counts))
+        assert daily["Total"].tolist() == counts.sum(axis=1).tolist()
+        np.testing.assert_allclose(daily["Happy_Index"], (daily["POSITIVE"] - daily["NEGATIVE"]) / daily["Total"])
+
+        sliced = slice_by_day(scan.sort_values("date"), start, end)
+        assert sorted(sliced["record_id"]) == sorted(expected["record_id"])
@@ -0,0 +1,36 @@
+import datetime
+
+import numpy as np
+
+from record_store import RecordStore
+from sampling import lttb_indices, sample_error_bounds
+from conftest import analyzed_records
+
+
+def test_lttb_keeps_the_end_points_within_the_point_budget():
+    rng = np.random.default_rng(0)
+    x = np.arange(5000)
+    y = rng.normal(size=5000)
+    y[2500] = 50.0  # a spike like the outage day
+
+    for budget in [3, 10, 500]:
+        kept = lttb_indices(x, y, budget)
+        assert len(kept) == budget
+        assert kept[0] == 0 and kept[-1] == len(x) - 1
+        assert (np.diff(kept) > 0).all()
+    assert 2500 in lttb_indices(x, y, 10)
+    assert len(lttb_indices(x, y, 6000)) == 5000  # already within the budget
+
+
+def test_error_bounds_shrink_as_the_sample_grows():
+    records = [record for day in range(1, 8) for record in analyzed_records(1000, datetime.datetime(2025, 10, day))]
+    margins = []
+    for sample_size in [20, 100, 400, 500]:
+        store = RecordStore(sample_size=sample_size)
+        store.append_many(records)
+        bounds = sample_error_bounds(store.sample())
+        assert bounds["records"] == len(records)
+        margins.append((bounds["negative_share_margin"], bounds["happy_index_margin"]))
+
+    for margin in zip(*margins):
+        assert margin[0] > margin[1] > margin[2] > margin[3] == 0.0  # 500 keeps every (day, source) stratum whole
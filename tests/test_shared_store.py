@@ -0,0 +1,82 @@
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+import urllib.request
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+TOTAL_RECORDS = 3000
+
+# Both processes patch config before anything imports it, the way a deployment would edit config.py
+CONFIG = (
+    "import config\n"
+    "config.INGEST_MODE = 'process'\n"
+    "config.DATA_DIR = {data_dir!r}\n"
+    "config.PERSIST_COMPACT_RECORDS = 400\n"
+    "config.SHARED_STORE_REFRESH_SECONDS = 0.05\n"
+)
+INGEST = CONFIG + (
+    "import data_pipeline, sources\n"
+    "data_pipeline.run_pipeline_consumer([sources.synthetic_source(8, total_records={total}, num_days=5, seed=1)])\n"
+)
+WORKER = CONFIG + (
+    "import app\n"
+    "app.flask_server.run(host='127.0.0.1', port={port}, threaded=True)\n"
+)
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def status(port):
+    try:
+        with urllib.request.urlopen(f"http://127.0.0.1:{port}/status", timeout=2) as response:
+            return json.load(response)
+    except OSError:
+        return None
+
+
+def test_every_worker_reports_the_ingest_process_records(tmp_path):
+    data_dir = str(tmp_path / "data")
+    ports = [free_port() for _ in range(3)]
+    workers = [subprocess.Popen([sys.executable, "-c", WORKER.format(data_dir=data_dir, port=port)], cwd=REPO,
+                                stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL) for port in ports]
+    try:
+        deadline = time.monotonic() + 60
+        while any(status(port) is None for port in ports):
+            assert time.monotonic() < deadline, "web workers did not start"
+            time.sleep(0.2)
+
+        ingest = subprocess.Popen([sys.executable, "-c", INGEST.format(data_dir=data_dir, total=TOTAL_RECORDS)], cwd=REPO,
+                                  stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+        # While the ingest process writes (and compacts), no worker's count ever goes backwards
+        last = {port: 0 for port in ports}
+        while ingest.poll() is None:
+            for port in ports:
+                records = status(port)["records"]
+                assert records >= last[port]
+                last[port] = records
+            time.sleep(0.05)
+        assert ingest.returncode == 0, ingest.stderr.read()
+
+        deadline = time.monotonic() + 30
+        while {status(port)["records"] for port in ports} != {TOTAL_RECORDS}:
+            assert time.monotonic() < deadline, [status(port) for port in ports]
+            time.sleep(0.1)
+        assert len({status(port)["pid"] for port in ports}) == len(ports)
+    finally:
+        for worker in workers:
+            worker.kill()
+            worker.wait()
+
+
+def test_process_mode_refuses_a_database_backend():
+    script = "import config\nconfig.INGEST_MODE = 'process'\nconfig.RECORD_STORE_BACKEND = 'sqlite'\nimport data_pipeline\n"
+    result = subprocess.run([sys.executable, "-c", script], cwd=REPO, capture_output=True, text=True, timeout=60)
+    assert result.returncode != 0
+    assert "INGEST_MODE = 'process' needs RECORD_STORE_BACKEND = 'memory'" in result.stderr
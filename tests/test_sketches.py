@@ -0,0 +1,41 @@
+import numpy as np
+
+from sketches import LatencySketch, RELATIVE_ACCURACY, merged
+
+
+def test_quantiles_are_within_the_relative_accuracy_of_numpy_percentiles():
+    rng = np.random.default_rng(7)
+    days = [rng.lognormal(mean=5 + day / 10, sigma=0.8, size=5000) for day in range(10)]
+    days[3][:50] = 0  # records that reported no latency at all
+
+    sketches = []
+    for values in days:
+        sketch = LatencySketch()
+        for chunk in np.array_split(values, 7):
+            sketch.add(chunk)
+        sketch.add([np.nan])  # records without telemetry are not counted
+        sketches.append(sketch)
+    values = np.concatenate(days)
+    total = merged(sketches)
+    assert total.count == len(values)
+
+    for q in [0.0, 0.01, 0.25, 0.5, 0.9, 0.95, 0.99, 0.999, 1.0]:
+        # The sketch answers with the bucket of the value at rank q * (n - 1), i.e. numpy's "lower" method
+        exact = np.percentile(values, q * 100, method="lower")
+        estimate = total.quantile(q)
+        assert abs(estimate - exact) <= RELATIVE_ACCURACY * exact, q
+        assert abs(estimate - np.percentile(values, q * 100)) <= 0.011 * np.percentile(values, q * 100), q
+
+    for values, sketch in zip(days, sketches):
+        exact = np.percentile(values, 95, method="lower")
+        assert abs(sketch.quantile(0.95) - exact) <= RELATIVE_ACCURACY * exact
+
+
+def test_round_trip_and_empty_sketch():
+    sketch = LatencySketch()
+    assert np.isnan(sketch.quantile(0.5))
+    sketch.add([0.5, 120.0, 120.0, 3000.0, 0.0])
+    restored = LatencySketch.from_dict(sketch.to_dict())
+    assert restored.count == 5
+    assert [restored.quantile(q) for q in [0, 0.5, 1]] == [sketch.quantile(q) for q in [0, 0.5, 1]]
+    assert sketch.quantile(0) == 0.0
@@ -0,0 +1,29 @@
+from sources import jsonl_tail_source
+
+
+def test_jsonl_source_skips_malformed_lines(tmp_path):
+    path = tmp_path / "records.jsonl"
+    path.write_text(
+        '{"source": "Call Log", "date": "2025-10-02", "description": "good one"}\n'
+        '{not json\n'
+        '{"date": "2025-10-02", "description": "no source"}\n'
+        '{"source": "Call Log", "description": "no date"}\n'
+        '{"source": "Call Log", "date": "2025-10-02"}\n'
+        '{"source": "Call Log", "date": "yesterday", "description": "bad date"}\n'
+        '{"source": "  ", "date": "2025-10-02", "description": "blank source"}\n'
+        '{"source": "Call Log", "date": "2025-10-02", "description": "nan latency", "network": {"latency_ms": NaN}}\n'
+        '{"source": "Call Log", "date": "2025-10-02", "description": "inf latency", "network": {"latency_ms": Infinity}}\n'
+        '{"source": "Call Log", "date": "2025-10-02", "description": "huge latency", "network": {"latency_ms": ' + "9" * 400 + '}}\n'
+        '{"source": "Feedback Form", "date": "2025-10-03", "description": "good two", "network": {"latency_ms": "x"}}\n'
+        '{"source": "Feedback Form", "date": "2025-10-03", "description": "null id", "record_id": null}\n'
+    )
+    batches = list(jsonl_tail_source(str(path), 8, follow=False))
+
+    records = [record for batch in batches for record in batch]
+    assert [(source, data["description"]) for source, data in records] == [
+        ("Call Log", "good one"), ("Feedback Form", "good two"), ("Feedback Form", "null id")
+    ]
+    assert records[1][1]["network"] == {}
+    assert records[-1][1]["record_id"].startswith("FEEDBACK_EXT_")
+    # The last cursor is past every line, bad ones included, so a restart does not re-read them
+    assert records[-1][1]["_cursor"][1] == path.stat().st_size
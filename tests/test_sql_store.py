@@ -0,0 +1,94 @@
+import datetime
+import os
+import sqlite3
+import subprocess
+import sys
+
+import pandas as pd
+import pytest
+
+from record_store import RecordStore
+from sql_store import SqlRecordStore
+from conftest import analyzed_records, vader_lexicon_missing
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Run as a script file, so the spawned scoring workers re-import it (and data_pipeline) as __mp_main__
+PIPELINE_SCRIPT = (
+    "import sys\n"
+    "sys.path.insert(0, {repo!r})\n"
+    "import config\n"
+    "config.RECORD_STORE_BACKEND = 'sqlite'\n"
+    "config.SQL_STORE_PATH = {path!r}\n"
+    "config.SCORING_PROCESSES = 2\n"
+    "config.PIPELINE_SOURCES = ['synthetic']\n"
+    "config.SYNTHETIC_TOTAL_RECORDS = {total}\n"
+    "import data_pipeline\n"
+    "if __name__ == '__main__':\n"
+    "    data_pipeline.run_pipeline_consumer()\n"
+)
+
+
+def test_sqlite_backend_matches_record_store():
+    memory, sql = RecordStore(), SqlRecordStore()
+    for day, count in [(1, 40), (2, 25), (4, 60)]:
+        records = analyzed_records(count, datetime.datetime(2025, 10, day))
+        memory.append_many(records)
+        sql.append_many(records)
+
+    for window in [(None, None), ("2025-10-02", "2025-10-04"), ("2025-10-03", "2025-10-03")]:
+        assert sql.count(*window) == memory.count(*window)
+        keys = ["issue", "sentiment", "source"]
+        pd.testing.assert_frame_equal(
+            sql.issue_breakdown(*window).sort_values(keys).reset_index(drop=True),
+            memory.issue_breakdown(*window).sort_values(keys).reset_index(drop=True)
+        )
+        pd.testing.assert_frame_equal(sql.daily_sentiment(*window), memory.daily_sentiment(*window), check_like=True)
+        # Category order follows first appearance in RecordStore, so compare the decoded values
+        pd.testing.assert_frame_equal(
+            sql.snapshot(*window).astype(str).sort_values("record_id").reset_index(drop=True),
+            memory.snapshot(*window).astype(str).sort_values("record_id").reset_index(drop=True)
+        )
+        pd.testing.assert_frame_equal(sql.latency_percentiles(*window), memory.latency_percentiles(*window))
+        pd.testing.assert_series_equal(pd.Series(sql.latency_summary(*window)), pd.Series(memory.latency_summary(*window)))
+
+
+def test_sample_takes_up_to_sample_size_rows_per_stratum():
+    store = SqlRecordStore(sample_size=10)
+    store.append_many(analyzed_records(60, datetime.datetime(2025, 10, 1)))
+    store.append_many(analyzed_records(8, datetime.datetime(2025, 10, 2)))
+
+    sample = store.sample()
+    sizes = sample.groupby([sample["date"].dt.day, "source"], observed=True).size().to_dict()
+    assert sizes == {(1, "Call Log"): 10, (1, "Feedback Form"): 10, (2, "Call Log"): 4, (2, "Feedback Form"): 4}
+    assert sample.groupby(sample["date"].dt.day)["stratum_records"].unique().map(list).to_dict() == {1: [30], 2: [4]}
+    assert sample["record_id"].is_unique
+    assert list(sample.columns[:9]) == ["record_id", "source", "date", "user_id", "description", "sentiment", "issue",
+                                        "sentiment_score", "latency_ms"]
+    assert sample.loc[sample["date"].dt.day == 2, "weight"].eq(1).all()
+    assert sample.loc[sample["date"].dt.day == 1, "weight"].eq(3).all()
+
+
+def test_reopening_the_database_keeps_its_records(tmp_path):
+    path = str(tmp_path / "records.db")
+    store = SqlRecordStore(path=path)
+    store.append_many(analyzed_records(20, datetime.datetime(2025, 10, 1)))
+    SqlRecordStore(path=path)  # what every process importing data_pipeline does
+    assert store.count() == len(store.snapshot()) == 20
+
+    store.reset()
+    assert store.count() == len(store.snapshot()) == 0
+
+
+@pytest.mark.skipif(vader_lexicon_missing(), reason="VADER lexicon not in nltk_data (python -m nltk.downloader vader_lexicon)")
+def test_sqlite_backend_with_a_scoring_pool(tmp_path):
+    path = str(tmp_path / "records.db")
+    SqlRecordStore(path=path).append_many(analyzed_records(50, datetime.datetime(2025, 9, 1)))  # left over from a previous run
+    script = tmp_path / "ingest.py"
+    script.write_text(PIPELINE_SCRIPT.format(repo=REPO, path=path, total=600))
+
+    result = subprocess.run([sys.executable, str(script)], cwd=str(tmp_path), capture_output=True, text=True, timeout=120)
+    assert result.returncode == 0, result.stderr
+    with sqlite3.connect(path) as connection:
+        assert connection.execute("SELECT COUNT(*) FROM records").fetchone() == (600,)
+        assert connection.execute("SELECT SUM(n) FROM daily_counts").fetchone() == (600,)